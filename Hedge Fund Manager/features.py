@@ -87,11 +87,17 @@ def add_technical_indicators(df):
     
     return df
 
-def add_relative_strength(df, benchmark_df):
+def add_relative_strength(df, benchmark_df, benchmark_close=None):
     """
     Adds Relative Strength compared to a benchmark (e.g., Nifty 50).
+    benchmark_close: precomputed benchmark Close series (used instead of benchmark_df).
+    benchmark_df is not modified.
     """
-    if df.empty or benchmark_df.empty:
+    if benchmark_close is None:
+        if benchmark_df is None or benchmark_df.empty:
+            return df
+        benchmark_close = benchmark_df['Close']
+    if df.empty or benchmark_close.empty:
         return df
         
     # Align dates
@@ -99,7 +105,6 @@ def add_relative_strength(df, benchmark_df):
     
     # Calculate returns
     df['Returns'] = df['Close'].pct_change()
-    benchmark_df['Bnch_Returns'] = benchmark_df['Close'].pct_change()
     
     # Relative Strength: Stock Return - Benchmark Return
     # Or Ratio: Stock / Benchmark
@@ -108,7 +113,7 @@ def add_relative_strength(df, benchmark_df):
     # We need to map benchmark close to df
     
     # Join benchmark close
-    df = df.join(benchmark_df['Close'].rename('Benchmark_Close'), how='left')
+    df = df.join(benchmark_close.rename('Benchmark_Close'), how='left')
     
     df['RS_Ratio'] = df['Close'] / df['Benchmark_Close']
     df['RS_Momentum'] = df['RS_Ratio'].pct_change(periods=20) # 1 month RS momentum
@@ -140,11 +145,15 @@ def calculate_vwap(df):
     
     return df
 
-def calculate_alpha_beta(df, benchmark_df, window=60):
+def calculate_alpha_beta(df, benchmark_df, window=60, bench_returns=None, bench_variance=None):
     """
     Calculates Alpha and Beta relative to benchmark over a rolling window.
+    bench_returns: precomputed benchmark daily returns (used instead of benchmark_df).
+    bench_variance: precomputed rolling variance of those returns, aligned to df's index.
     """
-    if df.empty or benchmark_df.empty:
+    if bench_returns is None and benchmark_df is not None and not benchmark_df.empty:
+        bench_returns = benchmark_df['Close'].pct_change()
+    if df.empty or bench_returns is None or bench_returns.empty:
         df['Alpha'] = 0
         df['Beta'] = 1
         return df
@@ -157,11 +166,11 @@ def calculate_alpha_beta(df, benchmark_df, window=60):
     
     # Benchmark returns (ensure aligned index)
     # We reindex benchmark to match stock df
-    bench_ret = benchmark_df['Close'].pct_change().reindex(df.index).fillna(0)
+    bench_ret = bench_returns.reindex(df.index).fillna(0)
     
     # Rolling Covariance and Variance
     covariance = stock_ret.rolling(window=window).cov(bench_ret)
-    variance = bench_ret.rolling(window=window).var()
+    variance = bench_variance if bench_variance is not None else bench_ret.rolling(window=window).var()
     
     # Beta = Cov / Var
     df['Beta'] = covariance / variance
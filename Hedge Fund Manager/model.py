@@ -2,13 +2,79 @@ import xgboost as xgb
 from sklearn.model_selection import train_test_split
 import pandas as pd
 import numpy as np
+import os
+import pickle
+import hashlib
+import threading
 
-def train_predict_model(df):
+# Last trained model per ticker, reused when a run is short on time or when
+# it was trained on exactly the same data (e.g. by the overnight EOD job)
+MODEL_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+
+def _cache_path(ticker):
+    return os.path.join(MODEL_CACHE_DIR, f"{ticker}.pkl")
+
+def training_key(X, y):
+    """Hash of the exact training set, so an identical retrain can be skipped."""
+    h = hashlib.sha1("|".join(X.columns).encode())
+    h.update(X.index.values.astype("datetime64[ns]").tobytes())
+    h.update(np.ascontiguousarray(X.to_numpy(dtype=np.float64)).tobytes())
+    h.update(np.ascontiguousarray(y.to_numpy(dtype=np.float64)).tobytes())
+    return h.hexdigest()
+
+def save_cached_model(ticker, model, features, score, data_key=None):
+    """Best effort: concurrent runs of one ticker each write their own temp file, and a failed write is skipped."""
+    path = _cache_path(ticker)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+        with open(tmp, "wb") as f:
+            pickle.dump({"model": model, "features": features, "score": score, "data_key": data_key}, f)
+        os.replace(tmp, path)
+    except (OSError, pickle.PicklingError) as e:
+        print(f"[Model] Could not cache the {ticker} model: {e}")
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+def load_cached_model(ticker):
+    path = _cache_path(ticker)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        return None
+
+def predict_cached_model(df, ticker):
+    """
+    Next day's close from the ticker's last trained model, without retraining.
+    Returns (predicted_price, score) or None if there is no usable cached model.
+    """
+    cached = load_cached_model(ticker)
+    if cached is None or not set(cached["features"]) <= set(df.columns):
+        return None
+    last_row = df.iloc[[-1]][cached["features"]]
+    if last_row.isnull().values.any():
+        last_row = last_row.fillna(df[cached["features"]].median())
+    return cached["model"].predict(last_row)[0], cached["score"]
+
+def train_predict_model(df, ticker=None, use_cached=False):
     """
     Trains XGBoost model and predicts next day's close.
     FIX #4: Uses all meaningful features instead of just 5.
+    With a ``ticker`` the trained model is cached; ``use_cached`` predicts
+    with the cached one instead of training (falls back to training). A
+    cached model trained on the same data is reused either way.
     Returns: predicted_price, confidence_score (R2)
     """
+    if use_cached and ticker:
+        cached = predict_cached_model(df, ticker)
+        if cached is not None:
+            return cached
+
     # FIX #4: Expanded feature set — use all indicators that features.py calculates
     feature_cols = [
         'RSI', 
@@ -41,6 +107,16 @@ def train_predict_model(df):
     X = data[available_features]
     y = data['Target']
     
+    # Same training set as the cached model (e.g. trained overnight): predict with it
+    data_key = training_key(X, y) if ticker else None
+    if data_key is not None:
+        cached = load_cached_model(ticker)
+        if cached is not None and cached.get("data_key") == data_key:
+            last_row = df.iloc[[-1]][available_features]
+            if last_row.isnull().values.any():
+                last_row = last_row.fillna(X.median())
+            return cached["model"].predict(last_row)[0], cached["score"]
+    
     # Train/Test Split (Time-based split, no shuffle)
     split_idx = int(len(X) * 0.8)
     X_train, X_test = X.iloc[:split_idx], X.iloc[split_idx:]
@@ -76,4 +152,7 @@ def train_predict_model(df):
         
     predicted_price = model.predict(last_row)[0]
     
+    if ticker:
+        save_cached_model(ticker, model, available_features, score, data_key)
+    
     return predicted_price, score
@@ -0,0 +1,420 @@
+"""
+Super Agent 4.0 — Universe Aggregation
+=======================================
+The Super Agent 4.0 scoring (graduated signals, model-specific persistence
+weights, graduated ADX filter, consensus gate, supreme tier, trade params)
+computed for the whole universe at once.
+
+Raw wrapper outputs are gathered into a ScoreTable: arrays indexed
+[ticker, model] for each mode's current signal and [ticker, model, day] for
+the history, with every distinct signal string decoded once. Each step then
+runs in NumPy across all tickers, with floating-point operations in the same
+order as the per-ticker closures it replaces (models summed in report
+order), so scores match them exactly.
+
+Thresholds live in DEFAULT_PARAMS: re-score the same table with a tuned copy
+via ``score_universe(table, params)``.
+"""
+
+import numpy as np
+
+from wrappers import MODEL_WRAPPERS
+
+MODELS = list(MODEL_WRAPPERS)   # display names, report order
+MODES = ("swing", "intraday")
+
+# --- FIX #10: Model-Specific Persistence Weights ---
+MODEL_WEIGHTS = {
+    "Hedge Fund Manager":       [0.40, 0.35, 0.25],   # Slow (institutional)
+    "Most Advance stock_AI":    [0.50, 0.30, 0.20],   # Balanced
+    "Quantitative Development": [0.50, 0.30, 0.20],   # Balanced
+    "Apex Logic":               [0.60, 0.25, 0.15],   # Fast (price action)
+}
+DEFAULT_WEIGHTS = [0.5, 0.3, 0.2]
+PERSISTENCE_DAYS = 3
+
+# Wrappers scale confidences to 0-1 (FIX #17), so one model's persistence
+# score (weights sum to 1) lies within +/- this
+MAX_PERSISTENCE = 1.0
+
+# Priority for trade params: Apex > Quant > StockAI > HFM
+PARAM_PRIORITY = ["Apex Logic", "Quantitative Development", "Most Advance stock_AI", "Hedge Fund Manager"]
+
+DEFAULT_PARAMS = {
+    "no_history_factor": 0.5,    # persistence score of a model without history
+    # FIX #9: Graduated ADX Filter (swing only, long scores only)
+    "adx_veto": 20,              # ADX below this: hard veto
+    "adx_penalty": 25,           # ADX below this: penalty
+    "adx_penalty_factor": 0.5,
+    # FIX #12: Consensus Gate
+    "consensus_override": 0.6,   # conflicts are only penalised below this |score|
+    "consensus_penalty": 0.3,
+    # Final signal cut-offs
+    "strong_buy": 0.5,
+    "buy": 0.15,
+    "strong_sell": -0.5,
+    "sell": -0.15,
+    # Supreme tier
+    "supreme_score": 0.6,
+    "supreme_adx": 25,
+    # Meta-model filter (swing): upgrade BUY above, downgrade any BUY below
+    "ml_upgrade": 0.7,
+    "ml_downgrade": 0.3,
+    # Persistence weights per model, on top of MODEL_WEIGHTS (None: as is)
+    "model_weights": None,
+}
+
+
+# --- SIGNAL DECODING (once per distinct string) ---
+
+# --- FIX #1: Graduated Signal Normalization ---
+# BUY and STRONG BUY are not identical.
+def _decode(signal):
+    s = str(signal).upper().replace("_", " ")
+    if "STRONG BUY" in s: value = 1.0
+    elif "STRONG SELL" in s: value = -1.0
+    elif "BUY" in s: value = 0.7        # Weaker than STRONG BUY
+    elif "SELL" in s: value = -0.7      # Weaker than STRONG SELL
+    else: value = 0.0                   # WAIT / HOLD
+    # Direction only (+1, -1, 0) for consensus checks
+    direction = 1 if "BUY" in s else -1 if "SELL" in s else 0
+    return value, direction
+
+
+class SignalCodec:
+    def __init__(self):
+        self._cache = {}
+
+    def __call__(self, signal):
+        decoded = self._cache.get(signal)
+        if decoded is None:
+            decoded = self._cache[signal] = _decode(signal)
+        return decoded
+
+
+# --- COLUMNAR TABLE ---
+
+class ScoreTable:
+    """Raw per-model outputs for a universe as (ticker x model [x day]) arrays."""
+
+    def __init__(self, results_by_ticker, models=MODELS):
+        self.results = results_by_ticker
+        self.tickers = list(results_by_ticker)
+        self.models = list(models)
+        n, m = len(self.tickers), len(self.models)
+        days = max([len(res.get("history", []))
+                    for results in results_by_ticker.values()
+                    for res in results.values() if "error" not in res] or [0])
+        self.days = max(days, 1)
+        codec = SignalCodec()
+
+        self.valid = np.zeros((n, m), dtype=bool)
+        self.adx = np.full((n, m), np.nan)
+        self.rvol = np.full((n, m), np.nan)
+        self.has_history = np.zeros((n, m), dtype=bool)
+        self.hist_value = np.zeros((n, m, self.days))
+        self.hist_dir = np.zeros((n, m, self.days), dtype=np.int8)
+        self.hist_conf = np.zeros((n, m, self.days))
+        self.hist_mask = np.zeros((n, m, self.days), dtype=bool)
+        self.value = {mode: np.zeros((n, m)) for mode in MODES}
+        self.direction = {mode: np.zeros((n, m), dtype=np.int8) for mode in MODES}
+        self.conf = {mode: np.zeros((n, m)) for mode in MODES}
+        self.trade = {mode: np.zeros((n, m, 3), dtype=object) for mode in MODES}   # entry, target, sl
+
+        for i, ticker in enumerate(self.tickers):
+            results = results_by_ticker[ticker]
+            for j, name in enumerate(self.models):
+                res = results.get(name)
+                if res is None or "error" in res:
+                    continue
+                self.valid[i, j] = True
+                details = res.get("details", {})
+                if "adx" in details:
+                    self.adx[i, j] = details["adx"]
+                if "rvol" in details:
+                    self.rvol[i, j] = details["rvol"]
+                for mode in MODES:
+                    current = res.get(mode, {})
+                    self.value[mode][i, j], self.direction[mode][i, j] = codec(current.get("signal", "WAIT"))
+                    self.conf[mode][i, j] = current.get("confidence", 0)
+                    self.trade[mode][i, j] = [current.get(k, 0) for k in ("entry", "target", "sl")]
+                history = res.get("history", [])
+                self.has_history[i, j] = bool(history)
+                for k, h in enumerate(history):
+                    self.hist_value[i, j, k], self.hist_dir[i, j, k] = codec(h.get("signal", "WAIT"))
+                    self.hist_conf[i, j, k] = h.get("confidence", 0)
+                    self.hist_mask[i, j, k] = True
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def _mean_positive(self, values):
+        """Mean of each ticker's positive values over working models (0 if none), summed in model order."""
+        total = np.zeros(len(self))
+        count = np.zeros(len(self), dtype=int)
+        for j in range(len(self.models)):
+            use = self.valid[:, j] & (values[:, j] > 0)
+            total = np.where(use, total + np.where(use, values[:, j], 0), total)
+            count += use
+        return np.where(count > 0, total / np.maximum(count, 1), 0.0)
+
+
+# --- SCORING ---
+
+class UniverseScores:
+    """Super scores, final signals, supreme flags and trade params per ticker and mode."""
+
+    def __init__(self, table, params):
+        self.table = table
+        self.params = params
+        self.avg_adx = table._mean_positive(table.adx)
+        self.avg_rvol = table._mean_positive(table.rvol)
+        self.super_score, self.final_signal, self.is_supreme, self.trade = {}, {}, {}, {}
+        for mode in MODES:
+            score = self._super_score(mode)
+            signal = final_signals(score, params)
+            self.super_score[mode] = score
+            self.final_signal[mode] = signal
+            self.is_supreme[mode] = self._supreme(mode, score)
+            self.trade[mode] = self._trade_params(mode, signal)
+
+    def _persistence(self, mode):
+        t, p = self.table, self.params
+        table = {**MODEL_WEIGHTS, **(p.get("model_weights") or {})}
+        weights = np.array([table.get(name, DEFAULT_WEIGHTS) for name in t.models])
+        score = np.zeros(t.valid.shape)
+        for k in range(min(PERSISTENCE_DAYS, t.days)):
+            term = t.hist_value[:, :, k] * t.hist_conf[:, :, k] * weights[:, k]
+            score = np.where(t.hist_mask[:, :, k], score + term, score)
+        # Fallback: no history available
+        fallback = t.value[mode] * t.conf[mode] * p["no_history_factor"]
+        return np.where(t.has_history, score, fallback)
+
+    def _super_score(self, mode):
+        t, p = self.table, self.params
+        persistence = self._persistence(mode)
+        total = np.zeros(len(t))
+        for j in range(len(t.models)):
+            total = np.where(t.valid[:, j], total + persistence[:, j], total)
+        n_valid = t.valid.sum(axis=1)
+        score = np.where(n_valid > 0, total / np.maximum(n_valid, 1), 0.0)
+
+        # --- FILTERS ---
+        if mode == "swing":
+            adx = self.avg_adx
+            long = score > 0
+            score = np.where(long & (adx < p["adx_veto"]), 0.0, score)
+            borderline = long & (adx >= p["adx_veto"]) & (adx < p["adx_penalty"])
+            score = np.where(borderline, score * p["adx_penalty_factor"], score)
+
+        # If models disagree on direction (one BUY, another SELL), penalise
+        direction = np.where(t.valid, t.direction[mode], 0)
+        conflict = (direction > 0).any(axis=1) & (direction < 0).any(axis=1)
+        weak = np.abs(score) < p["consensus_override"]
+        return np.where(conflict & weak, score * p["consensus_penalty"], score)
+
+    def _supreme(self, mode, score):
+        """
+        SUPREME only if the score and ADX clear their bars and every working
+        model says BUY now and on every history day.
+        """
+        t, p = self.table, self.params
+        history_buy = np.all(~t.hist_mask | (t.hist_dir == 1), axis=2)
+        model_ok = ~t.valid | ((t.direction[mode] == 1) & history_buy)
+        return (score >= p["supreme_score"]) & (self.avg_adx >= p["supreme_adx"]) & model_ok.all(axis=1)
+
+    def _trade_params(self, mode, signal):
+        """(entry, target, sl) from the first model in PARAM_PRIORITY agreeing with the final direction, else Apex."""
+        t = self.table
+        final_dir = np.array([_decode(s)[1] for s in signal], dtype=np.int8)
+        chosen = np.full(len(t), -1)
+        for name in PARAM_PRIORITY:
+            if name not in t.models:
+                continue
+            j = t.models.index(name)
+            match = (chosen < 0) & (final_dir != 0) & t.valid[:, j] & (t.direction[mode][:, j] == final_dir)
+            chosen = np.where(match, j, chosen)
+        trade = np.zeros((len(t), 3), dtype=object)
+        apex = t.models.index("Apex Logic") if "Apex Logic" in t.models else None
+        for i in range(len(t)):
+            j = chosen[i]
+            if j < 0 and apex is not None and t.valid[i, apex]:
+                j = apex
+            if j >= 0:
+                trade[i] = t.trade[mode][i, j]
+        return trade
+
+    def records(self, ml_confidence=None, swing_signals=None):
+        """
+        [(swing_res, intraday_res)] in table order. ``ml_confidence`` and
+        ``swing_signals`` (the swing signal after the meta-model's
+        upgrade/downgrade) are per-ticker overrides.
+        """
+        t = self.table
+        out = []
+        for i, ticker in enumerate(t.tickers):
+            results = t.results[ticker]
+            ml = ml_confidence[i] if ml_confidence is not None else None
+            pair = []
+            for mode in MODES:
+                signal = str(self.final_signal[mode][i])
+                if mode == "swing" and swing_signals is not None:
+                    signal = str(swing_signals[i])
+                supreme = bool(self.is_supreme[mode][i])
+                entry, target, sl = self.trade[mode][i]
+                pair.append({
+                    "ticker": ticker,
+                    "final_signal": ("[SUPREME] " + signal) if supreme else signal,
+                    "super_score": float(self.super_score[mode][i]),
+                    "ml_confidence": round(ml, 4) if ml is not None else None,
+                    "entry": entry,
+                    "target": target,
+                    "sl": sl,
+                    "is_supreme": supreme,
+                    "models": {k: v.get(mode, {}) for k, v in results.items() if "error" not in v},
+                })
+            # Add error info if any
+            skipped = []
+            degraded = sorted({d for v in results.values() for d in v.get("degraded", ())})
+            for k, v in results.items():
+                if "short_circuit" in v:
+                    skipped.append(k)
+                    for res in pair:
+                        res["models"][k] = {"signal": "SKIPPED", "confidence": 0}
+                elif "error" in v:
+                    short_err = f"ERR: {v['error'][:100]}"
+                    for res in pair:
+                        res["models"][k] = {"signal": short_err, "confidence": 0}
+            if skipped:
+                for res in pair:
+                    res["short_circuited"] = skipped
+            if degraded:
+                for res in pair:
+                    res["degraded"] = degraded
+            out.append(tuple(pair))
+        return out
+
+
+def final_signals(score, params=DEFAULT_PARAMS):
+    p = params
+    return np.select(
+        [score >= p["strong_buy"], score > p["buy"], score <= p["strong_sell"], score < p["sell"]],
+        ["STRONG BUY", "BUY", "STRONG SELL", "SELL"],
+        default="WAIT",
+    )
+
+
+def meta_filter(signals, ml_confidence, params=DEFAULT_PARAMS):
+    """
+    Swing signals after the meta-model's verdict: a plain BUY the model is
+    confident in becomes STRONG BUY, any BUY it doubts becomes WAIT.
+    """
+    signals = np.asarray(signals, dtype=object)
+    ml = np.asarray(ml_confidence, dtype=float)
+    is_buy = np.array(["BUY" in s for s in signals], dtype=bool)
+    upgrade = is_buy & (ml > params["ml_upgrade"]) & (signals == "BUY")
+    downgrade = is_buy & ~(ml > params["ml_upgrade"]) & (ml < params["ml_downgrade"])
+    out = signals.copy()
+    out[upgrade] = "STRONG BUY"
+    out[downgrade] = "WAIT"
+    return out
+
+
+def score_universe(table, params=None):
+    """Score a ScoreTable (or a ``{ticker: results}`` dict) for every ticker."""
+    if not isinstance(table, ScoreTable):
+        table = ScoreTable(table)
+    merged = dict(DEFAULT_PARAMS)
+    merged.update(params or {})
+    return UniverseScores(table, merged)
+
+
+# --- EARLY EXIT ---
+
+def _bucket(score, params):
+    return str(final_signals(np.array([score]), params)[0])
+
+
+def score_bounds(results, remaining, params=None):
+    """
+    mode -> (lo, hi): the final super score of a ticker whose ``remaining``
+    models have not answered yet, over every outcome of those models (any
+    signal and confidence, any ADX, or an error). None if an answered model
+    is already outside MAX_PERSISTENCE.
+
+    The filters are non-decreasing in the averaged score for a fixed ADX
+    band and conflict state (the consensus penalty only jumps upwards at
+    +/- consensus_override), so the bounds are the extremes over the
+    possible bands and conflict states of the filtered interval ends.
+    """
+    p = dict(DEFAULT_PARAMS)
+    p.update(params or {})
+    scores = UniverseScores(ScoreTable({None: results}), p)
+    t = scores.table
+    n, k = int(t.valid[0].sum()), len(remaining)
+
+    if k:
+        adx_bands = ["veto", "penalty", None]
+    else:
+        adx = scores.avg_adx[0]
+        adx_bands = ["veto" if adx < p["adx_veto"] else "penalty" if adx < p["adx_penalty"] else None]
+
+    def adx_filter(score, band):
+        if score <= 0 or band is None:
+            return score
+        return 0.0 if band == "veto" else score * p["adx_penalty_factor"]
+
+    def consensus(score, conflict):
+        return score * p["consensus_penalty"] if conflict and abs(score) < p["consensus_override"] else score
+
+    bounds = {}
+    for mode in MODES:
+        persistence = scores._persistence(mode)[0][t.valid[0]]
+        if np.any(np.abs(persistence) > MAX_PERSISTENCE):
+            return None   # a model outside the 0-1 confidence scale: no safe bound
+        total = float(persistence.sum())
+        ends = [(total - m * MAX_PERSISTENCE) / (n + m) for m in range(k + 1) if n + m]
+        ends += [(total + m * MAX_PERSISTENCE) / (n + m) for m in range(k + 1) if n + m]
+        lo, hi = (min(ends), max(ends)) if ends else (0.0, 0.0)
+
+        direction = t.direction[mode][0][t.valid[0]]
+        conflict = bool((direction > 0).any() and (direction < 0).any())
+        conflicts = [True] if conflict else [False, True] if k else [False]
+        bands = adx_bands if mode == "swing" else [None]
+        outcomes = [consensus(adx_filter(end, band), c) for end in (lo, hi) for band in bands for c in conflicts]
+        # Margin for the summation order of the real aggregation
+        bounds[mode] = (min(outcomes) - 1e-9, max(outcomes) + 1e-9)
+    return bounds
+
+
+def early_exit(results, remaining, params=None):
+    """
+    Reason to skip the ``remaining`` models of a ticker, or None.
+
+    Only when BUY is out of reach and the signal bucket is settled in both
+    modes, and Apex has answered in agreement, so the trade params (Apex
+    first in PARAM_PRIORITY) cannot change either. A skipped model counts as
+    an error in aggregation, one of the outcomes the bounds already cover.
+    """
+    if not remaining:
+        return None
+    p = dict(DEFAULT_PARAMS)
+    p.update(params or {})
+    apex = results.get("Apex Logic")
+    if apex is None or "error" in apex:
+        return None
+    bounds = score_bounds(results, remaining, p)
+    if bounds is None:
+        return None
+    buckets = {}
+    for mode, (lo, hi) in bounds.items():
+        bucket = _bucket(lo, p)
+        if bucket != _bucket(hi, p) or "BUY" in bucket:
+            return None
+        apex_dir = _decode(apex.get(mode, {}).get("signal", "WAIT"))[1]
+        if bucket != "WAIT" and apex_dir != _decode(bucket)[1]:
+            return None
+        buckets[mode] = bucket
+    return (f"{buckets['swing']}/{buckets['intraday']} settled after "
+            f"{', '.join(name for name in results)} (score bounds "
+            + ", ".join(f"{mode} {lo:+.2f}..{hi:+.2f}" for mode, (lo, hi) in bounds.items()) + ")")
@@ -0,0 +1,94 @@
+"""
+Super Agent 4.0 — Wall-Clock Budget
+====================================
+``main.py --budget 20m`` plans the run against a deadline counted from
+process start. After every finished ticker the planner projects the finish
+time from the throughput measured since its last change; when the
+projection (plus REPORT_RESERVE for the final reports) runs past the
+deadline it cuts the next expensive step, in wrapper_common.DEGRADATIONS
+order:
+
+1. cached_hfm_model    HFM predicts with the ticker's last trained model
+2. skip_news           neutral sentiment instead of fetching headlines
+3. skip_intraday_vwap  no 15m VWAP confirmation for Quant
+4. no_history          no T-1 / T-2 slices
+
+Steps are only ever added (a cheaper rate measured at one level says
+nothing about the levels above it). The planner sets them on the backend,
+so tasks launched from then on carry them; each model result lists the
+steps it ran without under "degraded", and the report marks those tickers.
+If the deadline passes mid-scan, the reports are written at once with what
+has finished, so a report always exists on time.
+"""
+
+import re
+import time
+
+from wrappers.wrapper_common import DEGRADATIONS
+
+MIN_SAMPLES = 8          # tickers finished at the current level before projecting
+REPORT_RESERVE = 30.0    # seconds kept for aggregation and the final reports
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)([dhms]?)")
+_UNIT = {"d": 86400, "h": 3600, "m": 60, "s": 1, "": 60}
+
+
+def parse_duration(text):
+    """'20m', '90s', '1h30m', '7d', '25' (minutes) -> seconds."""
+    text = text.strip().lower()
+    parts = _DURATION.findall(text)
+    if not parts or "".join(n + u for n, u in parts) != text:
+        raise ValueError(f"Bad duration '{text}' (expected e.g. 20m, 90s, 1h30m)")
+    return sum(float(n) * _UNIT[u] for n, u in parts)
+
+
+class BudgetPlanner:
+    def __init__(self, backend, budget_seconds, started):
+        self.backend = backend
+        self.budget = budget_seconds
+        self.deadline = started + budget_seconds
+        self.level = 0
+        self.window_start = None    # (time, done) when the current level's measurement began
+        self.overrun = False
+
+    @property
+    def steps(self):
+        return DEGRADATIONS[:self.level]
+
+    def start(self, done):
+        self.window_start = (time.time(), done)
+
+    def projected_finish(self, done, total, now):
+        since, done_then = self.window_start
+        finished = done - done_then
+        if finished < MIN_SAMPLES or now <= since:
+            return None
+        return now + (total - done) * (now - since) / finished
+
+    def update(self, done, total):
+        """
+        Called after each finished ticker. Returns True once, when the
+        deadline has just passed with tickers still running.
+        """
+        now = time.time()
+        if now >= self.deadline:
+            if not self.overrun and done < total:
+                self.overrun = True
+                print(f"\n[Budget] Deadline reached at {done}/{total} tickers — writing reports now")
+                return True
+            return False
+        finish = self.projected_finish(done, total, now)
+        if finish is None or self.level >= len(DEGRADATIONS):
+            return False
+        if finish + REPORT_RESERVE > self.deadline:
+            self.level += 1
+            self.backend.degrade = self.steps
+            self.window_start = (now, done)
+            print(f"\n[Budget] Projected finish {(finish - self.deadline) / 60:+.1f} min past the budget "
+                  f"at {done}/{total} tickers — now cutting: {', '.join(self.steps)}")
+        return False
+
+    def report(self):
+        status = "over" if self.overrun else "within"
+        cut = ", ".join(self.steps) or "nothing"
+        print(f"[Budget] Finished {status} the {self.budget / 60:.1f} min budget | cut: {cut}")
@@ -0,0 +1,146 @@
+"""
+Super Agent 4.0 — Two-Phase Cascade
+====================================
+Phase 1 screens the whole universe with Apex's trend / momentum / RVOL score,
+computed for every ticker at once: each ticker's Apex window is stacked
+right-aligned into a (bars x tickers) matrix, so the EMAs, RSI, MACD and
+volume average are single column-wise pandas operations on local data.
+
+Phase 2 (the full four-model scan) only sees the shortlist:
+- tickers Apex itself would not call WAIT (BUY / SELL and stronger), or
+  whose RVOL reaches ``min_rvol`` (unusual activity), plus
+- holdings (data/holdings.txt, one ticker per line), plus
+- tickers without enough local bars to screen.
+
+Pruned tickers stay in both reports as "WAIT (PRUNED)" rows carrying their
+phase-1 score (see pruned_records), so nothing silently disappears.
+"""
+
+import os
+import time
+
+from wrappers import load_plugin
+from wrappers.wrapper_common import stack_windows
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HOLDINGS_FILE = os.path.join(BASE_DIR, "data", "holdings.txt")
+
+SCREEN_WRAPPER = "apex_wrapper"
+MIN_BARS = 200   # Apex's own minimum (EMA 200)
+
+CASCADE_DEFAULTS = {
+    "min_rvol": 2.0,
+}
+
+PRUNED_SIGNAL = "WAIT (PRUNED)"
+
+
+def load_holdings(path=HOLDINGS_FILE):
+    """Tickers currently held (always evaluated in full)."""
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return {line.split("#")[0].strip() for line in f if line.split("#")[0].strip()}
+
+
+def screen(frames):
+    """
+    Apex's current-bar score for every ticker, vectorised across tickers.
+    frames: ticker -> Apex window (canonical OHLCV frame, >= MIN_BARS bars).
+    Returns ticker -> {score, trend_score, mom_score, rvol, price, signal}.
+    """
+    import numpy as np
+    if not frames:
+        return {}
+    apex = load_plugin(SCREEN_WRAPPER)
+    close = stack_windows(frames, "Close")
+    volume = stack_windows(frames, "Volume")
+
+    # Leading NaNs are skipped by ewm and never complete a rolling window,
+    # so every column matches Apex's own per-ticker series
+    ema_50 = apex.calculate_ema(close, 50).to_numpy()[-1]
+    ema_200 = apex.calculate_ema(close, 200).to_numpy()[-1]
+    rsi = apex.calculate_rsi(close, 14).to_numpy()[-1]
+    macd_line, macd_signal = (s.to_numpy()[-1] for s in apex.calculate_macd(close))
+    vol_avg = volume.rolling(window=20).mean().to_numpy()[-1]
+    price = close.to_numpy()[-1]
+    vol = volume.to_numpy()[-1]
+    rsi = np.where(np.isnan(rsi), 50, rsi)
+
+    trend = np.select([(price > ema_50) & (ema_50 > ema_200), (price < ema_50) & (ema_50 < ema_200)], [1, -1], 0)
+    mom = np.select([(rsi > 55) & (macd_line > macd_signal), (rsi < 45) & (macd_line < macd_signal)], [1, -1], 0)
+    base = (trend * 0.5) + (mom * 0.3)
+    vol_boost = np.where(vol > vol_avg, np.sign(base) * 0.2, 0.0)
+    score = np.clip(base + vol_boost, -1.0, 1.0)
+    rvol = np.where(vol_avg > 0, vol / np.where(vol_avg > 0, vol_avg, 1), 1.0)
+
+    signal = np.select([score >= 0.6, score <= -0.6, score > 0.2, score < -0.2],
+                       ["STRONG BUY", "STRONG SELL", "BUY", "SELL"], default="WAIT")
+    return {
+        ticker: {"score": float(score[j]), "trend_score": int(trend[j]), "mom_score": int(mom[j]),
+                 "rvol": float(rvol[j]), "price": float(price[j]), "signal": str(signal[j])}
+        for j, ticker in enumerate(frames)
+    }
+
+
+def run_cascade(tickers, bundle_loader, params=None, holdings=None):
+    """
+    Phase 1 over ``tickers``.
+    bundle_loader: ticker -> OhlcvBundle from local data only (or None).
+    Returns (shortlist in universe order, {pruned ticker: screen row}).
+    """
+    p = dict(CASCADE_DEFAULTS)
+    p.update(params or {})
+    holdings = load_holdings() if holdings is None else set(holdings)
+    need = load_plugin(SCREEN_WRAPPER).DATA_NEEDS
+
+    start = time.perf_counter()
+    frames = {}
+    for ticker in tickers:
+        bundle = bundle_loader(ticker)
+        window = bundle.view(need) if bundle is not None else None
+        if window is not None and len(window) >= MIN_BARS:
+            frames[ticker] = window
+    loaded = time.perf_counter()
+    rows = screen(frames)
+    screened = time.perf_counter()
+
+    shortlist, pruned = [], {}
+    for ticker in tickers:
+        row = rows.get(ticker)
+        # Only Apex WAITs are pruned: any actionable phase-1 signal gets the full scan
+        keep = (row is None or ticker in holdings
+                or row["signal"] != "WAIT" or row["rvol"] >= p["min_rvol"])
+        if keep:
+            shortlist.append(ticker)
+        else:
+            pruned[ticker] = row
+    print(f"[Cascade] Screened {len(rows)}/{len(tickers)} tickers in {(screened - loaded) * 1000:.0f} ms "
+          f"(+{(loaded - start) * 1000:.0f} ms loading) | shortlist {len(shortlist)} "
+          f"({len(holdings & set(tickers))} held) | pruned {len(pruned)}")
+    return shortlist, pruned
+
+
+def pruned_records(pruned, model_names):
+    """
+    Report rows for pruned tickers: [(swing_res, intraday_res)] shaped like
+    the aggregated ones, WAIT with the phase-1 score as the super score.
+    """
+    out = []
+    for ticker, row in pruned.items():
+        models = {name: {"signal": "PRUNED", "confidence": 0} for name in model_names}
+        models["Apex Logic"] = {"signal": row["signal"], "confidence": abs(row["score"])}
+        pair = tuple({
+            "ticker": ticker,
+            "final_signal": PRUNED_SIGNAL,
+            "super_score": row["score"],
+            "ml_confidence": None,
+            "entry": row["price"],
+            "target": 0,
+            "sl": 0,
+            "is_supreme": False,
+            "models": dict(models),
+            "phase1": row,
+        } for _ in range(2))
+        out.append(pair)
+    return out
@@ -0,0 +1,209 @@
+"""
+Super Agent 4.0 — End-of-Day Precompute
+========================================
+Daily bars are final after 15:30 IST, so everything that depends only on
+them (and on slow-moving Yahoo data) is prepared the evening before instead
+of on the morning's critical path:
+
+1. the NIFTY 500 list,
+2. daily bars for the whole universe, bulk-downloaded into the local store,
+3. a snapshot of every ticker's ``info`` (fundamentals) and ``news`` in
+   data/eod/<date>/snapshots/<ticker>.json,
+4. a full scan over that data: Apex and stock_AI outputs land in the
+   wrapper output cache (output_cache.py) and every HFM XGBoost model is
+   trained and saved (HFM model.py reuses a model trained on the same data).
+   Quant's outputs are cached too, but they are keyed by the live 15m bar
+   its VWAP check reads, so a morning run in session recomputes them.
+
+data/eod/<date>/manifest.json records what was prepared. ``main.py
+--from-eod`` then takes the universe and bars from the latest fresh
+manifest, serves ``info`` / ``news`` from its snapshot (fetch_gate), and only
+fetches the pre-open market context (FII/DII, option chain) before scoring:
+
+    python eod.py                    # after the close, e.g. 16:00 IST
+    python main.py --from-eod        # next morning
+"""
+
+import os
+import json
+import time
+import argparse
+import datetime
+import concurrent.futures
+
+import fetch_gate
+from run_journal import trading_date, IST
+from nse_calendar import previous_trading_day
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+EOD_DIR = os.path.join(BASE_DIR, "data", "eod")
+MANIFEST = "manifest.json"
+
+SNAPSHOT_WORKERS = 8
+
+
+def session_dir(date, eod_dir=EOD_DIR):
+    return os.path.join(eod_dir, date)
+
+
+def snapshot_folder(date, eod_dir=EOD_DIR):
+    return os.path.join(session_dir(date, eod_dir), "snapshots")
+
+
+def _write_json(path, payload):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f, default=str)
+    os.replace(tmp, path)
+
+
+def load_manifest(date, eod_dir=EOD_DIR):
+    try:
+        with open(os.path.join(session_dir(date, eod_dir), MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def fresh_manifest(run_date, eod_dir=EOD_DIR):
+    """
+    Manifest of the session before ``run_date`` (or of ``run_date`` itself,
+    for a rerun after that day's close). None if neither was prepared.
+    """
+    for date in (run_date, previous_trading_day(run_date).isoformat()):
+        manifest = load_manifest(date, eod_dir)
+        if manifest is not None:
+            return manifest
+    return None
+
+
+def use_snapshot(manifest, eod_dir=EOD_DIR):
+    """Serve info / news from the manifest's snapshot in this process and every worker started later."""
+    os.environ[fetch_gate.SNAPSHOT_ENV] = snapshot_folder(manifest["date"], eod_dir)
+
+
+# --- SNAPSHOTS ---
+
+def snapshot_ticker(symbol, folder):
+    """Fetch and store one ticker's snapshot fields. Returns the fields stored."""
+    ticker = fetch_gate.yf.Ticker(symbol)
+    snap = {}
+    for field in fetch_gate.SNAPSHOT_FIELDS:
+        try:
+            snap[field] = getattr(ticker, field)
+        except Exception:
+            continue   # left out: the morning run fetches it live
+    if snap:
+        _write_json(fetch_gate.snapshot_path(folder, symbol), snap)
+    return tuple(snap)
+
+
+def fetch_snapshots(tickers, folder, workers=SNAPSHOT_WORKERS):
+    """Snapshot every ticker's info / news. Returns {field: tickers stored}."""
+    counts = {field: 0 for field in fetch_gate.SNAPSHOT_FIELDS}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(snapshot_ticker, t, folder) for t in tickers]
+        for n, future in enumerate(concurrent.futures.as_completed(futures)):
+            for field in future.result():
+                counts[field] += 1
+            print(f"[EOD] Snapshots {n+1}/{len(tickers)}", end="\r")
+    print(f"\n[EOD] Snapshot of {', '.join(f'{f} {n}' for f, n in counts.items())} tickers in {folder}")
+    return counts
+
+
+# --- PRECOMPUTE ---
+
+def precompute(tickers, needs, date, backend_kind="pool", jobs=None, task_timeout=None):
+    """
+    Scan the stored universe once through the output cache, with the snapshot
+    active. Returns (model runs, errors).
+    """
+    from executors import make_backend
+    from output_cache import CachedBackend
+    from market_data import load_bundle
+    from scheduler import (ScanScheduler, DEFAULT_MAX_IN_FLIGHT, DEFAULT_TASK_TIMEOUT,
+                           parse_model_limits, parse_model_batch)
+
+    jobs = jobs or DEFAULT_MAX_IN_FLIGHT
+    task_timeout = task_timeout or DEFAULT_TASK_TIMEOUT
+    model_limits = parse_model_limits([])
+    workers = {name: min(limit, jobs) for name, limit in model_limits.items()}
+    os.environ[fetch_gate.FETCH_SHARE_ENV] = str(1 + sum(workers.values()))
+    backend = make_backend(backend_kind, workers_per_model=workers, task_timeout=task_timeout)
+    try:
+        from market_context import prepare_market_context
+        backend.context_path = prepare_market_context(date)
+    except Exception as e:
+        print(f"[Market] Context unavailable, HFM will fetch its own: {e}")
+    backend = CachedBackend(backend, date=date)
+
+    scheduler = ScanScheduler(backend, max_in_flight=jobs, model_limits=model_limits,
+                              bundle_loader=lambda t: load_bundle(t, needs), task_timeout=task_timeout,
+                              hedge=False, model_batch=parse_model_batch([], backend_kind))
+    runs = errors = 0
+    for i, (ticker, results) in enumerate(scheduler.scan(tickers)):
+        print(f"[EOD] Precomputed {i+1}/{len(tickers)} {ticker}", end="\r")
+        runs += len(results)
+        errors += sum(1 for res in results.values() if "error" in res)
+    print()
+    scheduler.latency.report()
+    backend.close()
+    return runs, errors
+
+
+def run_eod(date, batch_size=None, models=True, backend_kind="pool", jobs=None, task_timeout=None,
+            eod_dir=EOD_DIR):
+    from main import get_nifty500
+    from market_data import model_data_needs, bulk_download, BULK_BATCH_SIZE
+
+    start = time.time()
+    tickers = get_nifty500()
+    if not tickers:
+        raise SystemExit("[EOD] Could not fetch the NIFTY 500 list — nothing prepared")
+    needs = model_data_needs()
+    stored = bulk_download(tickers, needs, batch_size=batch_size or BULK_BATCH_SIZE)
+
+    # The snapshot is written from live data, then served to the precompute scan
+    os.environ.pop(fetch_gate.SNAPSHOT_ENV, None)
+    folder = snapshot_folder(date, eod_dir)
+    snapshots = fetch_snapshots(sorted(stored), folder)
+    manifest = {
+        "date": date,
+        "created": datetime.datetime.now(IST).isoformat(timespec="seconds"),
+        "tickers": tickers,
+        "stored": sorted(stored),
+        "snapshots": snapshots,
+    }
+    use_snapshot(manifest, eod_dir)
+
+    if models and stored:
+        runs, errors = precompute([t for t in tickers if t in stored], needs, date,
+                                  backend_kind, jobs, task_timeout)
+        manifest["precomputed"] = {"model_runs": runs, "errors": errors}
+    fetch_gate.report()
+
+    # Written last: a manifest means the session's data is complete
+    _write_json(os.path.join(session_dir(date, eod_dir), MANIFEST), manifest)
+    print(f"[EOD] Prepared {len(stored)}/{len(tickers)} tickers for the next session "
+          f"in {(time.time() - start) / 60:.1f} min")
+    return manifest
+
+
+def main():
+    from executors import BACKENDS
+    parser = argparse.ArgumentParser(description="Prepare bars, snapshots and model state after the close")
+    parser.add_argument("--date", help="Session being closed (YYYY-MM-DD, default today IST)")
+    parser.add_argument("--batch-size", type=int, help="Tickers per bulk yf.download call")
+    parser.add_argument("--no-models", action="store_true",
+                        help="Only store bars and snapshots; skip the precompute scan")
+    parser.add_argument("--backend", choices=BACKENDS, default="pool")
+    parser.add_argument("--jobs", type=int, help="Max (model, ticker) tasks in flight")
+    parser.add_argument("--task-timeout", type=float, help="Seconds before a task counts as a timeout error")
+    args = parser.parse_args()
+    run_eod(args.date or trading_date(), args.batch_size, not args.no_models, args.backend,
+            args.jobs, args.task_timeout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,623 @@
+"""
+Super Agent 4.0 — Model Execution Backends
+===========================================
+How the orchestrator runs one model wrapper on one ticker.
+
+- "pool":       each wrapper's run_analysis is imported once per worker
+                process and called in-process (no interpreter per call).
+- "serve":      long-lived ``<wrapper>.py --serve`` processes exchanging
+                binary frames (wrappers/result_protocol.py) on stdin/stdout,
+                with health checks, restart of crashed workers and
+                per-request timeouts.
+- "subprocess": legacy contract — a fresh interpreter per call, result
+                read back as the last frame on stdout (``--binary``).
+
+Every model gets its own process pool: the four model packages reuse
+module names (config, utils, main), so they cannot share one interpreter.
+All backends expose the same blocking, thread-safe
+``run(wrapper, ticker, bundle=None)``; ``bundle`` is the shared OhlcvBundle
+(market_data.py) handed over in-memory (pool) or by store path (scripts).
+Shared-memory bundles (ohlcv_arena.py) go to pool workers as-is and are
+resolved there, so only a small reference is pickled per task.
+``workers_per_model`` is either one count for every wrapper or a dict
+``{wrapper_name: count}``. Every backend gives up on a task after
+``task_timeout`` seconds and returns ``{"error": "Timeout after ...", "timed_out": True}``:
+the subprocess is killed, the serve worker restarted, and a pool whose
+worker hangs is retired (new tasks go to a fresh pool; the stuck process is
+terminated on close). Pool workers can be started from a forkserver
+that has already imported the heavy third-party libraries (PRELOAD_MODULES),
+so each worker only imports its own model package. A backend's ``context_path`` (market_context.py)
+is passed on to wrappers that declare "market" in EXTERNAL_INPUTS, and its
+``degrade`` steps (budget.py) to wrappers listing them in DEGRADABLE; the
+budget planner changes ``degrade`` while the scan runs.
+
+Backends also take a batch, ``run_batch(wrapper, tickers, bundles)``, that
+yields ``(ticker, result)`` for each ticker as it is done: the wrapper's
+run_analysis_batch is called once, so its setup is paid once per batch (one
+interpreter per batch for "subprocess"). Serve and subprocess results
+stream back per ticker; a pool batch comes back when the whole task ends.
+The batch deadline is ``task_timeout`` per ticker. ``run_batch(backend, ...)``
+falls back to one ``run`` per ticker for backends without it.
+"""
+
+import os
+import sys
+import time
+import queue
+import itertools
+import threading
+import collections
+import subprocess
+import multiprocessing
+from multiprocessing import resource_tracker
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+
+from wrappers import MODEL_WRAPPERS, load_plugin
+from wrappers.wrapper_common import analyze, analyze_batch, one_at_a_time
+from wrappers.result_protocol import decode_frames, read_frame, encode
+from market_data import model_data_needs
+
+WRAPPER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wrappers")
+
+BACKENDS = ("pool", "serve", "subprocess")
+
+# Serve backend limits (seconds)
+STARTUP_TIMEOUT = 120     # wrapper import + prepare()
+REQUEST_TIMEOUT = 180     # one ticker (every backend); a stuck yfinance/NSE call is given up on after this
+PING_TIMEOUT = 10
+PING_AFTER_IDLE = 60      # health-check a worker that has been idle this long
+
+# Imported once in the forkserver and inherited by every pool worker (missing ones are skipped)
+PRELOAD_MODULES = ["numpy", "pandas", "yfinance", "ta", "sklearn", "xgboost", "textblob", "nsepython"]
+
+
+def _worker_count(workers_per_model, wrapper_name):
+    if isinstance(workers_per_model, dict):
+        return max(1, workers_per_model.get(wrapper_name, 1))
+    return max(1, workers_per_model)
+
+
+_DATA_NEEDS = None
+
+
+def data_needs(wrapper_name):
+    global _DATA_NEEDS
+    if _DATA_NEEDS is None:
+        _DATA_NEEDS = model_data_needs()
+    return _DATA_NEEDS[wrapper_name]
+
+
+def timeout_result(seconds):
+    return {"error": f"Timeout after {seconds:g}s", "timed_out": True, "details": {"raw_output": ""}}
+
+
+def context_for(backend, wrapper_name):
+    """The run's MarketContext path, if this wrapper takes one."""
+    path = getattr(backend, "context_path", None)
+    if path and "market" in getattr(load_plugin(wrapper_name), "EXTERNAL_INPUTS", ()):
+        return path
+    return None
+
+
+def degrade_for(backend, wrapper_name):
+    """The steps this wrapper should cut right now (those it declares DEGRADABLE)."""
+    steps = getattr(backend, "degrade", ())
+    if not steps:
+        return ()
+    allowed = getattr(load_plugin(wrapper_name), "DEGRADABLE", ())
+    return tuple(d for d in steps if d in allowed)
+
+
+def run_batch(backend, wrapper_name, tickers, bundles=None):
+    """Yield ``(ticker, result)`` for every ticker, as one batch where the backend supports it."""
+    bundles = bundles or {}
+    if hasattr(backend, "run_batch"):
+        yield from backend.run_batch(wrapper_name, tickers, bundles)
+        return
+    for ticker in tickers:
+        yield ticker, backend.run(wrapper_name, ticker, bundles.get(ticker))
+
+
+def _missing(tickers, seen, error):
+    """Error entries for the tickers of a batch that never got a result."""
+    for ticker in tickers:
+        if ticker not in seen:
+            yield ticker, dict(error)
+
+
+# --- LEGACY: ONE INTERPRETER PER CALL ---
+
+class SubprocessBackend:
+    """Runs ``python <wrapper>.py --ticker X --binary`` and decodes the last frame on stdout."""
+
+    context_path = None
+    degrade = ()
+
+    def __init__(self, task_timeout=REQUEST_TIMEOUT):
+        self.task_timeout = task_timeout
+
+    def _options(self, wrapper_name):
+        cmd = []
+        context = context_for(self, wrapper_name)
+        if context:
+            cmd += ["--context", context]
+        degrade = degrade_for(self, wrapper_name)
+        if degrade:
+            cmd += ["--degrade", ",".join(degrade)]
+        return cmd
+
+    def run(self, wrapper_name, ticker, bundle=None):
+        wrapper_path = os.path.join(WRAPPER_DIR, f"{wrapper_name}.py")
+        cmd = [sys.executable, wrapper_path, "--ticker", ticker, "--binary"]
+        path = bundle.path(data_needs(wrapper_name)) if bundle else None
+        if path:
+            cmd += ["--ohlcv", path]
+        cmd += self._options(wrapper_name)
+        try:
+            result = subprocess.run(
+                cmd,
+                capture_output=True,
+                check=True,
+                timeout=self.task_timeout
+            )
+            # Anything a library printed around the frame is skipped
+            frames = decode_frames(result.stdout)
+            if not frames:
+                raise ValueError(f"No result frame in output: {result.stdout[-200:]!r}")
+            return frames[-1]
+        except subprocess.TimeoutExpired:
+            return timeout_result(self.task_timeout)
+        except subprocess.CalledProcessError as e:
+            # Capture stderr for debugging
+            return {"error": f"Subprocess Error: {e.stderr.decode(errors='replace')}",
+                    "details": {"raw_output": e.stdout.decode(errors='replace')}}
+        except Exception as e:
+            return {"error": str(e), "details": {"raw_output": ""}}
+
+    def run_batch(self, wrapper_name, tickers, bundles):
+        """One ``--tickers`` interpreter; results are read frame by frame as the wrapper writes them."""
+        wrapper_path = os.path.join(WRAPPER_DIR, f"{wrapper_name}.py")
+        cmd = [sys.executable, wrapper_path, "--tickers", ",".join(tickers), "--binary"]
+        paths = [bundles[t].path(data_needs(wrapper_name)) if bundles.get(t) else None for t in tickers]
+        if any(paths):
+            cmd += ["--ohlcv", os.pathsep.join(p or "" for p in paths)]
+        cmd += self._options(wrapper_name)
+        timeout = self.task_timeout * len(tickers)
+        seen = set()
+        try:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except Exception as e:
+            yield from _missing(tickers, seen, {"error": str(e), "details": {"raw_output": ""}})
+            return
+        stderr_tail = collections.deque(maxlen=20)
+        threading.Thread(target=lambda: stderr_tail.extend(proc.stderr), daemon=True).start()
+        timed_out = threading.Event()
+        timer = threading.Timer(timeout, lambda: (timed_out.set(), proc.kill()))
+        timer.start()
+        try:
+            while True:
+                msg = read_frame(proc.stdout)
+                if msg is None:
+                    break
+                if isinstance(msg, dict) and msg.get("ticker") in tickers:
+                    seen.add(msg["ticker"])
+                    yield msg["ticker"], msg.get("result", {"error": "Malformed batch result"})
+            proc.wait()
+        finally:
+            timer.cancel()
+            if proc.poll() is None:
+                proc.kill()
+        if timed_out.is_set():
+            yield from _missing(tickers, seen, timeout_result(timeout))
+        else:
+            stderr = b"".join(stderr_tail).decode(errors="replace")
+            yield from _missing(tickers, seen, {"error": f"Subprocess Error: {stderr}", "details": {"raw_output": ""}})
+
+    def close(self):
+        pass
+
+
+# --- IN-PROCESS PLUGINS, ONE POOL PER MODEL ---
+
+# Set once per worker process by _init_worker
+_PLUGIN = None
+
+
+def _init_worker(wrapper_name):
+    global _PLUGIN
+    # A forked worker inherits the orchestrator's own share (set_share); take its slice from the env instead
+    import fetch_gate
+    fetch_gate.reset_share()
+    _PLUGIN = load_plugin(wrapper_name)
+    _PLUGIN.prepare()
+
+
+def _worker_ready():
+    return _PLUGIN is not None
+
+
+def _worker_run(ticker, ohlcv=None, shared_bundle=None, context_path=None, degrade=()):
+    if shared_bundle is not None:
+        ohlcv = shared_bundle.view(_PLUGIN.DATA_NEEDS)
+    return analyze(_PLUGIN.run_analysis, ticker, ohlcv, context_path, degrade)
+
+
+def _worker_run_batch(tickers, ohlcvs, shared_bundles, context_path=None, degrade=()):
+    data_bundle = dict(ohlcvs)
+    for ticker, bundle in shared_bundles.items():
+        data_bundle[ticker] = bundle.view(_PLUGIN.DATA_NEEDS)
+    run_analysis_batch = getattr(_PLUGIN, "run_analysis_batch", None) or one_at_a_time(_PLUGIN.run_analysis)
+    return list(analyze_batch(run_analysis_batch, tickers, data_bundle, context_path, degrade))
+
+
+class PluginPoolBackend:
+    """
+    Keeps ``workers_per_model`` warm processes per wrapper. Each worker
+    imports its wrapper (and model package) once, then serves every ticker.
+    """
+
+    context_path = None
+    degrade = ()
+
+    def __init__(self, workers_per_model=1, wrappers=None, start_method=None, task_timeout=REQUEST_TIMEOUT):
+        self.workers_per_model = workers_per_model
+        self.wrappers = list(wrappers or MODEL_WRAPPERS.values())
+        self.task_timeout = task_timeout
+        self._pools = {}
+        self._retired = []   # worker processes of pools replaced after a hung task
+        self._queued = collections.Counter()   # wrapper -> tasks submitted and not yet answered
+        self._lock = threading.Lock()
+        self._mp_context = None
+        if start_method:
+            self._mp_context = multiprocessing.get_context(start_method)
+            if start_method == "forkserver":
+                self._mp_context.set_forkserver_preload(PRELOAD_MODULES)
+
+    def _new_pool(self, wrapper_name):
+        # Forked workers must share the parent's resource tracker; one started
+        # by a worker would unlink the shared-memory arenas when it exits
+        resource_tracker.ensure_running()
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=_worker_count(self.workers_per_model, wrapper_name),
+            mp_context=self._mp_context,
+            initializer=_init_worker,
+            initargs=(wrapper_name,),
+        )
+
+    def _pool(self, wrapper_name):
+        with self._lock:
+            pool = self._pools.get(wrapper_name)
+            if pool is None:
+                pool = self._pools[wrapper_name] = self._new_pool(wrapper_name)
+            return pool
+
+    def start(self):
+        """
+        Start every worker and wait for its imports to finish. Call this from
+        the main thread before any scan threads exist, so workers fork cleanly.
+        """
+        futures = []
+        for name in self.wrappers:
+            pool = self._pool(name)
+            n = _worker_count(self.workers_per_model, name)
+            futures += [pool.submit(_worker_ready) for _ in range(n)]
+        for f in futures:
+            try:
+                f.result()
+            except Exception as e:
+                print(f"[Pool] Worker failed to start: {e}")
+
+    def _call(self, wrapper_name, timeout, fn, *args):
+        """
+        ``fn(*args)`` in one of the wrapper's workers: (value, None), or (None, error entry).
+        ``timeout`` is per task; a task queued behind busy workers gets one more
+        ``timeout`` per round of tasks ahead of it.
+        """
+        pool = self._pool(wrapper_name)
+        with self._lock:
+            ahead = self._queued[wrapper_name]
+            self._queued[wrapper_name] += 1
+        wait = timeout * (1 + ahead // _worker_count(self.workers_per_model, wrapper_name))
+        try:
+            future = pool.submit(fn, *args)
+            return future.result(timeout=wait), None
+        except concurrent.futures.TimeoutError:
+            # The worker is stuck; send new tasks to a fresh pool and let this
+            # one finish its other tasks (the stuck process is killed on close).
+            # shutdown() forgets the pool's processes, so keep them first
+            future.cancel()
+            with self._lock:
+                if self._pools.get(wrapper_name) is pool:
+                    self._pools[wrapper_name] = self._new_pool(wrapper_name)
+                    self._retired += list((getattr(pool, "_processes", None) or {}).values())
+            pool.shutdown(wait=False)
+            return None, timeout_result(timeout)
+        except BrokenProcessPool as e:
+            # A worker died (OOM, segfault in a native lib): replace the pool
+            with self._lock:
+                if self._pools.get(wrapper_name) is pool:
+                    self._pools[wrapper_name] = self._new_pool(wrapper_name)
+            pool.shutdown(wait=False, cancel_futures=True)
+            return None, {"error": f"Worker crashed: {e}", "details": {"raw_output": ""}}
+        except Exception as e:
+            return None, {"error": str(e), "details": {"raw_output": ""}}
+        finally:
+            with self._lock:
+                self._queued[wrapper_name] -= 1
+
+    def run(self, wrapper_name, ticker, bundle=None):
+        if getattr(bundle, "shared", False):
+            args = (ticker, None, bundle)
+        else:
+            args = (ticker, bundle.view(data_needs(wrapper_name)) if bundle else None, None)
+        result, error = self._call(wrapper_name, self.task_timeout, _worker_run, *args,
+                                   context_for(self, wrapper_name), degrade_for(self, wrapper_name))
+        return error or result
+
+    def run_batch(self, wrapper_name, tickers, bundles):
+        ohlcvs, shared = {}, {}
+        for ticker in tickers:
+            bundle = bundles.get(ticker)
+            if getattr(bundle, "shared", False):
+                shared[ticker] = bundle
+            else:
+                ohlcvs[ticker] = bundle.view(data_needs(wrapper_name)) if bundle else None
+        results, error = self._call(wrapper_name, self.task_timeout * len(tickers), _worker_run_batch,
+                                    list(tickers), ohlcvs, shared,
+                                    context_for(self, wrapper_name), degrade_for(self, wrapper_name))
+        if error is not None:
+            yield from _missing(tickers, (), error)
+            return
+        yield from results
+
+    def close(self):
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+            retired, self._retired = self._retired, []
+        for proc in retired:
+            if proc.is_alive():
+                proc.terminate()
+            proc.join(timeout=5)
+        for pool in pools:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+# --- PERSISTENT SCRIPT WORKERS (JSON LINES) ---
+
+class ServeWorker:
+    """One ``<wrapper>.py --serve`` process plus the thread reading its replies."""
+
+    def __init__(self, wrapper_name):
+        self.wrapper_name = wrapper_name
+        self.proc = None
+        self.replies = None
+        self.stderr_tail = collections.deque(maxlen=20)
+        self.last_used = 0.0
+
+    def start(self):
+        wrapper_path = os.path.join(WRAPPER_DIR, f"{self.wrapper_name}.py")
+        self.proc = subprocess.Popen(
+            [sys.executable, wrapper_path, "--serve"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        self.replies = queue.Queue()
+        self.stderr_tail.clear()
+        threading.Thread(target=self._read_stdout, args=(self.proc, self.replies), daemon=True).start()
+        threading.Thread(target=self._read_stderr, args=(self.proc,), daemon=True).start()
+
+        ready = self._wait(lambda msg: msg.get("op") == "ready", STARTUP_TIMEOUT)
+        if ready is None:
+            err = self.describe_failure()
+            self.kill()
+            raise RuntimeError(f"{self.wrapper_name} worker failed to start: {err}")
+        self.last_used = time.time()
+
+    @staticmethod
+    def _read_stdout(proc, replies):
+        while True:
+            msg = read_frame(proc.stdout)
+            if msg is None:
+                break
+            if isinstance(msg, dict):
+                replies.put(msg)
+        replies.put(None)  # EOF: worker exited
+
+    def _read_stderr(self, proc):
+        for line in proc.stderr:
+            self.stderr_tail.append(line.decode(errors="replace").rstrip())
+
+    def _wait(self, match, timeout):
+        deadline = time.time() + timeout
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None
+            try:
+                msg = self.replies.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            if msg is None:
+                return None
+            if match(msg):
+                return msg
+            # Anything else is a late reply to a request we already gave up on
+
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def send(self, msg):
+        self.proc.stdin.write(encode(msg))
+        self.proc.stdin.flush()
+
+    def request(self, req_id, ticker, timeout, ohlcv_path=None, context_path=None, degrade=()):
+        self.send({"id": req_id, "ticker": ticker, "ohlcv_path": ohlcv_path, "context_path": context_path,
+                   "degrade": list(degrade)})
+        reply = self._wait(lambda msg: msg.get("id") == req_id, timeout)
+        self.last_used = time.time()
+        return reply
+
+    def request_batch(self, req_id, tickers, timeout, ohlcv_paths=None, context_path=None, degrade=()):
+        """
+        One frame out; yields each ``{"ticker", "result"}`` reply as it arrives,
+        each within ``timeout`` of the previous one. Ends after the worker's
+        "done" frame, or early (without it) on a timeout or crash.
+        """
+        self.send({"id": req_id, "tickers": list(tickers), "ohlcv_paths": ohlcv_paths,
+                   "context_path": context_path, "degrade": list(degrade)})
+        while True:
+            reply = self._wait(lambda msg: msg.get("id") == req_id, timeout)
+            self.last_used = time.time()
+            if reply is None or reply.get("op") == "done":
+                return
+            yield reply
+
+    def ping(self, req_id):
+        try:
+            self.send({"id": req_id, "op": "ping"})
+        except OSError:
+            return False
+        return self._wait(lambda msg: msg.get("id") == req_id, PING_TIMEOUT) is not None
+
+    def describe_failure(self):
+        code = self.proc.poll() if self.proc else None
+        tail = " | ".join(list(self.stderr_tail)[-5:])
+        return f"exit code {code}; stderr: {tail}" if code is not None else f"no response; stderr: {tail}"
+
+    def kill(self):
+        if self.proc is None:
+            return
+        try:
+            self.proc.kill()
+            self.proc.wait(timeout=5)
+        except Exception:
+            pass
+
+    def stop(self):
+        if not self.alive():
+            return
+        try:
+            self.send({"op": "shutdown"})
+            self.proc.wait(timeout=5)
+        except Exception:
+            self.kill()
+
+
+class ServeBackend:
+    """
+    Keeps ``workers_per_model`` warm ``--serve`` processes per wrapper for the
+    whole scan. A worker is checked out per request; dead or unresponsive
+    workers are restarted, and a request past ``request_timeout`` kills its
+    worker and comes back as an error entry.
+    """
+
+    context_path = None
+    degrade = ()
+
+    def __init__(self, workers_per_model=1, wrappers=None, request_timeout=REQUEST_TIMEOUT):
+        self.workers_per_model = workers_per_model
+        self.wrappers = list(wrappers or MODEL_WRAPPERS.values())
+        self.request_timeout = request_timeout
+        self._idle = {name: queue.Queue() for name in self.wrappers}
+        self._ids = itertools.count(1)
+        self._stats = collections.Counter()
+
+    def start(self):
+        for name in self.wrappers:
+            for _ in range(_worker_count(self.workers_per_model, name)):
+                worker = ServeWorker(name)
+                try:
+                    worker.start()
+                except RuntimeError as e:
+                    print(f"[Serve] {e}")
+                self._idle[name].put(worker)
+
+    def _healthy(self, worker):
+        if not worker.alive():
+            return False
+        if time.time() - worker.last_used > PING_AFTER_IDLE:
+            return worker.ping(next(self._ids))
+        return True
+
+    def _restart(self, worker, reason):
+        self._stats[f"{worker.wrapper_name}:restarts"] += 1
+        print(f"[Serve] Restarting {worker.wrapper_name} worker ({reason})")
+        worker.kill()
+        worker.start()
+
+    def run(self, wrapper_name, ticker, bundle=None):
+        path = bundle.path(data_needs(wrapper_name)) if bundle else None
+        worker = self._idle[wrapper_name].get()
+        try:
+            if not self._healthy(worker):
+                self._restart(worker, "failed health check")
+
+            reply = worker.request(next(self._ids), ticker, self.request_timeout, ohlcv_path=path,
+                                   context_path=context_for(self, wrapper_name),
+                                   degrade=degrade_for(self, wrapper_name))
+            if reply is not None:
+                return reply.get("result", {"error": "Malformed worker reply"})
+
+            if worker.alive():
+                self._restart(worker, f"Timeout after {self.request_timeout}s")
+                return timeout_result(self.request_timeout)
+            err = f"Worker crashed: {worker.describe_failure()}"
+            self._restart(worker, err)
+            return {"error": err, "details": {"raw_output": ""}}
+        except Exception as e:
+            return {"error": str(e), "details": {"raw_output": ""}}
+        finally:
+            self._idle[wrapper_name].put(worker)
+
+    def run_batch(self, wrapper_name, tickers, bundles):
+        paths = [bundles[t].path(data_needs(wrapper_name)) if bundles.get(t) else None for t in tickers]
+        worker = self._idle[wrapper_name].get()
+        seen = set()
+        try:
+            if not self._healthy(worker):
+                self._restart(worker, "failed health check")
+
+            for reply in worker.request_batch(next(self._ids), tickers, self.request_timeout, ohlcv_paths=paths,
+                                              context_path=context_for(self, wrapper_name),
+                                              degrade=degrade_for(self, wrapper_name)):
+                ticker = reply.get("ticker")
+                if ticker in tickers and ticker not in seen:
+                    seen.add(ticker)
+                    yield ticker, reply.get("result", {"error": "Malformed worker reply"})
+            if len(seen) == len(tickers):
+                return
+
+            if worker.alive():
+                self._restart(worker, f"Timeout after {self.request_timeout}s")
+                yield from _missing(tickers, seen, timeout_result(self.request_timeout))
+                return
+            err = f"Worker crashed: {worker.describe_failure()}"
+            self._restart(worker, err)
+            yield from _missing(tickers, seen, {"error": err, "details": {"raw_output": ""}})
+        except Exception as e:
+            yield from _missing(tickers, seen, {"error": str(e), "details": {"raw_output": ""}})
+        finally:
+            self._idle[wrapper_name].put(worker)
+
+    def close(self):
+        for name, idle in self._idle.items():
+            while not idle.empty():
+                idle.get().stop()
+        if self._stats:
+            print(f"[Serve] Worker restarts: {dict(self._stats)}")
+
+
+def make_backend(kind="pool", workers_per_model=1, start_method=None, task_timeout=REQUEST_TIMEOUT):
+    if kind == "subprocess":
+        return SubprocessBackend(task_timeout=task_timeout)
+    if kind in ("pool", "serve"):
+        if kind == "pool":
+            backend = PluginPoolBackend(workers_per_model=workers_per_model, start_method=start_method,
+                                        task_timeout=task_timeout)
+        else:
+            backend = ServeBackend(workers_per_model=workers_per_model, request_timeout=task_timeout)
+        backend.start()
+        return backend
+    raise ValueError(f"Unknown backend: {kind} (choose from {', '.join(BACKENDS)})")
@@ -0,0 +1,369 @@
+"""
+Super Agent 4.0 — Fetch Gate
+=============================
+Every outbound call to Yahoo and NSE goes through here, from the
+orchestrator and from all three model packages, so a scan can run close to
+the hosts' limits without tripping their throttling:
+
+- a token bucket per host (requests/second plus a burst allowance); a bulk
+  ``yf.download`` of N tickers costs N tokens,
+- a bounded pool of concurrent calls per process,
+- retries with exponential backoff and full jitter on 429s, 5xx, Yahoo's
+  rate-limit error and connection failures,
+- one pooled ``requests.Session`` for NSE that keeps the cookies from a
+  warm-up request on www.nseindia.com.
+
+Limits are per host for the whole run: main.py sets FETCH_SHARE_ENV to the
+number of processes that fetch during the scan (itself plus every model
+worker) before the workers start, and each process takes its share of every
+bucket. The orchestrator keeps the full budget for the bulk pre-stage, while
+the workers are idle, and drops to its share (set_share) when the scan starts.
+
+Orchestrator code uses the drop-in ``yf`` facade (``from fetch_gate import yf``)
+and ``call(host, fn, ...)`` for anything else. The model packages keep
+their plain ``import yfinance`` / ``from nsepython import *``: the wrappers
+import them under ``stand_ins()`` (wrapper_common.import_model), which
+hands them ``yf`` and an nsepython whose functions go through the NSE bucket.
+
+With SNAPSHOT_ENV pointing at an EOD snapshot folder (eod.py), a Ticker's
+``info`` and ``news`` come from <folder>/<symbol>.json instead of Yahoo;
+fields missing from the snapshot still go to the network.
+"""
+
+import os
+import sys
+import json
+import time
+import types
+import random
+import functools
+import importlib
+import threading
+import contextlib
+import collections
+
+FETCH_SHARE_ENV = "SUPER_AGENT_FETCH_SHARE"
+SNAPSHOT_ENV = "SUPER_AGENT_SNAPSHOT_DIR"
+SNAPSHOT_FIELDS = ("info", "news")
+
+# Whole-run budgets: sustained requests/second and burst size
+HOST_LIMITS = {
+    "yahoo": {"rate": 20.0, "burst": 60},
+    "nse": {"rate": 2.0, "burst": 4},
+    "default": {"rate": 5.0, "burst": 10},
+}
+MAX_CONCURRENCY = 8     # calls in flight per process
+
+# Backoff
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5      # seconds
+BACKOFF_CAP = 30.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+RATE_LIMIT_MARKERS = ("Too Many Requests", "Rate limited", "rate limit")
+
+NSE_HOME = "https://www.nseindia.com"
+NSE_HOSTS = ("nseindia.com",)
+NSE_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Accept": "*/*",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Referer": NSE_HOME + "/",
+}
+NSE_COOKIE_TTL = 300    # seconds before the warm-up request is repeated
+REQUEST_TIMEOUT = 15
+
+
+class RetryableError(Exception):
+    """Raised inside a gated call to have it retried with backoff."""
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, cost=1):
+        """Block until ``cost`` tokens are taken; returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                # A call bigger than the burst goes once the bucket is full and leaves it in debt
+                need = min(cost, self.burst)
+                if self.tokens >= need:
+                    self.tokens -= cost
+                    return waited
+                delay = (need - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+_share = None           # set_share() override for this process
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def process_share():
+    if _share is not None:
+        return _share
+    try:
+        return max(1, int(os.environ.get(FETCH_SHARE_ENV, "1")))
+    except ValueError:
+        return 1
+
+
+def set_share(n):
+    """Take 1/n of every host's budget in this process from now on."""
+    global _share
+    with _buckets_lock:
+        _share = max(1, int(n))
+        _buckets.clear()
+
+
+def reset_share():
+    """Drop a set_share() override, e.g. one inherited by a forked worker, and go by FETCH_SHARE_ENV."""
+    global _share
+    with _buckets_lock:
+        _share = None
+        _buckets.clear()
+
+_slots = threading.BoundedSemaphore(MAX_CONCURRENCY)
+STATS = collections.defaultdict(collections.Counter)   # host -> calls / retries / failures / wait_ms
+
+
+def bucket(host):
+    with _buckets_lock:
+        if host not in _buckets:
+            limits = HOST_LIMITS.get(host, HOST_LIMITS["default"])
+            share = process_share()
+            _buckets[host] = TokenBucket(limits["rate"] / share, max(1.0, limits["burst"] / share))
+        return _buckets[host]
+
+
+def backoff_delay(attempt):
+    """Full jitter: uniform in [0, min(cap, base * 2^attempt)]."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+def is_retryable(exc):
+    if isinstance(exc, RetryableError):
+        return True
+    name = type(exc).__name__
+    if "RateLimit" in name or name in ("ConnectionError", "Timeout", "ConnectTimeout", "ReadTimeout",
+                                      "ChunkedEncodingError", "TimeoutError"):
+        return True
+    response = getattr(exc, "response", None)
+    if getattr(response, "status_code", None) in RETRY_STATUS:
+        return True
+    return any(marker in str(exc) for marker in RATE_LIMIT_MARKERS)
+
+
+def call(host, fn, *args, cost=1, retries=MAX_RETRIES, **kwargs):
+    """Run ``fn(*args, **kwargs)`` under the host's bucket, the concurrency pool and backoff."""
+    stats = STATS[host]
+    attempt = 0
+    while True:
+        waited = bucket(host).acquire(cost)
+        stats["wait_ms"] += int(waited * 1000)
+        stats["calls"] += 1
+        try:
+            with _slots:
+                return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt >= retries or not is_retryable(e):
+                stats["failures"] += 1
+                raise
+            stats["retries"] += 1
+            time.sleep(backoff_delay(attempt))
+            attempt += 1
+
+
+def report():
+    for host, stats in sorted(STATS.items()):
+        print(f"[Fetch] {host:<8} calls {stats['calls']} | retries {stats['retries']} | "
+              f"failures {stats['failures']} | throttled {stats['wait_ms'] / 1000:.1f}s")
+    if SNAPSHOT_HITS:
+        served = ", ".join(f"{field} {n}" for field, n in sorted(SNAPSHOT_HITS.items()))
+        print(f"[Fetch] snapshot served {served} from {snapshot_dir()}")
+
+
+# --- HTTP ---
+
+_nse_session = None
+_nse_warmed = 0.0
+_nse_lock = threading.Lock()
+
+
+def host_of(url):
+    return "nse" if any(h in url for h in NSE_HOSTS) else "default"
+
+
+def nse_session():
+    """The process-wide NSE session, with cookies from a fresh enough warm-up."""
+    global _nse_session, _nse_warmed
+    import requests
+    with _nse_lock:
+        if _nse_session is None:
+            _nse_session = requests.Session()
+            _nse_session.headers.update(NSE_HEADERS)
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=MAX_CONCURRENCY)
+            _nse_session.mount("https://", adapter)
+        if time.monotonic() - _nse_warmed > NSE_COOKIE_TTL:
+            _nse_warmed = time.monotonic()
+            try:
+                call("nse", _nse_session.get, NSE_HOME, timeout=REQUEST_TIMEOUT, retries=1)
+            except Exception:
+                pass   # archives work without cookies; the API endpoints will say so
+        return _nse_session
+
+
+def _checked(send, url, **kwargs):
+    response = send(url, **kwargs)
+    if response.status_code in RETRY_STATUS:
+        raise RetryableError(f"HTTP {response.status_code} from {url}")
+    return response
+
+
+def get(url, host=None, **kwargs):
+    """``requests.get`` through the gate; NSE URLs share the pooled session."""
+    import requests
+    host = host or host_of(url)
+    kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+    send = nse_session().get if host == "nse" else requests.get
+    return call(host, _checked, send, url, **kwargs)
+
+
+# --- EOD SNAPSHOTS ---
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+SNAPSHOT_HITS = collections.Counter()   # field -> lookups served from the snapshot
+
+
+def snapshot_dir():
+    return os.environ.get(SNAPSHOT_ENV) or None
+
+
+def snapshot_path(folder, symbol):
+    return os.path.join(folder, f"{symbol}.json")
+
+
+def snapshot(symbol):
+    """The symbol's snapshot fields (None without an active snapshot or file)."""
+    folder = snapshot_dir()
+    if folder is None:
+        return None
+    key = (folder, symbol)
+    with _snapshots_lock:
+        if key not in _snapshots:
+            try:
+                with open(snapshot_path(folder, symbol)) as f:
+                    _snapshots[key] = json.load(f)
+            except (OSError, ValueError):
+                _snapshots[key] = None
+        return _snapshots[key]
+
+
+# --- Yahoo ---
+
+def _download(*args, **kwargs):
+    yf = real_module("yfinance")
+    data = yf.download(*args, **kwargs)
+    # yf.download reports per-ticker failures instead of raising
+    if data is None or data.empty:
+        errors = getattr(getattr(yf, "shared", None), "_ERRORS", {}) or {}
+        if any(m in str(err) for err in errors.values() for m in RATE_LIMIT_MARKERS):
+            raise RetryableError("Yahoo rate limit on download")
+    return data
+
+
+class GatedTicker:
+    """``yf.Ticker`` whose network-backed properties and methods go through the gate."""
+
+    def __init__(self, symbol, *args, **kwargs):
+        yf = real_module("yfinance")
+        self._symbol = symbol
+        self._ticker = yf.Ticker(symbol, *args, **kwargs)
+
+    def __getattr__(self, name):
+        if name in SNAPSHOT_FIELDS:
+            snap = snapshot(self._symbol)
+            if snap is not None and name in snap:
+                SNAPSHOT_HITS[name] += 1
+                return snap[name]
+        if isinstance(getattr(type(self._ticker), name, None), property):
+            return call("yahoo", getattr, self._ticker, name)
+        value = getattr(self._ticker, name)
+        if callable(value):
+            return functools.partial(call, "yahoo", value)
+        return value
+
+
+class GatedYF:
+    """Drop-in for the parts of the yfinance module the models use."""
+
+    Ticker = GatedTicker
+
+    def download(self, tickers, *args, **kwargs):
+        cost = len(tickers) if isinstance(tickers, (list, tuple)) else len(str(tickers).split())
+        return call("yahoo", _download, tickers, *args, cost=max(1, cost), **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(real_module("yfinance"), name)
+
+
+yf = GatedYF()
+
+
+# --- MODEL PACKAGES ---
+
+_real_modules = {}
+_stand_in_lock = threading.Lock()
+
+
+def real_module(name):
+    """The real ``yfinance`` / ``nsepython``, also while stand_ins() has replaced it in sys.modules."""
+    if name not in _real_modules:
+        _real_modules[name] = importlib.import_module(name)
+    return _real_modules[name]
+
+
+def gated_nsepython():
+    """Copy of the nsepython module whose own functions each run as one NSE call."""
+    nse = real_module("nsepython")
+    module = types.ModuleType("nsepython", nse.__doc__)
+    for name, value in vars(nse).items():
+        # nsepython's own functions live in its submodules (nsepython.rahu)
+        if isinstance(value, types.FunctionType) and value.__module__.split(".")[0] == nse.__name__:
+            value = functools.wraps(value)(functools.partial(call, "nse", value))
+        setattr(module, name, value)
+    return module
+
+
+@contextlib.contextmanager
+def stand_ins():
+    """
+    While model modules are first imported, ``import yfinance`` gives them
+    ``yf`` and ``from nsepython import *`` the gated copy. The names they
+    bind keep pointing there; sys.modules gets the real modules back after.
+    A module that is not installed is left for the model's import to report.
+    """
+    with _stand_in_lock:
+        gated = {}
+        for name, make in (("yfinance", lambda: yf), ("nsepython", gated_nsepython)):
+            try:
+                real_module(name)
+            except ImportError:
+                continue
+            gated[name] = make()
+        sys.modules.update(gated)
+        try:
+            yield
+        finally:
+            sys.modules.update({name: _real_modules[name] for name in gated})
@@ -0,0 +1,243 @@
+"""
+Super Agent 4.0 — Incremental Daily Mode
+=========================================
+Wraps any execution backend and reuses the previous run's wrapper output for
+a (model, ticker) whose inputs have not changed since. Each model's
+fingerprint covers its own trailing window of daily bars plus the external
+inputs it declares in ``EXTERNAL_INPUTS``:
+
+- bars:          last bar date + SHA-1 of the model's window (always)
+- fundamentals:  ISO week of the trading date (yfinance fundamentals move quarterly);
+                 the output cache uses the trading date, or the SHA-1 of the
+                 ticker's ``info`` when an EOD snapshot (eod.py) is active
+- news:          SHA-1 of the news item ids in the active EOD snapshot, else
+                 the NEWS_TTL-minute window of the run (news is never fetched
+                 just to build a key, so news-driven outputs expire instead)
+- market:        SHA-1 of the run's MarketContext file (trading date without one)
+- intraday:      the live 15m bar Quant's VWAP check would read: its start
+                 while the market is open, else the last session's close
+
+Outputs are kept per wrapper in data/incremental/<wrapper>.json and written
+back when the backend is closed. Errors and degraded outputs (budget.py)
+are never reused.
+"""
+
+import os
+import json
+import hashlib
+import datetime
+import threading
+
+import numpy as np
+
+from wrappers import MODEL_WRAPPERS, load_plugin
+from market_data import OHLCV_COLUMNS
+from executors import data_needs, run_batch
+from run_journal import trading_date, IST
+from nse_calendar import is_trading_day, previous_trading_day
+
+STATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "incremental")
+
+# NSE cash session and the bar size of Quant's intraday VWAP check
+SESSION_OPEN = datetime.time(9, 15)
+SESSION_CLOSE = datetime.time(15, 30)
+INTRADAY_BAR_MINUTES = 15
+
+# Minutes a news-driven output stays reusable
+NEWS_TTL = 60
+
+
+def external_inputs(wrapper_name):
+    return tuple(getattr(load_plugin(wrapper_name), "EXTERNAL_INPUTS", ()))
+
+
+def window_hash(frame):
+    h = hashlib.sha1(frame.index.values.astype("datetime64[D]").astype(np.int64).tobytes())
+    h.update(np.ascontiguousarray(frame[OHLCV_COLUMNS].to_numpy(dtype=np.float64)).tobytes())
+    return h.hexdigest()
+
+
+def snapshot_fundamentals_version(ticker):
+    """Hash of the ticker's ``info`` in the active EOD snapshot (None without one)."""
+    import fetch_gate
+    snap = fetch_gate.snapshot(ticker)
+    if snap is None or "info" not in snap:
+        return None
+    return hashlib.sha1(json.dumps(snap["info"], sort_keys=True, default=str).encode()).hexdigest()
+
+
+def snapshot_news_version(ticker):
+    """Hash of the ids of the ticker's news in the active EOD snapshot (None without one)."""
+    import fetch_gate
+    snap = fetch_gate.snapshot(ticker)
+    if snap is None or "news" not in snap:
+        return None
+    ids = sorted(str(item.get("id") or item.get("uuid") or item.get("content", {}).get("id", ""))
+                 for item in snap["news"] or [])
+    return hashlib.sha1("|".join(ids).encode()).hexdigest()
+
+
+def intraday_version(now=None):
+    """
+    Version of live intraday bars: the start of the current 15m bar while
+    the session is open, otherwise the close of the latest session (intraday
+    data does not move between sessions).
+    """
+    now = (now or datetime.datetime.now(IST)).astimezone(IST)
+    today = now.date()
+    if is_trading_day(today):
+        if now.time() >= SESSION_CLOSE:
+            return f"{today.isoformat()} close"
+        if now.time() >= SESSION_OPEN:
+            minutes = (now.hour * 60 + now.minute) - (SESSION_OPEN.hour * 60 + SESSION_OPEN.minute)
+            start = datetime.datetime.combine(today, SESSION_OPEN) + datetime.timedelta(
+                minutes=minutes - minutes % INTRADAY_BAR_MINUTES)
+            return start.strftime("%Y-%m-%d %H:%M")
+    return f"{previous_trading_day(today).isoformat()} close"
+
+
+def news_version(ticker, now=None):
+    """
+    Version of the ticker's news: its EOD snapshot's news ids when one is
+    active, else the NEWS_TTL-minute window ``now`` falls in. Asking Yahoo
+    for the news ids would cost a request per key, cache hit or not, so
+    news-driven outputs expire with the window instead.
+    """
+    snapshot = snapshot_news_version(ticker)
+    if snapshot is not None:
+        return snapshot
+    now = (now or datetime.datetime.now(IST)).astimezone(IST)
+    minutes = now.hour * 60 + now.minute
+    start = now.replace(hour=0, minute=0) + datetime.timedelta(minutes=minutes - minutes % NEWS_TTL)
+    return start.strftime("%Y-%m-%d %H:%M")
+
+
+class InputFingerprint:
+    """
+    Hash of what one (model, ticker) output depends on: the model's bar
+    window plus the external inputs it declares. Fundamentals are versioned
+    by ISO week, or with ``daily_fundamentals`` by the EOD snapshot's
+    ``info`` (so the overnight precompute and the morning run share keys),
+    falling back to the trading date.
+    """
+
+    def __init__(self, date, context_path=None, daily_fundamentals=False):
+        self.date = date
+        self.inputs = {w: external_inputs(w) for w in MODEL_WRAPPERS.values()}
+        year, week, _ = datetime.date.fromisoformat(date).isocalendar()
+        self.daily_fundamentals = daily_fundamentals
+        self.fundamentals_version = date if daily_fundamentals else f"{year}-W{week:02d}"
+        self.market_version = date
+        if context_path:
+            with open(context_path, "rb") as f:
+                self.market_version = hashlib.sha1(f.read()).hexdigest()
+
+    def parts(self, wrapper_name, ticker, bundle, degrade=()):
+        """
+        The hashed inputs as a dict, or None if one of them is unknown. Under
+        ``skip_news`` (budget.py) the model reads no news, so none is looked up.
+        """
+        window = bundle.view(data_needs(wrapper_name)) if bundle is not None else None
+        if window is None or window.empty:
+            return None
+        parts = {"last_bar": str(window.index[-1].date()), "bars": window_hash(window)}
+        for name in self.inputs[wrapper_name]:
+            if name == "fundamentals":
+                snapshot = snapshot_fundamentals_version(ticker) if self.daily_fundamentals else None
+                parts[name] = snapshot or self.fundamentals_version
+            elif name == "news":
+                parts[name] = "skipped" if "skip_news" in degrade else news_version(ticker)
+            elif name == "market":
+                parts[name] = self.market_version
+            elif name == "intraday":
+                parts[name] = intraday_version()
+        return parts
+
+    def __call__(self, wrapper_name, ticker, bundle, degrade=()):
+        parts = self.parts(wrapper_name, ticker, bundle, degrade)
+        if parts is None:
+            return None
+        return hashlib.sha1(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+class IncrementalBackend:
+    """Same ``run(wrapper, ticker, bundle)`` interface as the backend it wraps."""
+
+    def __init__(self, backend, date=None, state_dir=STATE_DIR):
+        self.backend = backend
+        self.date = date or trading_date()
+        self.state_dir = state_dir
+        self.state = {w: self._load(w) for w in MODEL_WRAPPERS.values()}
+        self.reused = 0
+        self.computed = 0
+        self._lock = threading.Lock()
+        self.fingerprint = InputFingerprint(self.date, getattr(backend, "context_path", None))
+
+    def _state_path(self, wrapper_name):
+        return os.path.join(self.state_dir, f"{wrapper_name}.json")
+
+    def _load(self, wrapper_name):
+        try:
+            with open(self._state_path(wrapper_name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @property
+    def degrade(self):
+        return getattr(self.backend, "degrade", ())
+
+    @degrade.setter
+    def degrade(self, steps):
+        self.backend.degrade = steps
+
+    def _reuse(self, wrapper_name, ticker, bundle):
+        """(fingerprint, previous result if its inputs are unchanged, else None)."""
+        fp = self.fingerprint(wrapper_name, ticker, bundle, self.degrade)
+        if fp is not None:
+            with self._lock:
+                prev = self.state[wrapper_name].get(ticker)
+                if prev and prev["fingerprint"] == fp:
+                    self.reused += 1
+                    return fp, prev["result"]
+        return fp, None
+
+    def _record(self, fp, wrapper_name, ticker, result):
+        with self._lock:
+            self.computed += 1
+            if fp is not None and "error" not in result and "degraded" not in result:
+                self.state[wrapper_name][ticker] = {"fingerprint": fp, "result": result}
+        return result
+
+    def run(self, wrapper_name, ticker, bundle=None):
+        fp, result = self._reuse(wrapper_name, ticker, bundle)
+        if result is not None:
+            return result
+        return self._record(fp, wrapper_name, ticker, self.backend.run(wrapper_name, ticker, bundle))
+
+    def run_batch(self, wrapper_name, tickers, bundles):
+        fps = {}
+        for ticker in tickers:
+            fp, result = self._reuse(wrapper_name, ticker, bundles.get(ticker))
+            if result is not None:
+                yield ticker, result
+            else:
+                fps[ticker] = fp
+        if fps:
+            for ticker, result in run_batch(self.backend, wrapper_name, list(fps), bundles):
+                yield ticker, self._record(fps[ticker], wrapper_name, ticker, result)
+
+    def save(self):
+        os.makedirs(self.state_dir, exist_ok=True)
+        for wrapper_name, entries in self.state.items():
+            path = self._state_path(wrapper_name)
+            tmp = path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp, path)
+
+    def close(self):
+        self.backend.close()
+        self.save()
+        total = self.reused + self.computed
+        print(f"[Incremental] Reused {self.reused}/{total} model runs with unchanged inputs")
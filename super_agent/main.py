@@ -1,32 +1,49 @@
 import os
-import sys
-import json
-import subprocess
+import argparse
 import concurrent.futures
 from reporting import generate_dual_reports
+from executors import BACKENDS, make_backend
+from scheduler import ScanScheduler, DEFAULT_MAX_IN_FLIGHT, DEFAULT_TASK_TIMEOUT, parse_model_limits, parse_model_batch
+from market_data import model_data_needs, fetch_bundle, load_bundle, bulk_download, BULK_BATCH_SIZE
+from run_journal import RunJournal
+from nse_calendar import is_trading_day
+from startup import STARTUP
+from cascade import CASCADE_DEFAULTS, HOLDINGS_FILE, load_holdings
+from priority import ProgressiveReport, ORDER_PRIORITY, ORDER_LIST
+from budget import parse_duration, BudgetPlanner
+from sharding import SHARD_DIR, parse_shard
+import fetch_gate
+from wrappers import MODEL_WRAPPERS
 
-import requests
-import io
-import pandas as pd
+# Meta-ML model (trained on backtest data), loaded on first use:
+# importing meta_model pulls in sklearn, which dwarfs the rest of startup
+META_MODEL = None
+_META_MODEL_LOADED = False
 
-# Load Meta-ML model (trained on backtest data)
-try:
-    from meta_model import load_meta_model, predict_with_meta
-    META_MODEL = load_meta_model()
-    if META_MODEL:
-        print(f"[Meta-ML] Loaded model (accuracy: {META_MODEL['metrics']['accuracy']*100:.1f}%)")
-    else:
-        print("[Meta-ML] No trained model found — running without ML filter")
-except Exception as e:
-    META_MODEL = None
-    print(f"[Meta-ML] Could not load: {e}")
+def get_meta_model():
+    global META_MODEL, _META_MODEL_LOADED
+    if _META_MODEL_LOADED:
+        return META_MODEL
+    _META_MODEL_LOADED = True
+    try:
+        from meta_model import load_meta_model
+        META_MODEL = load_meta_model()
+        if META_MODEL:
+            print(f"[Meta-ML] Loaded model (accuracy: {META_MODEL['metrics']['accuracy']*100:.1f}%)")
+        else:
+            print("[Meta-ML] No trained model found — running without ML filter")
+    except Exception as e:
+        META_MODEL = None
+        print(f"[Meta-ML] Could not load: {e}")
+    return META_MODEL
 
 def get_nifty500():
+    import io
+    import pandas as pd
     try:
         print("Fetching NIFTY 500 list from NSE...")
         url = "https://archives.nseindia.com/content/indices/ind_nifty500list.csv"
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers)
+        response = fetch_gate.get(url)
         if response.status_code == 200:
             csv_content = response.content.decode('utf-8')
             df = pd.read_csv(io.StringIO(csv_content))
@@ -41,367 +58,393 @@ def get_nifty500():
 
 WRAPPER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wrappers")
 
-def run_wrapper(wrapper_name, ticker):
-    wrapper_path = os.path.join(WRAPPER_DIR, wrapper_name)
-    try:
-        result = subprocess.run(
-            [sys.executable, wrapper_path, "--ticker", ticker],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        output = result.stdout.strip()
-        # Find the last line which should be the JSON
-        lines = output.split('\n')
-        json_line = lines[-1]
-        return json.loads(json_line)
-    except subprocess.CalledProcessError as e:
-        # Capture stderr for debugging
-        return {"error": f"Subprocess Error: {e.stderr}", "details": {"raw_output": e.stdout}}
-    except Exception as e:
-        return {"error": str(e), "details": {"raw_output": ""}}
+# Execution backend shared by every analyze_stock call (see executors.py)
+BACKEND = None
 
-def analyze_stock(ticker):
+def get_backend():
+    global BACKEND
+    if BACKEND is None:
+        from output_cache import CachedBackend
+        BACKEND = CachedBackend(make_backend("pool"))
+    return BACKEND
+
+def analyze_stock(ticker, backend=None):
     print(f"Analyzing {ticker}...", end="\r")
+    backend = backend or get_backend()
     
-    # Run models in parallel for this stock
-    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-        future_hfm = executor.submit(run_wrapper, "hfm_wrapper.py", ticker)
-        future_stock_ai = executor.submit(run_wrapper, "stock_ai_wrapper.py", ticker)
-        future_quant = executor.submit(run_wrapper, "quant_wrapper.py", ticker)
-        future_apex = executor.submit(run_wrapper, "apex_wrapper.py", ticker)
-        
-        res_hfm = future_hfm.result()
-        res_stock_ai = future_stock_ai.result()
-        res_quant = future_quant.result()
-        res_apex = future_apex.result()
+    # Fetch daily bars once for all four models
+    bundle = fetch_bundle(ticker, model_data_needs())
     
-    # Process Results
-    results = {
-        "Hedge Fund Manager": res_hfm,
-        "Most Advance stock_AI": res_stock_ai,
-        "Quantitative Development": res_quant,
-        "Apex Logic": res_apex
-    }
-    
-    # === SUPER AGENT 4.0 AGGREGATION ===
-    
-    # --- FIX #1: Graduated Signal Normalization ---
-    # BUY and STRONG BUY are no longer identical.
-    def normalize_signal(signal):
-        s = signal.upper().replace("_", " ")
-        if "STRONG BUY" in s: return 1.0
-        if "STRONG SELL" in s: return -1.0
-        if "BUY" in s: return 0.7       # Weaker than STRONG BUY
-        if "SELL" in s: return -0.7      # Weaker than STRONG SELL
-        return 0.0  # WAIT / HOLD
-    
-    # Helper: Get direction only (+1, -1, 0) for consensus check
-    def get_direction(signal):
-        s = signal.upper().replace("_", " ")
-        if "BUY" in s: return 1
-        if "SELL" in s: return -1
-        return 0
-        
-    # 1. Global Metrics (ADX, RVOL)
-    adx_vals = []
-    rvol_vals = []
-    for res in results.values():
-        if "error" in res: continue
-        d = res.get('details', {})
-        if 'adx' in d and d['adx'] > 0: adx_vals.append(d['adx'])
-        if 'rvol' in d and d['rvol'] > 0: rvol_vals.append(d['rvol'])
-    
-    avg_adx = sum(adx_vals) / len(adx_vals) if adx_vals else 0
-    avg_rvol = sum(rvol_vals) / len(rvol_vals) if rvol_vals else 0
-    
-    # --- FIX #10: Model-Specific Persistence Weights ---
-    MODEL_WEIGHTS = {
-        "Hedge Fund Manager":       [0.40, 0.35, 0.25],   # Slow (institutional)
-        "Most Advance stock_AI":    [0.50, 0.30, 0.20],   # Balanced
-        "Quantitative Development": [0.50, 0.30, 0.20],   # Balanced
-        "Apex Logic":               [0.60, 0.25, 0.15],   # Fast (price action)
-    }
+    # Run models in parallel for this stock
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(MODEL_WRAPPERS)) as executor:
+        futures = {
+            model_name: executor.submit(backend.run, wrapper_name, ticker, bundle)
+            for model_name, wrapper_name in MODEL_WRAPPERS.items()
+        }
+        # Process Results
+        results = {model_name: f.result() for model_name, f in futures.items()}
     
-    def calculate_persistence_score(res, mode_key, model_name):
-        if "error" in res: return 0
-        
-        history = res.get('history', [])
-        
-        # Fallback: no history available
-        if not history:
-            current = res.get(mode_key, {})
-            sig = current.get('signal', 'WAIT')
-            conf = current.get('confidence', 0)
-            return normalize_signal(sig) * conf * 0.5
-        
-        weights = MODEL_WEIGHTS.get(model_name, [0.5, 0.3, 0.2])
-        score = 0
-        
-        for i, h_item in enumerate(history):
-            if i >= 3: break
-            s_val = normalize_signal(h_item.get('signal', 'WAIT'))
-            c_val = h_item.get('confidence', 0)
-            score += (s_val * c_val * weights[i])
-            
-        return score
+    return aggregate_results(ticker, results)
 
-    # --- FIX #12: Model Consensus Gate ---
-    def check_consensus(results, mode_key):
-        """
-        Returns True if models generally agree, False if there's a conflict.
-        A conflict = one model says BUY and another says SELL.
-        """
-        directions = []
-        for model_name, res in results.items():
-            if "error" in res: continue
-            current = res.get(mode_key, {})
-            sig = current.get('signal', 'WAIT')
-            d = get_direction(sig)
-            if d != 0:  # Only count non-WAIT models
-                directions.append(d)
-        
-        if not directions:
-            return True  # All WAIT = no conflict
-        
-        has_buy = any(d > 0 for d in directions)
-        has_sell = any(d < 0 for d in directions)
-        
-        # Conflict: at least one model says BUY and another says SELL
-        return not (has_buy and has_sell)
+def aggregate_results(ticker, results, params=None):
+    """
+    Combine the four wrapper results for one ticker into (swing_res, intraday_res).
+    results: model display name -> wrapper result dict (or {"error": ...}).
+    """
+    return aggregate_universe({ticker: results}, params)[0]
 
-    def calculate_super_score(results, mode_key):
-        total_score = 0
-        valid_models = 0
-        
-        for model_name, res in results.items():
-            if "error" in res: continue
-            
-            p_score = calculate_persistence_score(res, mode_key, model_name)
-            total_score += p_score
-            valid_models += 1
-            
-        final_score = total_score / valid_models if valid_models > 0 else 0
-        
-        # --- FILTERS ---
-        
-        # FIX #9: Graduated ADX Filter (Not hard kill)
-        # ADX < 20: Hard veto (truly choppy)
-        # ADX 20-25: 50% penalty (borderline)
-        # ADX > 25: No penalty (trending)
-        if mode_key == 'swing':
-            if avg_adx < 20:
-                if final_score > 0: final_score = 0  # Hard veto
-            elif avg_adx < 25:
-                if final_score > 0: final_score *= 0.5  # 50% penalty
-        
-        # FIX #12: Consensus Gate
-        # If models disagree on direction, force WAIT
-        if not check_consensus(results, mode_key):
-            if abs(final_score) < 0.6:  # Only override if not a very strong signal
-                final_score *= 0.3  # Heavy penalty for disagreement
-                
-        return final_score
+def meta_trade_data(results, scores, i):
+    """Meta-model input row for ticker ``i`` of ``scores``, matching the backtest format."""
+    def get_model_signal(model_name, mode_key):
+        res = results.get(model_name, {})
+        if "error" in res: return 'WAIT', 0
+        md = res.get(mode_key, {})
+        return md.get('signal', 'WAIT'), md.get('confidence', 0)
 
-    super_score_swing = calculate_super_score(results, 'swing')
-    super_score_intraday = calculate_super_score(results, 'intraday')
-    
-    # Determine Final Signals
-    def get_final_signal(score):
-        if score >= 0.5: return "STRONG BUY"
-        if score > 0.15: return "BUY"
-        if score <= -0.5: return "STRONG SELL"
-        if score < -0.15: return "SELL"
-        return "WAIT"
-        
-    final_signal_swing = get_final_signal(super_score_swing)
-    final_signal_intraday = get_final_signal(super_score_intraday)
-    
-    # --- SUPREME TIER Classification ---
-    # A stock gets "SUPREME" badge ONLY if ALL of:
-    # 1. All 3 history days aligned as BUY for all working models
-    # 2. All working models agree on BUY direction
-    # 3. ADX > 25
-    # 4. Super Score >= 0.6
-    def check_supreme(results, mode_key, super_score):
-        if super_score < 0.6: return False
-        if avg_adx < 25: return False
-        
-        for model_name, res in results.items():
-            if "error" in res: continue
-            
-            # Check current signal is BUY
-            current = res.get(mode_key, {})
-            if get_direction(current.get('signal', 'WAIT')) != 1:
-                return False
-            
-            # Check all history days are BUY
-            history = res.get('history', [])
-            for h in history:
-                if get_direction(h.get('signal', 'WAIT')) != 1:
-                    return False
-        
-        return True
-    
-    is_supreme_swing = check_supreme(results, 'swing', super_score_swing)
-    is_supreme_intraday = check_supreme(results, 'intraday', super_score_intraday)
-    
-    # Extract Trade Params
-    def extract_params(model_results, mode_key, final_sig):
-        params = {"entry": 0, "target": 0, "sl": 0}
-        
-        # Priority: Apex > Quant > StockAI > HFM for trade params
-        priority = ["Apex Logic", "Quantitative Development", "Most Advance stock_AI", "Hedge Fund Manager"]
-        
-        # Normalize final_sig for comparison
-        final_sig_norm = final_sig.upper().replace("_", " ")
-        
-        for name in priority:
-            res = model_results.get(name, {})
-            if "error" in res: continue
-            
-            mode_data = res.get(mode_key, {})
-            model_sig = mode_data.get('signal', 'WAIT').upper().replace("_", " ")
-            
-            # Exact or loose match (BUY matches STRONG BUY direction)
-            if final_sig_norm != "WAIT":
-                final_dir = get_direction(final_sig_norm)
-                model_dir = get_direction(model_sig)
-                
-                if final_dir == model_dir and final_dir != 0:
-                    params['entry'] = mode_data.get('entry', 0)
-                    params['target'] = mode_data.get('target', 0)
-                    params['sl'] = mode_data.get('sl', 0)
-                    return params
-        
-        # Fallback: take from Apex
-        res = model_results.get("Apex Logic", {})
-        if "error" not in res:
-            mode_data = res.get(mode_key, {})
-            params['entry'] = mode_data.get('entry', 0)
-            params['target'] = mode_data.get('target', 0)
-            params['sl'] = mode_data.get('sl', 0)
-            
-        return params
+    apex_sig, apex_conf = get_model_signal("Apex Logic", "swing")
+    hfm_sig, hfm_conf = get_model_signal("Hedge Fund Manager", "swing")
+    stockai_sig, stockai_conf = get_model_signal("Most Advance stock_AI", "swing")
+    quant_sig, quant_conf = get_model_signal("Quantitative Development", "swing")
+
+    # Get ADX/RSI/RVOL/MACD from Apex details (most reliable source)
+    apex_details = results.get("Apex Logic", {}).get("details", {})
+
+    return {
+        'apex_signal': apex_sig, 'apex_conf': apex_conf,
+        'hfm_signal': hfm_sig, 'hfm_conf': hfm_conf,
+        'stockai_signal': stockai_sig, 'stockai_conf': stockai_conf,
+        'quant_signal': quant_sig, 'quant_conf': quant_conf,
+        'ensemble_signal': str(scores.final_signal['swing'][i]),
+        'super_score': float(scores.super_score['swing'][i]),
+        'rsi': 50, 'adx': float(scores.avg_adx[i]), 'rvol': float(scores.avg_rvol[i]), 'macd_diff': 0,
+        'above_sma50': 1 if apex_details.get('trend_score', 0) >= 0 else 0,
+        'above_sma200': 1 if apex_details.get('trend_score', 0) > 0 else 0,
+        'above_ema20': 1 if apex_details.get('mom_score', 0) >= 0 else 0,
+        'above_vwap': 1 if apex_details.get('vol_boost', 0) >= 0 else 0,
+    }
 
-    params_swing = extract_params(results, 'swing', final_signal_swing)
-    params_intraday = extract_params(results, 'intraday', final_signal_intraday)
+def aggregate_universe(results_by_ticker, params=None):
+    """
+    Super Agent 4.0 aggregation for many tickers at once (see aggregation.py),
+    followed by the meta-model filter. Returns [(swing_res, intraday_res)] in
+    the order of ``results_by_ticker``.
+    """
+    from aggregation import score_universe, meta_filter
+    scores = score_universe(results_by_ticker, params)
+    swing_signals = scores.final_signal['swing']
+    ml_confidence = None
     
     # --- META-ML MODEL PREDICTION ---
-    # Use the trained meta-model to predict probability of hitting +3% in 5 days
-    ml_confidence = None
-    if META_MODEL is not None:
+    # Use the trained meta-model to predict probability of hitting +3% in 5 days:
+    # one feature matrix and one predict_proba for the whole universe
+    meta_model = get_meta_model()
+    if meta_model is not None:
         try:
-            # Build trade_data dict matching backtest format
-            def get_model_signal(model_name, mode_key):
-                res = results.get(model_name, {})
-                if "error" in res: return 'WAIT', 0
-                md = res.get(mode_key, {})
-                return md.get('signal', 'WAIT'), md.get('confidence', 0)
-            
-            apex_sig, apex_conf = get_model_signal("Apex Logic", "swing")
-            hfm_sig, hfm_conf = get_model_signal("Hedge Fund Manager", "swing")
-            stockai_sig, stockai_conf = get_model_signal("Most Advance stock_AI", "swing")
-            quant_sig, quant_conf = get_model_signal("Quantitative Development", "swing")
-            
-            # Get ADX/RSI/RVOL/MACD from Apex details (most reliable source)
-            apex_details = results.get("Apex Logic", {}).get("details", {})
-            
-            trade_data = {
-                'apex_signal': apex_sig, 'apex_conf': apex_conf,
-                'hfm_signal': hfm_sig, 'hfm_conf': hfm_conf,
-                'stockai_signal': stockai_sig, 'stockai_conf': stockai_conf,
-                'quant_signal': quant_sig, 'quant_conf': quant_conf,
-                'ensemble_signal': final_signal_swing,
-                'super_score': super_score_swing,
-                'rsi': 50, 'adx': avg_adx, 'rvol': avg_rvol, 'macd_diff': 0,
-                'above_sma50': 1 if apex_details.get('trend_score', 0) >= 0 else 0,
-                'above_sma200': 1 if apex_details.get('trend_score', 0) > 0 else 0,
-                'above_ema20': 1 if apex_details.get('mom_score', 0) >= 0 else 0,
-                'above_vwap': 1 if apex_details.get('vol_boost', 0) >= 0 else 0,
-            }
-            
-            ml_confidence = predict_with_meta(META_MODEL, trade_data)
-            
-            # Use ML confidence to enhance/degrade signal
-            if ml_confidence is not None:
-                if ml_confidence > 0.7 and "BUY" in final_signal_swing:
-                    # High ML confidence — upgrade signal text
-                    if final_signal_swing == "BUY":
-                        final_signal_swing = "STRONG BUY"
-                elif ml_confidence < 0.3 and "BUY" in final_signal_swing:
-                    # Low ML confidence — downgrade
-                    final_signal_swing = "WAIT"
+            from meta_model import predict_with_meta_batch
+            trades = [meta_trade_data(results_by_ticker[ticker], scores, i)
+                      for i, ticker in enumerate(scores.table.tickers)]
+            ml_confidence = predict_with_meta_batch(meta_model, trades)
+            # Use ML confidence to enhance/degrade signals
+            swing_signals = meta_filter(swing_signals, ml_confidence, scores.params)
         except Exception as e:
+            print(f"[Meta-ML] Batch prediction failed: {e}")
             ml_confidence = None
     
-    # Construct Result Objects
-    swing_res = {
-        "ticker": ticker,
-        "final_signal": ("[SUPREME] " + final_signal_swing) if is_supreme_swing else final_signal_swing,
-        "super_score": super_score_swing,
-        "ml_confidence": round(ml_confidence, 4) if ml_confidence is not None else None,
-        "entry": params_swing['entry'],
-        "target": params_swing['target'],
-        "sl": params_swing['sl'],
-        "is_supreme": is_supreme_swing,
-        "models": {k: v.get('swing', {}) for k, v in results.items() if "error" not in v}
-    }
-    
-    intraday_res = {
-        "ticker": ticker,
-        "final_signal": ("[SUPREME] " + final_signal_intraday) if is_supreme_intraday else final_signal_intraday,
-        "super_score": super_score_intraday,
-        "ml_confidence": round(ml_confidence, 4) if ml_confidence is not None else None,
-        "entry": params_intraday['entry'],
-        "target": params_intraday['target'],
-        "sl": params_intraday['sl'],
-        "is_supreme": is_supreme_intraday,
-        "models": {k: v.get('intraday', {}) for k, v in results.items() if "error" not in v}
-    }
-    
-    # Add error info if any
-    for k, v in results.items():
-        if "error" in v:
-            error_msg = v['error']
-            short_err = f"ERR: {error_msg[:100]}" 
-            swing_res['models'][k] = {"signal": short_err, "confidence": 0}
-            intraday_res['models'][k] = {"signal": short_err, "confidence": 0}
+    return scores.records(ml_confidence, swing_signals)
 
-    return swing_res, intraday_res
+def split_journal(done):
+    """Journal records -> (raw results of scanned tickers, phase-1 rows of pruned ones)."""
+    raw, pruned = {}, {}
+    for ticker, rec in done.items():
+        if "phase1" in rec:
+            pruned[ticker] = rec["phase1"]
+        else:
+            raw[ticker] = rec["results"]
+    return raw, pruned
+
+def report_pairs(raw_results, pruned, params=None):
+    """[(swing_res, intraday_res)] for scanned tickers, then cascade-pruned ones."""
+    try:
+        pairs = aggregate_universe(raw_results, params)
+    except Exception as e:
+        # One malformed result must not cost the whole report: score tickers one at a time
+        print(f"[Aggregate] Universe scoring failed ({e}), falling back to per-ticker")
+        pairs = []
+        for ticker, results in raw_results.items():
+            try:
+                pairs.append(aggregate_results(ticker, results, params))
+            except Exception as e:
+                print(f"Failed to analyze {ticker}: {e}")
+    if pruned:
+        from cascade import pruned_records
+        pairs += pruned_records(pruned, MODEL_WRAPPERS)
+    return pairs
+
+def write_reports(raw_results, pruned, output_dir, progress=None, params=None, pairs=None):
+    if pairs is None:
+        pairs = report_pairs(raw_results, pruned, params)
+    return generate_dual_reports([s for s, _ in pairs], [i for _, i in pairs], output_dir, progress)
+
+def prioritize(tickers, journal, holdings, bundle_loader):
+    """Scan order: holdings, then the previous session's BUY/SELL calls, then liquidity."""
+    import time
+    from priority import prior_signals, liquidity, priority_order, describe
+    start = time.perf_counter()
+    prior = {}
+    previous = journal.previous()
+    if previous is not None:
+        done = previous.load()
+        if done:
+            prior = prior_signals(report_pairs(*split_journal(done)))
+    ordered, counts = priority_order(tickers, holdings, prior, liquidity(tickers, bundle_loader))
+    print(f"[Priority] {describe(counts)} (prior session: {previous.date if previous else 'none'}) "
+          f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return ordered
 
 def main():
+    global BACKEND
+    STARTUP.mark("imports")
+    parser = argparse.ArgumentParser(description="Super Agent 4.0 — NIFTY 500 scan")
+    parser.add_argument("--backend", choices=BACKENDS, default="pool",
+                        help="pool: warm in-process workers per model; serve: warm --serve scripts; subprocess: one interpreter per call")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_MAX_IN_FLIGHT,
+                        help="Max (model, ticker) tasks in flight across the universe")
+    parser.add_argument("--model-limit", action="append", default=[], metavar="WRAPPER=N",
+                        help="Per-model concurrency cap, e.g. hfm_wrapper=2 (repeatable)")
+    parser.add_argument("--model-batch", action="append", default=[], metavar="WRAPPER=N",
+                        help="Tickers per task for a model, e.g. quant_wrapper=4 (repeatable; "
+                             "default: apex_wrapper=8, every model 8 with --backend subprocess)")
+    parser.add_argument("--no-prefetch", action="store_true",
+                        help="Skip the bulk download stage; fetch each ticker's bars on demand")
+    parser.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE,
+                        help="Tickers per bulk yf.download call")
+    parser.add_argument("--no-arena", action="store_true",
+                        help="Don't share prefetched bars with pool workers through shared memory")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip tickers already in today's run journal (after a crash)")
+    parser.add_argument("--report-only", action="store_true",
+                        help="Regenerate the reports from today's run journal without scanning")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Skip non-trading days and reuse model outputs whose inputs haven't changed")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Recompute every model instead of reusing cached outputs for identical inputs and code")
+    parser.add_argument("--start-method", choices=("fork", "forkserver", "spawn"),
+                        help="How pool workers are started; forkserver preloads heavy libraries once for all workers")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="Print time from process start to each startup milestone")
+    parser.add_argument("--cascade", action="store_true",
+                        help="Screen the universe with a vectorised Apex score first; run all four models only on the shortlist")
+    parser.add_argument("--cascade-min-rvol", type=float, default=CASCADE_DEFAULTS["min_rvol"],
+                        help="Shortlist tickers whose relative volume reaches this")
+    parser.add_argument("--holdings", default=HOLDINGS_FILE,
+                        help="File of held tickers (one per line), always evaluated in full")
+    parser.add_argument("--task-timeout", type=float, default=DEFAULT_TASK_TIMEOUT,
+                        help="Seconds before a (model, ticker) task counts as a timeout error")
+    parser.add_argument("--no-hedge", action="store_true",
+                        help="Don't re-launch tasks running past their model's p95 latency")
+    parser.add_argument("--early-exit", action="store_true",
+                        help="Skip a ticker's remaining models once BUY is out of reach and its signals are settled")
+    parser.add_argument("--no-priority", action="store_true",
+                        help="Scan in NIFTY 500 list order instead of holdings / prior signals / liquidity first")
+    parser.add_argument("--report-every", type=int, default=25, metavar="N",
+                        help="Re-render both reports with a progress banner every N finished tickers (0: only at the end)")
+    parser.add_argument("--budget", type=parse_duration, metavar="DURATION",
+                        help="Wall-clock budget from start (e.g. 20m): cut expensive steps when the projected finish runs past it")
+    parser.add_argument("--from-eod", action="store_true",
+                        help="Take the universe, bars and info/news snapshots from last evening's eod.py run; "
+                             "only the pre-open market context is fetched")
+    parser.add_argument("--shard", type=parse_shard, metavar="I/N",
+                        help="Scan only shard I of N (balanced by each ticker's model time last session); "
+                             "combine the shards with: python sharding.py merge")
+    parser.add_argument("--shard-dir", default=SHARD_DIR,
+                        help="Directory every shard shares: plan, shard journals and partial reports")
+    parser.add_argument("--date", help="Trading date of the journal to use (YYYY-MM-DD, default today IST)")
+    args = parser.parse_args()
+    model_limits = parse_model_limits(args.model_limit)
+    model_batch = parse_model_batch(args.model_batch, args.backend)
+    output_dir = os.path.dirname(os.path.abspath(__file__))
+    
+    journal = RunJournal(args.date)
+    history = journal      # previous sessions' calls, for the scan priority
+    if args.shard:
+        from sharding import shard_journal, shard_output_dir, merged_journal
+        history = merged_journal(journal.date, args.shard_dir)
+        journal = shard_journal(journal.date, *args.shard, args.shard_dir)
+        output_dir = shard_output_dir(journal.date, *args.shard, args.shard_dir)
+    if args.report_only:
+        done = journal.load()
+        print(f"[Journal] {len(done)} tickers in {journal.path}")
+        swing_path, intraday_path = write_reports(*split_journal(done), output_dir)
+        print(f"Swing Report: {swing_path}")
+        print(f"Intraday Report: {intraday_path}")
+        return
+    
+    if args.incremental and not is_trading_day(journal.date):
+        print(f"[Calendar] {journal.date} is not an NSE trading day — keeping the last reports")
+        return
+    
+    # Last evening's precompute: set before the backend so every worker serves the snapshot
+    eod = None
+    if args.from_eod:
+        from eod import fresh_manifest, use_snapshot
+        eod = fresh_manifest(journal.date)
+        if eod is None:
+            print(f"[EOD] No precompute for the session before {journal.date} — fetching everything now")
+        else:
+            use_snapshot(eod)
+            print(f"[EOD] Using {eod['date']} precompute ({eod['created']}): "
+                  f"{len(eod['stored'])}/{len(eod['tickers'])} tickers with bars")
+    
     print("Initializing Super Agent 4.0...")
     print(f"Wrapper Directory: {WRAPPER_DIR}")
+    print(f"Execution Backend: {args.backend} | Jobs: {args.jobs} | Model limits: {model_limits}")
+    batched = {name: size for name, size in model_batch.items() if size > 1}
+    if batched:
+        print(f"[Batch] Tickers per task: {batched}")
+    # One warm worker per concurrent task a model may have
+    workers = {name: min(limit, args.jobs) for name, limit in model_limits.items()}
+    # Every worker (and this process, once the scan starts) gets an equal slice of each host's request budget
+    fetchers = 1 + sum(workers.values())
+    os.environ[fetch_gate.FETCH_SHARE_ENV] = str(fetchers)
+    fetch_gate.set_share(1)
+    BACKEND = make_backend(args.backend, workers_per_model=workers, start_method=args.start_method,
+                           task_timeout=args.task_timeout)
+    STARTUP.mark("backend ready")
+    
+    # Market-wide inputs (FII/DII, option chain, ^NSEI) fetched once for the whole run
+    try:
+        from market_context import prepare_market_context
+        BACKEND.context_path = prepare_market_context(journal.date)
+    except Exception as e:
+        print(f"[Market] Context unavailable, HFM will fetch its own: {e}")
+    if not args.no_cache:
+        from output_cache import CachedBackend
+        BACKEND = CachedBackend(BACKEND, date=journal.date)
+    if args.incremental:
+        from incremental import IncrementalBackend
+        BACKEND = IncrementalBackend(BACKEND, date=journal.date)
     
     # Fetch NIFTY 500
-    tickers = get_nifty500()
+    tickers = list(eod["tickers"]) if eod is not None else get_nifty500()
     
     if not tickers:
         print("Fallback to hardcoded list (Critical Error)")
         tickers = ["RELIANCE.NS", "TCS.NS", "INFY.NS", "HDFCBANK.NS"]
+    STARTUP.mark("universe")
+    
+    # Every shard takes its slice of one plan, published by whichever shard starts first
+    if args.shard:
+        from sharding import make_plan, describe
+        index, count = args.shard
+        plan = make_plan(tickers, count, journal.date, args.shard_dir)
+        tickers = plan["shards"][index - 1]
+        print(f"[Shard] {index}/{count}: {len(tickers)} tickers | {describe(plan)}")
+    
+    # Raw per-model outputs per ticker; scored for the whole universe at the end
+    raw_results = {}
+    pruned = {}     # cascade: ticker -> phase-1 screen row
+    
+    # Tickers finished by an earlier (crashed) run of the same session keep their results
+    if args.resume:
+        done = journal.load()
+        raw_results, pruned = split_journal(done)
+        tickers = [t for t in tickers if t not in done]
+        print(f"[Journal] Resuming {journal.date}: {len(done)} tickers already done")
+    else:
+        journal.reset()
     
     print(f"Starting analysis for {len(tickers)} stocks...")
     
-    swing_results = []
-    intraday_results = []
+    needs = model_data_needs()
+    print(f"Shared OHLCV: {needs}")
     
-    for i, ticker in enumerate(tickers):
-        print(f"[{i+1}/{len(tickers)}] ", end="")
-        try:
-            s_res, i_res = analyze_stock(ticker)
-            swing_results.append(s_res)
-            intraday_results.append(i_res)
-        except Exception as e:
-            print(f"Failed to analyze {ticker}: {e}")
-            
+    # Pre-stage: bulk-download the universe so scoring is purely local
+    stored = set()
+    if eod is not None:
+        stored = set(eod["stored"])
+    elif not args.no_prefetch:
+        stored = bulk_download(tickers, needs, batch_size=args.batch_size)
+    
+    # Pool workers attach to one shared copy of the universe instead of parsing their own
+    arenas = None
+    if stored and args.backend == "pool" and not args.no_arena:
+        from ohlcv_arena import UniverseArenas
+        arenas = UniverseArenas(sorted(stored), needs)
+        print(f"[Data] Shared-memory arena: {len(arenas)} tickers, {arenas.nbytes / 1e6:.1f} MB")
+    
+    def load_ticker_bundle(ticker):
+        bundle = None
+        if arenas is not None:
+            bundle = arenas.bundle(ticker)
+        if bundle is None and ticker in stored:
+            bundle = load_bundle(ticker, needs)
+        return bundle or fetch_bundle(ticker, needs)
+    
+    def local_bundle(ticker):
+        bundle = arenas.bundle(ticker) if arenas is not None else None
+        return bundle or load_bundle(ticker, needs)
+    
+    holdings = load_holdings(args.holdings)
+    
+    # Phase 1: cheap screen on local bars; phase 2 (all four models) on the shortlist only
+    if args.cascade:
+        from cascade import run_cascade
+        params = {"min_rvol": args.cascade_min_rvol}
+        tickers, screened_out = run_cascade(tickers, local_bundle, params, holdings)
+        for ticker, row in screened_out.items():
+            journal.append(ticker, {}, phase1=row)
+        pruned.update(screened_out)
+    
+    # The scheduler dispatches in list order, so the names that matter most finish first
+    if not args.no_priority:
+        tickers = prioritize(tickers, history, holdings, local_bundle)
+    progressive = ProgressiveReport(lambda progress: write_reports(raw_results, pruned, output_dir, progress),
+                                    len(raw_results) + len(tickers), args.report_every, done=len(raw_results),
+                                    order=ORDER_LIST if args.no_priority else ORDER_PRIORITY)
+    
+    early_exit = None
+    if args.early_exit:
+        from aggregation import early_exit
+    fetch_gate.set_share(fetchers)
+    planner = None
+    if args.budget:
+        planner = BudgetPlanner(BACKEND, args.budget, STARTUP.t0)
+        planner.start(progressive.done)
+    scheduler = ScanScheduler(BACKEND, max_in_flight=args.jobs, model_limits=model_limits,
+                              bundle_loader=load_ticker_bundle, early_exit=early_exit,
+                              task_timeout=args.task_timeout, hedge=not args.no_hedge, model_batch=model_batch)
+    for i, (ticker, results) in enumerate(scheduler.scan(tickers)):
+        STARTUP.mark("first ticker done")
+        print(f"[{i+1}/{len(tickers)}] Analyzed {ticker}", end="\r")
+        raw_results[ticker] = results
+        journal.append(ticker, results, cost=round(scheduler.latency.cost[ticker], 3))
+        progressive.tick()
+        if planner is not None and planner.update(progressive.done, progressive.total):
+            progressive.flush()
+    
+    print()
+    scheduler.latency.report()
+    fetch_gate.report()
+    if planner is not None:
+        planner.report()
+    if scheduler.short_circuited:
+        skipped = ", ".join(f"{w} {n}" for w, n in scheduler.short_circuited.most_common())
+        print(f"[EarlyExit] Skipped {sum(scheduler.short_circuited.values())} model runs ({skipped})")
+    journal.close()
+    if args.startup_report:
+        STARTUP.report()
+    BACKEND.close()
+    if arenas is not None:
+        arenas.close()
     print("\nAnalysis Complete. Generating Reports...")
     
-    output_dir = os.path.dirname(os.path.abspath(__file__))
-    swing_path, intraday_path = generate_dual_reports(swing_results, intraday_results, output_dir)
+    swing_path, intraday_path = write_reports(raw_results, pruned, output_dir)
     
     print(f"Swing Report: {swing_path}")
     print(f"Intraday Report: {intraday_path}")
+    if args.shard:
+        print(f"[Shard] {args.shard[0]}/{args.shard[1]} done — once every shard is: "
+              f"python sharding.py merge --shard-dir {args.shard_dir} --date {journal.date}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,70 @@
+"""
+Super Agent 4.0 — Market Context Stage
+=======================================
+Fetches the market-wide inputs HFM used to re-download for every ticker
+(FII/DII mood, NIFTY option chain, 2y of ^NSEI) once per run, and writes them
+to data/market_context.json. Backends hand that path to every wrapper that
+declares "market" in EXTERNAL_INPUTS; the wrapper loads it once per process
+as a wrappers.wrapper_common.MarketContext.
+
+The fetch logic is HFM's own data_pipeline, loaded from its file under a
+private module name so the orchestrator's imports are not shadowed, and
+with its Yahoo / NSE calls on the fetch gate (fetch_gate.stand_ins).
+"""
+
+import os
+import json
+import importlib.util
+
+from wrappers.wrapper_common import MarketContext, NumpyEncoder
+from run_journal import trading_date
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CONTEXT_PATH = os.path.join(BASE_DIR, "data", "market_context.json")
+HFM_PIPELINE = os.path.join(os.path.dirname(BASE_DIR), "Hedge Fund Manager", "data_pipeline.py")
+
+BENCHMARK = "^NSEI"
+
+
+def _hfm_pipeline():
+    import fetch_gate
+    spec = importlib.util.spec_from_file_location("_hfm_data_pipeline", HFM_PIPELINE)
+    module = importlib.util.module_from_spec(spec)
+    with fetch_gate.stand_ins():
+        spec.loader.exec_module(module)
+    return module
+
+
+def build_market_context(date=None):
+    import pandas as pd
+    pipeline = _hfm_pipeline()
+    market_mood = pipeline.get_market_mood()
+    option_data = pipeline.get_option_chain_analysis("NIFTY")
+    nifty = pipeline.get_historical_data([BENCHMARK], period="2y")
+    if not nifty.empty and isinstance(nifty.columns, pd.MultiIndex):
+        nifty = nifty[BENCHMARK]
+    close = nifty["Close"].dropna() if not nifty.empty else pd.Series(dtype=float)
+    close.index = pd.to_datetime(close.index)
+    if close.index.tz is not None:
+        close.index = close.index.tz_localize(None)
+    close.index.name = "Date"
+    return MarketContext(market_mood, option_data, close.astype(float), date or trading_date())
+
+
+def save_market_context(context, path=CONTEXT_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(context.to_dict(), f, cls=NumpyEncoder)
+    os.replace(tmp, path)
+    return path
+
+
+def prepare_market_context(date=None, path=CONTEXT_PATH):
+    """Build, save and summarise the run's context. Returns its path."""
+    context = build_market_context(date)
+    mood, option = context.market_mood, context.option_data
+    print(f"[Market] Bias {mood.get('Market_Bias')} (FII {mood.get('FII_Net', 0):.0f}, DII {mood.get('DII_Net', 0):.0f}) | "
+          f"PCR {option.get('PCR')} | Max pain {option.get('Max_Pain')} | "
+          f"{BENCHMARK}: {len(context.benchmark_close)} bars")
+    return save_market_context(context, path)
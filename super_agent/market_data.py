@@ -0,0 +1,212 @@
+"""
+Super Agent 4.0 — Shared Market Data
+=====================================
+Fetch-once daily OHLCV for the four models.
+
+Each wrapper declares ``DATA_NEEDS = {"lookback": "1y", "adjusted": True}``.
+The orchestrator fetches the union of those needs once per ticker (the
+longest lookback per adjustment mode) into an OhlcvBundle, and every model
+gets its own trailing window cut from that one canonical frame.
+
+Before scoring, bulk_download() can pre-populate the local store for the
+whole universe with batched ``yf.download(..., group_by='ticker')`` calls;
+bundles are then read from disk and no model touches the network for bars.
+
+The store is data/bars (git-ignored), in the canonical format. data/ohlcv
+belongs to stock_AI's DataEngine (its ``Ticker.history`` CSVs, some of them
+checked in): it is only ever read, as a fallback for tickers the store lacks.
+
+Canonical frame: daily bars, flat Open/High/Low/Close/Volume columns,
+tz-naive DatetimeIndex named "Date" (the shape yf.download gives the wrappers).
+"""
+
+import os
+
+from wrappers import MODEL_WRAPPERS, load_plugin
+from wrappers.wrapper_common import trailing_window, lookback_years, read_ohlcv
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_DIR = os.path.join(BASE_DIR, "data", "bars")
+STOCK_AI_OHLCV_DIR = os.path.join(BASE_DIR, "data", "ohlcv")   # read-only fallback
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Bulk pre-stage
+BULK_BATCH_SIZE = 50
+
+
+def model_data_needs():
+    """wrapper name -> DATA_NEEDS declared by that wrapper."""
+    return {w: load_plugin(w).DATA_NEEDS for w in MODEL_WRAPPERS.values()}
+
+
+def union_needs(needs):
+    """Longest lookback per adjustment mode, e.g. {True: "10y"}."""
+    union = {}
+    for need in needs.values():
+        adjusted = need.get("adjusted", True)
+        lookback = need["lookback"]
+        if adjusted not in union or lookback_years(lookback) > lookback_years(union[adjusted]):
+            union[adjusted] = lookback
+    return union
+
+
+def normalize_ohlcv(df):
+    """Flatten yfinance output into the canonical frame (or None if empty)."""
+    import pandas as pd
+    if df is None or df.empty:
+        return None
+    df = df.copy()
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    missing = [c for c in OHLCV_COLUMNS if c not in df.columns]
+    if missing:
+        return None
+    df = df[OHLCV_COLUMNS].astype(float)
+    df.index = pd.to_datetime(df.index)
+    if df.index.tz is not None:
+        df.index = df.index.tz_localize(None)
+    df.index.name = "Date"
+    df = df[~df.index.duplicated(keep="last")].sort_index()
+    df = df.dropna(subset=["Close"])
+    return df if not df.empty else None
+
+
+def fetch_ohlcv(ticker, lookback="10y", adjusted=True):
+    from fetch_gate import yf
+    try:
+        df = yf.download(ticker, period=lookback, interval="1d", auto_adjust=adjusted, progress=False)
+    except Exception as e:
+        print(f"[Data] Fetch failed for {ticker}: {e}")
+        return None
+    return normalize_ohlcv(df)
+
+
+def ohlcv_path(ticker, adjusted=True):
+    suffix = "" if adjusted else ".raw"
+    return os.path.join(STORE_DIR, f"{ticker}{suffix}.csv")
+
+
+def local_path(ticker, adjusted=True):
+    """Store file of the ticker, else stock_AI's (adjusted bars only), else None."""
+    path = ohlcv_path(ticker, adjusted)
+    if os.path.exists(path):
+        return path
+    # DataEngine saves Ticker.history(), which is split/dividend adjusted
+    fallback = os.path.join(STOCK_AI_OHLCV_DIR, f"{ticker}.csv")
+    if adjusted and os.path.exists(fallback):
+        return fallback
+    return None
+
+
+def save_ohlcv(ticker, df, adjusted=True):
+    os.makedirs(STORE_DIR, exist_ok=True)
+    path = ohlcv_path(ticker, adjusted)
+    tmp = path + ".tmp"
+    df.to_csv(tmp)
+    os.replace(tmp, path)
+    return path
+
+
+class OhlcvBundle:
+    """
+    One ticker's canonical frames (keyed by the ``adjusted`` flag) plus the
+    store paths they were written to, for backends that hand data over by file.
+    """
+
+    def __init__(self, ticker, frames, paths=None):
+        self.ticker = ticker
+        self.frames = frames
+        self.paths = paths or {}
+
+    def view(self, need):
+        """A fresh copy of the trailing window one model asked for (or None)."""
+        frame = self.frames.get(need.get("adjusted", True))
+        if frame is None:
+            return None
+        return trailing_window(frame, need["lookback"])
+
+    def path(self, need):
+        return self.paths.get(need.get("adjusted", True))
+
+
+def fetch_bundle(ticker, needs, save=True):
+    """Fetch the union of every model's needs once. Returns None if nothing came back."""
+    frames, paths = {}, {}
+    for adjusted, lookback in union_needs(needs).items():
+        df = fetch_ohlcv(ticker, lookback, adjusted)
+        if df is None:
+            continue
+        frames[adjusted] = df
+        if save:
+            paths[adjusted] = save_ohlcv(ticker, df, adjusted)
+    if not frames:
+        return None
+    return OhlcvBundle(ticker, frames, paths)
+
+
+def load_bundle(ticker, needs):
+    """Build a bundle from local files only. Returns None if any file is missing."""
+    frames, paths = {}, {}
+    for adjusted in union_needs(needs):
+        path = local_path(ticker, adjusted)
+        if path is None:
+            return None
+        df = normalize_ohlcv(read_ohlcv(path))
+        if df is None:
+            return None
+        frames[adjusted] = df
+        paths[adjusted] = path
+    return OhlcvBundle(ticker, frames, paths)
+
+
+# --- BULK PRE-STAGE ---
+
+def split_batch(data, batch):
+    """Split one grouped yf.download result into {ticker: canonical frame}."""
+    import pandas as pd
+    frames = {}
+    if data is None or data.empty:
+        return frames
+    if isinstance(data.columns, pd.MultiIndex):
+        available = set(data.columns.get_level_values(0))
+        for ticker in batch:
+            if ticker in available:
+                # Tickers on a different calendar come back as all-NaN rows
+                df = normalize_ohlcv(data[ticker].dropna(how="all"))
+                if df is not None:
+                    frames[ticker] = df
+    elif len(batch) == 1:
+        df = normalize_ohlcv(data)
+        if df is not None:
+            frames[batch[0]] = df
+    return frames
+
+
+def bulk_download(tickers, needs, batch_size=BULK_BATCH_SIZE):
+    """
+    Download the whole universe in batches and write every ticker to the store.
+    Returns the set of tickers stored for every adjustment mode.
+    """
+    from fetch_gate import yf
+
+    stored = None
+    for adjusted, lookback in union_needs(needs).items():
+        done = set()
+        batches = [tickers[i:i + batch_size] for i in range(0, len(tickers), batch_size)]
+        for n, batch in enumerate(batches):
+            print(f"[Data] Bulk download {n+1}/{len(batches)} ({len(batch)} tickers, {lookback})...", end="\r")
+            try:
+                data = yf.download(batch, period=lookback, interval="1d", group_by="ticker",
+                                   auto_adjust=adjusted, threads=True, progress=False)
+            except Exception as e:
+                print(f"\n[Data] Batch {n+1} failed: {e}")
+                continue
+            for ticker, df in split_batch(data, batch).items():
+                save_ohlcv(ticker, df, adjusted)
+                done.add(ticker)
+        stored = done if stored is None else stored & done
+
+    stored = stored or set()
+    print(f"\n[Data] Stored daily bars for {len(stored)}/{len(tickers)} tickers in {STORE_DIR}")
+    return stored
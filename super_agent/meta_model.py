@@ -44,9 +44,79 @@ def signal_to_numeric(signal):
     return 0
 
 
-def prepare_features(df):
+SIGNAL_COLUMNS = ['apex_signal', 'hfm_signal', 'stockai_signal', 'quant_signal']
+
+
+def signal_codes(values):
+    """
+    signal_to_numeric for a whole column: each distinct string is parsed
+    once and the column is decoded through that lookup table.
+    """
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=False)
+    lut = np.array([signal_to_numeric(u) for u in uniques], dtype=np.int64)
+    return lut[codes]
+
+
+def _numeric(df, col, fill):
+    return pd.to_numeric(df[col], errors='coerce').fillna(fill)
+
+
+def prepare_features(df, dtype=None):
     """
     Prepare feature matrix from backtest trade data.
+    
+    dtype: optional dtype for the whole matrix (e.g. np.float32 to halve
+    memory on multi-million-row training sets); default keeps int/float columns.
+    """
+    features = pd.DataFrame(index=df.index)
+    
+    # Model signals (numeric)
+    sigs = np.column_stack([signal_codes(df[col]) for col in SIGNAL_COLUMNS])
+    for j, name in enumerate(['apex_sig', 'hfm_sig', 'stockai_sig', 'quant_sig']):
+        features[name] = sigs[:, j]
+    
+    # Model confidences
+    for name in ['apex_conf', 'hfm_conf', 'stockai_conf', 'quant_conf']:
+        features[name] = _numeric(df, name, 0)
+    
+    # Ensemble
+    features['super_score'] = _numeric(df, 'super_score', 0)
+    features['ensemble_sig'] = signal_codes(df['ensemble_signal'])
+    
+    # Technical indicators
+    features['rsi'] = _numeric(df, 'rsi', 50)
+    features['adx'] = _numeric(df, 'adx', 0)
+    features['rvol'] = _numeric(df, 'rvol', 1)
+    features['macd_diff'] = _numeric(df, 'macd_diff', 0)
+    
+    # Binary features
+    for name in ['above_sma50', 'above_sma200', 'above_ema20', 'above_vwap']:
+        features[name] = _numeric(df, name, 0)
+    
+    # Derived: Model agreement
+    buy_mask = sigs > 0
+    buy_count = buy_mask.sum(axis=1)
+    sell_count = (sigs < 0).sum(axis=1)
+    features['model_agreement'] = buy_count - sell_count
+    features['all_buy'] = (buy_count == sigs.shape[1]).astype(int)
+    features['any_sell'] = (sell_count > 0).astype(int)
+    features['buy_count'] = buy_count
+    features['sell_count'] = sell_count
+    
+    # Avg confidence of BUY models: the row-wise version's label-aligned
+    # confs.where(sigs > 0) matched no columns, so it was always 0, and
+    # meta_model.pkl was trained on that. Kept at 0 until the model is retrained
+    features['avg_buy_conf'] = 0.0
+    
+    if dtype is not None:
+        features = features.astype(dtype)
+    return features
+
+
+def _prepare_features_rowwise(df):
+    """
+    Original row-wise prepare_features, kept as the reference and the
+    baseline for benchmark_features().
     """
     features = pd.DataFrame()
     
@@ -94,9 +164,33 @@ def prepare_features(df):
     return features
 
 
-def train_meta_model():
+def benchmark_features(rows=1_000_000, legacy_rows=100_000):
+    """
+    Rows/sec of the row-wise and vectorised prepare_features on the backtest
+    trades resampled to ``rows`` (the row-wise one on ``legacy_rows``).
+    """
+    import time
+    base = pd.read_csv(BACKTEST_CSV)
+    
+    def rate(fn, n, **kwargs):
+        df = base.sample(n, replace=True, random_state=42).reset_index(drop=True)
+        start = time.perf_counter()
+        fn(df, **kwargs)
+        return n / (time.perf_counter() - start)
+    
+    before = rate(_prepare_features_rowwise, legacy_rows)
+    after = rate(prepare_features, rows)
+    after32 = rate(prepare_features, rows, dtype=np.float32)
+    print(f"  prepare_features (row-wise)         {before:>14,.0f} rows/s  ({legacy_rows:,} rows)")
+    print(f"  prepare_features (vectorised)       {after:>14,.0f} rows/s  ({rows:,} rows)")
+    print(f"  prepare_features (vectorised, f32)  {after32:>14,.0f} rows/s  ({rows:,} rows)")
+    print(f"  Speed-up: {after / before:.0f}x")
+
+
+def train_meta_model(dtype=None):
     """
     Train the meta-model on backtest data.
+    dtype: feature matrix dtype (np.float32 halves memory on large sets).
     """
     if not os.path.exists(BACKTEST_CSV):
         print(f"ERROR: Backtest data not found at {BACKTEST_CSV}")
@@ -108,7 +202,7 @@ def train_meta_model():
     print(f"  Total records: {len(df)}")
     
     # Prepare features
-    X = prepare_features(df)
+    X = prepare_features(df, dtype=dtype)
     
     # Target: Did the stock hit +3% in 5 days?
     y = df['hit_target'].astype(int)
@@ -242,21 +336,46 @@ def predict_with_meta(model_data, trade_data):
     if model_data is None:
         return None
     
-    df = pd.DataFrame([trade_data])
+    return predict_with_meta_batch(model_data, [trade_data])[0]
+
+
+def predict_with_meta_batch(model_data, trades):
+    """
+    Success probabilities for many trades with one feature matrix and a
+    single predict_proba call.
+    
+    trades: list of trade_data dicts (see predict_with_meta)
+    Returns: numpy array of probabilities, one per trade
+    """
+    if model_data is None:
+        return None
+    if not trades:
+        return np.empty(0)
+    
+    df = pd.DataFrame.from_records(trades)
     X = prepare_features(df)
     
     model = model_data['model']
-    prob = model.predict_proba(X)[0][1]  # Probability of class 1 (hit target)
-    
-    return prob
+    return model.predict_proba(X)[:, 1]  # Probability of class 1 (hit target)
 
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Train the Super Agent meta-model")
+    parser.add_argument("--float32", action="store_true", help="Train on a float32 feature matrix")
+    parser.add_argument("--benchmark", type=int, metavar="ROWS",
+                        help="Only benchmark prepare_features rows/sec on ROWS resampled trades")
+    args = parser.parse_args()
+    
+    if args.benchmark:
+        benchmark_features(args.benchmark, legacy_rows=min(args.benchmark, 100_000))
+        raise SystemExit
+    
     print("\n" + "="*60)
     print("  SUPER AGENT 4.0 — META-ML MODEL TRAINER")
     print("="*60 + "\n")
     
-    model_data = train_meta_model()
+    model_data = train_meta_model(dtype=np.float32 if args.float32 else None)
     
     if model_data:
         print(f"\n  [OK] Meta-model trained successfully!")
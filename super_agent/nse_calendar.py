@@ -0,0 +1,67 @@
+"""
+Super Agent 4.0 — NSE Trading Calendar
+=======================================
+Weekends plus the exchange's published equity-segment holidays. Used by the
+incremental mode to skip non-trading days entirely.
+
+NSE publishes next year's list in December; add it to NSE_HOLIDAYS, or drop
+extra dates (one YYYY-MM-DD per line, '#' comments allowed) into
+data/nse_holidays.txt without touching the code.
+"""
+
+import os
+import datetime
+
+from run_journal import IST
+
+HOLIDAYS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "nse_holidays.txt")
+
+NSE_HOLIDAYS = frozenset(datetime.date.fromisoformat(d) for d in (
+    # 2025
+    "2025-02-26", "2025-03-14", "2025-03-31", "2025-04-10", "2025-04-14",
+    "2025-04-18", "2025-05-01", "2025-08-15", "2025-08-27", "2025-10-02",
+    "2025-10-21", "2025-10-22", "2025-11-05", "2025-12-25",
+    # 2026
+    "2026-01-26", "2026-03-03", "2026-03-26", "2026-03-31", "2026-04-03",
+    "2026-04-14", "2026-05-01", "2026-05-28", "2026-06-26", "2026-09-14",
+    "2026-10-02", "2026-10-20", "2026-11-10", "2026-11-24", "2026-12-25",
+))
+
+_HOLIDAYS = None
+
+
+def holidays():
+    global _HOLIDAYS
+    if _HOLIDAYS is None:
+        extra = set()
+        if os.path.exists(HOLIDAYS_FILE):
+            with open(HOLIDAYS_FILE) as f:
+                for line in f:
+                    line = line.split("#")[0].strip()
+                    if line:
+                        extra.add(datetime.date.fromisoformat(line))
+        _HOLIDAYS = NSE_HOLIDAYS | extra
+    return _HOLIDAYS
+
+
+def _as_date(day):
+    if day is None:
+        return datetime.datetime.now(IST).date()
+    if isinstance(day, str):
+        return datetime.date.fromisoformat(day)
+    if isinstance(day, datetime.datetime):
+        return day.date()
+    return day
+
+
+def is_trading_day(day=None):
+    day = _as_date(day)
+    return day.weekday() < 5 and day not in holidays()
+
+
+def previous_trading_day(day=None):
+    """Last trading day strictly before ``day``."""
+    day = _as_date(day) - datetime.timedelta(days=1)
+    while not is_trading_day(day):
+        day -= datetime.timedelta(days=1)
+    return day
@@ -0,0 +1,157 @@
+"""
+Super Agent 4.0 — Shared-Memory OHLCV Arena
+============================================
+The orchestrator packs the universe's canonical daily bars into one
+``multiprocessing.shared_memory`` block; pool workers attach to it instead
+of each parsing its own copy of every CSV, and no bars are pickled per task.
+The shared rows are read in place (ArenaRef.frame); each task then gets one
+private copy of just its model's trailing window (ArenaBundle.view), since
+the models add indicator columns to the frame they are given.
+
+Layout of one arena (N = total rows across all tickers):
+
+    [ dates: int64[N] (days since epoch) | bars: float64[N, 5] (O, H, L, C, V) ]
+
+plus ``offsets = {ticker: (start, stop)}`` into those arrays. Only the small
+ArenaRef (block name, N, start, stop) travels with each task.
+"""
+
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from market_data import OHLCV_COLUMNS, load_bundle, union_needs
+
+_N_COLS = len(OHLCV_COLUMNS)
+
+# Blocks this process has attached to, by name (workers reuse them across tasks)
+_ATTACHED = {}
+
+
+def _arrays(buf, n_rows):
+    dates = np.ndarray((n_rows,), dtype=np.int64, buffer=buf, offset=0)
+    bars = np.ndarray((n_rows, _N_COLS), dtype=np.float64, buffer=buf, offset=n_rows * 8)
+    return dates, bars
+
+
+class ArenaRef:
+    """Picklable pointer to one ticker's rows inside a shared block."""
+
+    def __init__(self, name, n_rows, start, stop):
+        self.name = name
+        self.n_rows = n_rows
+        self.start = start
+        self.stop = stop
+
+    def frame(self):
+        """Read-only DataFrame over the shared rows (no copy of the bars)."""
+        shm = _ATTACHED.get(self.name)
+        if shm is None:
+            shm = _ATTACHED[self.name] = shared_memory.SharedMemory(name=self.name)
+        dates, bars = _arrays(shm.buf, self.n_rows)
+        values = bars[self.start:self.stop]
+        values.flags.writeable = False
+        index = pd.DatetimeIndex(dates[self.start:self.stop].astype("datetime64[D]"), name="Date")
+        return pd.DataFrame(values, index=index, columns=OHLCV_COLUMNS, copy=False)
+
+
+class OhlcvArena:
+    """Owner side: created once per run by the orchestrator, unlinked at the end."""
+
+    def __init__(self, frames):
+        tickers = sorted(frames)
+        n_rows = sum(len(frames[t]) for t in tickers)
+        self.n_rows = n_rows
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, n_rows * 8 * (1 + _N_COLS)))
+        dates, bars = _arrays(self.shm.buf, n_rows)
+
+        self.offsets = {}
+        pos = 0
+        for t in tickers:
+            df = frames[t]
+            stop = pos + len(df)
+            dates[pos:stop] = df.index.values.astype("datetime64[D]").astype(np.int64)
+            bars[pos:stop] = df[OHLCV_COLUMNS].to_numpy(dtype=np.float64)
+            self.offsets[t] = (pos, stop)
+            pos = stop
+
+    @property
+    def nbytes(self):
+        return self.shm.size
+
+    def ref(self, ticker):
+        span = self.offsets.get(ticker)
+        if span is None:
+            return None
+        return ArenaRef(self.shm.name, self.n_rows, *span)
+
+    def close(self):
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class ArenaBundle:
+    """
+    Same interface as market_data.OhlcvBundle, but the bars live in shared
+    memory: ``view()`` resolves in whichever process calls it. Backends send
+    bundles with ``shared = True`` to the worker as-is.
+    """
+
+    shared = True
+
+    def __init__(self, ticker, refs, paths=None):
+        self.ticker = ticker
+        self.refs = refs
+        self.paths = paths or {}
+
+    def view(self, need):
+        """A private copy of the trailing window (the shared rows stay read-only)."""
+        ref = self.refs.get(need.get("adjusted", True))
+        if ref is None:
+            return None
+        from wrappers.wrapper_common import trailing_window
+        return trailing_window(ref.frame(), need["lookback"])
+
+    def path(self, need):
+        return self.paths.get(need.get("adjusted", True))
+
+
+class UniverseArenas:
+    """One arena per adjustment mode, built from the local store."""
+
+    def __init__(self, tickers, needs):
+        modes = list(union_needs(needs))
+        frames = {m: {} for m in modes}
+        self.paths = {}
+        for t in tickers:
+            bundle = load_bundle(t, needs)
+            if bundle is None:
+                continue
+            for m in modes:
+                frames[m][t] = bundle.frames[m]
+            self.paths[t] = bundle.paths
+        self.arenas = {m: OhlcvArena(frames[m]) for m in modes}
+
+    def __contains__(self, ticker):
+        return all(ticker in a.offsets for a in self.arenas.values())
+
+    def __len__(self):
+        return min((len(a.offsets) for a in self.arenas.values()), default=0)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in self.arenas.values())
+
+    def bundle(self, ticker):
+        if ticker not in self:
+            return None
+        refs = {m: a.ref(ticker) for m, a in self.arenas.items()}
+        return ArenaBundle(ticker, refs, self.paths[ticker])
+
+    def close(self):
+        for a in self.arenas.values():
+            a.close()
@@ -0,0 +1,293 @@
+"""
+Super Agent 4.0 — Wrapper Output Cache
+=======================================
+Content-addressed store of full wrapper outputs, so re-running a scan the
+same day (debug_score.py, a report tweak, a crashed run) only computes what
+actually changed. An entry's key is the SHA-1 of:
+
+- model (wrapper) name and ticker,
+- the model's bar window (last bar date + SHA-1 of the window),
+- the external inputs it declares: fundamentals (trading date), news
+  (the EOD snapshot's news ids, else the current NEWS_TTL window, so
+  news-driven entries expire with it),
+  market (SHA-1 of the run's MarketContext), intraday (the current
+  15-minute bar of the session),
+- the source hash of the model: its wrapper, the shared wrapper modules,
+  finance_sentiment.py and every .py file of its model package.
+
+Any code or data change gives a new key, so stale entries are never hit;
+they simply age out (``prune``). Errors and degraded outputs (budget.py)
+are not stored. Entries live in data/output_cache/<k[:2]>/<key>.json; a hit
+refreshes the entry's mtime, which ``prune --older-than`` goes by.
+
+    python output_cache.py stats [--runs 10]
+    python output_cache.py prune [--older-than 7d] [--max-mb 500]
+"""
+
+import os
+import glob
+import json
+import time
+import hashlib
+import argparse
+import datetime
+import threading
+import collections
+
+from wrappers import MODEL_WRAPPERS, load_plugin
+from wrappers.wrapper_common import dump_result
+from incremental import InputFingerprint
+from executors import run_batch
+from run_journal import trading_date, IST
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, "data", "output_cache")
+STATS_FILE = "stats.jsonl"
+
+WRAPPER_DIR = os.path.join(BASE_DIR, "wrappers")
+SHARED_SOURCES = [
+    os.path.join(WRAPPER_DIR, "wrapper_common.py"),
+    os.path.join(WRAPPER_DIR, "result_protocol.py"),
+    os.path.join(BASE_DIR, "finance_sentiment.py"),
+]
+
+_SOURCE_HASHES = {}
+
+
+def source_files(wrapper_name):
+    plugin = load_plugin(wrapper_name)
+    files = [os.path.join(WRAPPER_DIR, f"{wrapper_name}.py")] + SHARED_SOURCES
+    model_path = getattr(plugin, "MODEL_PATH", None)
+    if model_path:
+        files += sorted(glob.glob(os.path.join(model_path, "*.py")))
+    return files
+
+
+def source_hash(wrapper_name):
+    """SHA-1 over the code that produces this model's output (computed once per process)."""
+    if wrapper_name not in _SOURCE_HASHES:
+        h = hashlib.sha1()
+        for path in source_files(wrapper_name):
+            h.update(os.path.relpath(path, os.path.dirname(BASE_DIR)).encode())
+            with open(path, "rb") as f:
+                h.update(f.read())
+        _SOURCE_HASHES[wrapper_name] = h.hexdigest()
+    return _SOURCE_HASHES[wrapper_name]
+
+
+class OutputCache:
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["result"]
+
+    def put(self, key, wrapper_name, ticker, result):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(dump_result({"key": key, "model": wrapper_name, "ticker": ticker,
+                                 "created": time.time(), "result": result}))
+        os.replace(tmp, path)
+
+    def entries(self):
+        """(path, size, mtime) of every stored entry."""
+        out = []
+        for path in glob.glob(os.path.join(self.cache_dir, "??", "*.json")):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            out.append((path, st.st_size, st.st_mtime))
+        return out
+
+    def log_run(self, hits, misses, uncacheable):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        rec = {"ts": datetime.datetime.now(IST).isoformat(timespec="seconds"),
+               "hits": dict(hits), "misses": dict(misses), "uncacheable": dict(uncacheable)}
+        with open(os.path.join(self.cache_dir, STATS_FILE), "a") as f:
+            f.write(json.dumps(rec) + "\n")
+
+    def runs(self):
+        path = os.path.join(self.cache_dir, STATS_FILE)
+        if not os.path.exists(path):
+            return []
+        out = []
+        with open(path) as f:
+            for line in f:
+                try:
+                    out.append(json.loads(line))
+                except ValueError:
+                    continue
+        return out
+
+
+class CachedBackend:
+    """Same ``run(wrapper, ticker, bundle)`` interface as the backend it wraps."""
+
+    def __init__(self, backend, date=None, cache_dir=CACHE_DIR):
+        self.backend = backend
+        self.cache = OutputCache(cache_dir)
+        self.fingerprint = InputFingerprint(date or trading_date(), getattr(backend, "context_path", None),
+                                            daily_fundamentals=True)
+        self.hits = collections.Counter()
+        self.misses = collections.Counter()
+        self.uncacheable = collections.Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def context_path(self):
+        return getattr(self.backend, "context_path", None)
+
+    @property
+    def degrade(self):
+        return getattr(self.backend, "degrade", ())
+
+    @degrade.setter
+    def degrade(self, steps):
+        self.backend.degrade = steps
+
+    def key(self, wrapper_name, ticker, bundle):
+        parts = self.fingerprint.parts(wrapper_name, ticker, bundle, self.degrade)
+        if parts is None:
+            return None
+        parts.update(model=wrapper_name, ticker=ticker, source=source_hash(wrapper_name))
+        return hashlib.sha1(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+    def _lookup(self, wrapper_name, ticker, bundle):
+        """(key, cached result or None)."""
+        key = self.key(wrapper_name, ticker, bundle)
+        if key is None:
+            return None, None
+        result = self.cache.get(key)
+        if result is not None:
+            with self._lock:
+                self.hits[wrapper_name] += 1
+        return key, result
+
+    def _store(self, key, wrapper_name, ticker, result):
+        with self._lock:
+            (self.misses if key is not None else self.uncacheable)[wrapper_name] += 1
+        if key is not None and "error" not in result and "degraded" not in result:
+            try:
+                self.cache.put(key, wrapper_name, ticker, result)
+            except OSError as e:
+                print(f"[Cache] Could not store {wrapper_name}/{ticker}: {e}")
+        return result
+
+    def run(self, wrapper_name, ticker, bundle=None):
+        key, result = self._lookup(wrapper_name, ticker, bundle)
+        if result is not None:
+            return result
+        return self._store(key, wrapper_name, ticker, self.backend.run(wrapper_name, ticker, bundle))
+
+    def run_batch(self, wrapper_name, tickers, bundles):
+        """Cached tickers come back at once; the rest go to the wrapped backend as one batch."""
+        keys = {}
+        for ticker in tickers:
+            key, result = self._lookup(wrapper_name, ticker, bundles.get(ticker))
+            if result is not None:
+                yield ticker, result
+            else:
+                keys[ticker] = key
+        if keys:
+            for ticker, result in run_batch(self.backend, wrapper_name, list(keys), bundles):
+                yield ticker, self._store(keys[ticker], wrapper_name, ticker, result)
+
+    def close(self):
+        self.backend.close()
+        hits, misses = sum(self.hits.values()), sum(self.misses.values())
+        total = hits + misses + sum(self.uncacheable.values())
+        if total:
+            self.cache.log_run(self.hits, self.misses, self.uncacheable)
+            print(f"[Cache] {hits}/{total} model runs from cache "
+                  f"({sum(self.uncacheable.values())} uncacheable: inputs unknown)")
+
+
+# --- CLI ---
+
+def _format_mb(nbytes):
+    return f"{nbytes / 1e6:.1f} MB"
+
+
+def stats(cache, runs=10):
+    entries = cache.entries()
+    print(f"[Cache] {len(entries)} entries, {_format_mb(sum(e[1] for e in entries))} in {cache.cache_dir}")
+    if entries:
+        oldest = min(e[2] for e in entries)
+        print(f"[Cache] Least recently used entry: {(time.time() - oldest) / 86400:.1f} days ago")
+    history = cache.runs()[-runs:]
+    if not history:
+        print("[Cache] No runs recorded yet")
+        return
+    print(f"[Cache] Last {len(history)} runs:")
+    for rec in history:
+        hits, misses, unc = rec["hits"], rec["misses"], rec["uncacheable"]
+        total = sum(hits.values()) + sum(misses.values()) + sum(unc.values())
+        per_model = " | ".join(
+            f"{w} {hits.get(w, 0)}/{hits.get(w, 0) + misses.get(w, 0) + unc.get(w, 0)}"
+            for w in MODEL_WRAPPERS.values())
+        rate = 100.0 * sum(hits.values()) / total if total else 0.0
+        print(f"  {rec['ts']}  hit rate {rate:5.1f}%  ({per_model})")
+
+
+def prune(cache, older_than=None, max_mb=None):
+    """Drop entries unused for ``older_than`` seconds, then the least recently used beyond ``max_mb``."""
+    entries = sorted(cache.entries(), key=lambda e: e[2])
+    now = time.time()
+    removed, freed = 0, 0
+    keep = []
+    for path, size, mtime in entries:
+        if older_than is not None and now - mtime > older_than:
+            os.remove(path)
+            removed, freed = removed + 1, freed + size
+        else:
+            keep.append((path, size, mtime))
+    if max_mb is not None:
+        total = sum(e[1] for e in keep)
+        for path, size, _ in keep:
+            if total <= max_mb * 1e6:
+                break
+            os.remove(path)
+            total -= size
+            removed, freed = removed + 1, freed + size
+    print(f"[Cache] Pruned {removed} entries ({_format_mb(freed)})")
+    return removed
+
+
+def main():
+    from budget import parse_duration
+    parser = argparse.ArgumentParser(description="Super Agent wrapper output cache")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_stats = sub.add_parser("stats", help="Entry count, size and hit rate of recent runs")
+    p_stats.add_argument("--runs", type=int, default=10)
+    p_prune = sub.add_parser("prune", help="Delete old entries")
+    p_prune.add_argument("--older-than", type=parse_duration, default=parse_duration("7d"),
+                         help="Drop entries not used for this long (e.g. 7d, 36h)")
+    p_prune.add_argument("--max-mb", type=float, help="Then drop least recently used entries beyond this size")
+    args = parser.parse_args()
+
+    cache = OutputCache(args.cache_dir)
+    if args.command == "stats":
+        stats(cache, args.runs)
+    else:
+        prune(cache, args.older_than, args.max_mb)
+
+
+if __name__ == "__main__":
+    main()
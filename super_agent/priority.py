@@ -0,0 +1,128 @@
+"""
+Super Agent 4.0 — Scan Priority
+================================
+Orders the universe so the names traders look at first are scanned first
+(the scheduler dispatches tickers in list order):
+
+1. holdings (data/holdings.txt),
+2. tickers with an actionable (BUY / SELL) signal in the previous session's
+   journal, strongest |super score| first,
+3. everything else by liquidity: median traded value (Close x Volume) over
+   the last LIQUIDITY_BARS local daily bars, highest first.
+
+Ties and tickers without local bars keep their NIFTY 500 list order.
+"""
+
+import time
+
+LIQUIDITY_BARS = 20
+LIQUIDITY_NEED = {"lookback": "3mo", "adjusted": True}
+
+TIER_HOLDING, TIER_PRIOR_SIGNAL, TIER_REST = 0, 1, 2
+TIER_NAMES = {TIER_HOLDING: "held", TIER_PRIOR_SIGNAL: "prior signal", TIER_REST: "by liquidity"}
+
+# Scan order as the partial reports' progress banner describes it
+ORDER_PRIORITY = "holdings and prior-day signals first"
+ORDER_LIST = "in NIFTY 500 list order"
+
+
+def prior_signals(pairs):
+    """ticker -> strongest |super score| among last session's BUY / SELL calls (swing or intraday)."""
+    strength = {}
+    for pair in pairs:
+        for res in pair:
+            signal = res.get("final_signal", "")
+            if "BUY" in signal or "SELL" in signal:
+                t = res["ticker"]
+                strength[t] = max(strength.get(t, 0.0), abs(res.get("super_score") or 0.0))
+    return strength
+
+
+def traded_value(bundle):
+    """Median Close x Volume over the last LIQUIDITY_BARS bars (None without bars)."""
+    frame = bundle.view(LIQUIDITY_NEED) if bundle is not None else None
+    if frame is None or frame.empty:
+        return None
+    tail = frame.iloc[-LIQUIDITY_BARS:]
+    value = (tail["Close"] * tail["Volume"]).median()
+    return None if value != value else float(value)   # NaN -> None
+
+
+def liquidity(tickers, bundle_loader):
+    """ticker -> traded value, for tickers with local bars."""
+    out = {}
+    for ticker in tickers:
+        value = traded_value(bundle_loader(ticker))
+        if value is not None:
+            out[ticker] = value
+    return out
+
+
+def priority_order(tickers, holdings=(), prior=None, liquidity=None):
+    """
+    Returns (ordered tickers, {tier: count}).
+    prior: ticker -> signal strength (see prior_signals); liquidity: ticker -> traded value.
+    """
+    prior = prior or {}
+    liquidity = liquidity or {}
+    holdings = set(holdings)
+    index = {t: i for i, t in enumerate(tickers)}
+
+    def tier(t):
+        if t in holdings:
+            return TIER_HOLDING
+        if t in prior:
+            return TIER_PRIOR_SIGNAL
+        return TIER_REST
+
+    def key(t):
+        k = tier(t)
+        if k == TIER_PRIOR_SIGNAL:
+            return (k, -prior[t], index[t])
+        if k == TIER_REST:
+            # Tickers with no bars go after every ranked one
+            return (k, -liquidity.get(t, -1.0), index[t])
+        return (k, 0, index[t])
+
+    ordered = sorted(tickers, key=key)
+    counts = {k: 0 for k in TIER_NAMES}
+    for t in ordered:
+        counts[tier(t)] += 1
+    return ordered, counts
+
+
+def describe(counts):
+    return ", ".join(f"{counts[k]} {TIER_NAMES[k]}" for k in sorted(TIER_NAMES))
+
+
+class ProgressiveReport:
+    """Re-renders the reports every ``every`` finished tickers while the scan runs."""
+
+    def __init__(self, render, total, every, done=0, order=None):
+        self.render = render      # render(progress) writes both reports
+        self.total = total
+        self.every = every
+        self.done = done          # tickers already finished (e.g. resumed from the journal)
+        self.order = order        # ORDER_PRIORITY / ORDER_LIST, shown in the banner
+        self.ticks = 0
+        self.started = time.time()
+
+    def progress(self):
+        return {"done": self.done, "total": self.total, "started": self.started, "order": self.order}
+
+    def tick(self):
+        self.done += 1
+        self.ticks += 1
+        if self.every and self.ticks % self.every == 0 and self.done < self.total:
+            self.flush()
+
+    def flush(self):
+        """Write the partial reports now."""
+        start = time.perf_counter()
+        try:
+            self.render(self.progress())
+        except Exception as e:
+            print(f"\n[Progress] Partial report failed: {e}")
+            return
+        print(f"\n[Progress] Reports updated at {self.done}/{self.total} tickers "
+              f"({(time.perf_counter() - start) * 1000:.0f} ms)")
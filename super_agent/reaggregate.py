@@ -0,0 +1,151 @@
+"""
+Super Agent 4.0 — Re-aggregation and Shadow Variants
+=====================================================
+The run journal keeps every model's raw output for every ticker, so
+changing how they are combined never needs a new scan. This replays a
+stored run through the aggregation (super scores, supreme tier, meta-model
+confidence) and rewrites both reports in seconds:
+
+    python reaggregate.py                          # today's run, baseline params
+    python reaggregate.py --date 2026-10-16 --variant strict_cutoffs --primary strict_cutoffs
+    python reaggregate.py --list                   # stored runs, incl. archived ones
+    python reaggregate.py --journal data/journal/2026-10-16.jsonl.093012.bak
+
+Shadow mode: every ``--variant`` (named in VARIANTS or a ``--variants-file``
+JSON of name -> DEFAULT_PARAMS overrides) is scored on the same outputs and
+compared side by side with the primary one: signal counts per mode, supreme
+names and the tickers whose call would change. Only the primary variant's
+reports replace the live ones; ``--shadow-reports`` writes the others to
+data/shadow/<variant>/.
+"""
+
+import os
+import json
+import time
+import argparse
+import collections
+
+from aggregation import MODELS, MODES
+from run_journal import RunJournal, JOURNAL_DIR
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SHADOW_DIR = os.path.join(BASE_DIR, "data", "shadow")
+
+# name -> DEFAULT_PARAMS overrides
+VARIANTS = {
+    "baseline": {},
+    "loose_adx": {"adx_veto": 15, "adx_penalty": 20},
+    "strict_cutoffs": {"strong_buy": 0.6, "buy": 0.25, "strong_sell": -0.6, "sell": -0.25},
+    "fast_weights": {"model_weights": {name: [0.7, 0.2, 0.1] for name in MODELS}},
+}
+
+SIGNAL_ORDER = ("STRONG BUY", "BUY", "WAIT", "SELL", "STRONG SELL")
+EXAMPLES = 5     # flipped tickers listed per variant and mode
+
+
+def load_variants(names, variants_file=None):
+    table = dict(VARIANTS)
+    if variants_file:
+        with open(variants_file) as f:
+            table.update(json.load(f))
+    unknown = [n for n in names if n not in table]
+    if unknown:
+        raise SystemExit(f"Unknown variant(s): {', '.join(unknown)} (known: {', '.join(table)})")
+    return {n: table[n] for n in names}
+
+
+def list_runs(journal_dir=JOURNAL_DIR):
+    if not os.path.isdir(journal_dir):
+        print(f"[Journal] No runs in {journal_dir}")
+        return
+    for name in sorted(f for f in os.listdir(journal_dir) if f.endswith(".jsonl")):
+        journal = RunJournal(name[:-len(".jsonl")], journal_dir)
+        for path in journal.archived() + [journal.path]:
+            done = RunJournal(journal.date, path=path).load()
+            print(f"  {journal.date}  {len(done):>4} tickers  {os.path.relpath(path, BASE_DIR)}")
+
+
+def base_signal(res):
+    """'[SUPREME] STRONG BUY' -> 'STRONG BUY' (WAIT for anything that is not a call)."""
+    signal = res.get("final_signal", "").replace("[SUPREME]", "").strip()
+    return signal if signal in SIGNAL_ORDER else "WAIT"
+
+
+def summarize(pairs):
+    """mode -> {"counts": Counter, "supreme": n, "signals": ticker -> signal}."""
+    out = {}
+    for k, mode in enumerate(MODES):
+        rows = [pair[k] for pair in pairs]
+        signals = {res["ticker"]: base_signal(res) for res in rows}
+        out[mode] = {"counts": collections.Counter(signals.values()),
+                     "supreme": sum(1 for res in rows if res.get("is_supreme")),
+                     "signals": signals}
+    return out
+
+
+def compare(summaries, primary):
+    print(f"\n[Shadow] {len(summaries)} variant(s) vs primary '{primary}'")
+    header = f"  {'variant':<16} {'mode':<9}" + "".join(f"{s:>12}" for s in SIGNAL_ORDER) + f"{'supreme':>9}{'flips':>7}"
+    print(header)
+    base = summaries[primary]
+    for name, summary in summaries.items():
+        for mode in MODES:
+            s = summary[mode]
+            flips = [t for t, sig in s["signals"].items() if base[mode]["signals"].get(t) != sig]
+            counts = "".join(f"{s['counts'].get(sig, 0):>12}" for sig in SIGNAL_ORDER)
+            print(f"  {name:<16} {mode:<9}{counts}{s['supreme']:>9}{len(flips):>7}")
+            if flips and name != primary:
+                shown = ", ".join(f"{t} {base[mode]['signals'].get(t, '-')}->{s['signals'][t]}"
+                                  for t in flips[:EXAMPLES])
+                more = f" (+{len(flips) - EXAMPLES} more)" if len(flips) > EXAMPLES else ""
+                print(f"      {shown}{more}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score a stored run without re-running the models")
+    parser.add_argument("--date", help="Trading date of the journal (YYYY-MM-DD, default today IST)")
+    parser.add_argument("--journal", help="Journal file to replay instead (e.g. an archived .bak run)")
+    parser.add_argument("--list", action="store_true", help="List stored runs and exit")
+    parser.add_argument("--variant", action="append", default=[],
+                        help=f"Aggregation variant to evaluate, repeatable ({', '.join(VARIANTS)})")
+    parser.add_argument("--variants-file", help="JSON of variant name -> aggregation param overrides")
+    parser.add_argument("--primary", default="baseline", help="Variant whose reports replace the live ones")
+    parser.add_argument("--shadow-reports", action="store_true",
+                        help="Also write each other variant's reports to data/shadow/<variant>/")
+    parser.add_argument("--output-dir", default=BASE_DIR, help="Where the primary reports go")
+    args = parser.parse_args()
+
+    if args.list:
+        list_runs()
+        return
+
+    names = [args.primary] + [n for n in args.variant if n != args.primary]
+    variants = load_variants(names, args.variants_file)
+
+    from main import split_journal, report_pairs, write_reports
+    journal = RunJournal(args.date, path=args.journal)
+    done = journal.load()
+    if not done:
+        raise SystemExit(f"[Journal] Nothing to replay in {journal.path}")
+    raw_results, pruned = split_journal(done)
+    print(f"[Journal] {len(done)} tickers in {journal.path}")
+
+    summaries = {}
+    for name, params in variants.items():
+        start = time.perf_counter()
+        pairs = report_pairs(raw_results, pruned, params)
+        summaries[name] = summarize(pairs)
+        if name == args.primary:
+            write_reports(raw_results, pruned, args.output_dir, pairs=pairs)
+        elif args.shadow_reports:
+            out_dir = os.path.join(SHADOW_DIR, name)
+            os.makedirs(out_dir, exist_ok=True)
+            write_reports(raw_results, pruned, out_dir, pairs=pairs)
+        print(f"[Aggregate] {name}: {len(pairs)} tickers in {time.perf_counter() - start:.2f}s")
+
+    if len(summaries) > 1:
+        compare(summaries, args.primary)
+
+
+if __name__ == "__main__":
+    main()
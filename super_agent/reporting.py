@@ -1,19 +1,56 @@
 import os
+import time
 import datetime
 
-def generate_dual_reports(swing_results, intraday_results, output_dir):
+PARTIAL_REFRESH_SECONDS = 60
+
+def generate_dual_reports(swing_results, intraday_results, output_dir, progress=None):
     """
     Generates two separate HTML reports: Swing and Intraday.
+    progress: {"done", "total", "started"} while the scan is still running;
+    the reports then carry a progress banner and reload themselves.
     """
     swing_path = os.path.join(output_dir, "super_agent_swing.html")
     intraday_path = os.path.join(output_dir, "super_agent_intraday.html")
     
-    _generate_single_report(swing_results, swing_path, "Swing Trading")
-    _generate_single_report(intraday_results, intraday_path, "Intraday Trading")
+    _generate_single_report(swing_results, swing_path, "Swing Trading", progress)
+    _generate_single_report(intraday_results, intraday_path, "Intraday Trading", progress)
     
     return swing_path, intraday_path
 
-def _generate_single_report(results, output_file, report_type):
+def _progress_banner(progress):
+    if not progress:
+        return "", ""
+    done, total = progress["done"], progress["total"]
+    pct = 100.0 * done / total if total else 100.0
+    elapsed = time.time() - progress["started"]
+    eta = ""
+    if 0 < done < total:
+        eta = f" &middot; ~{elapsed / done * (total - done) / 60:.0f} min left"
+    order = f" &middot; {progress['order']}" if progress.get("order") else ""
+    banner = f"""
+            <div class="progress-banner">
+                SCAN IN PROGRESS &middot; {done}/{total} tickers ({pct:.0f}%){eta}{order}
+                <div class="progress-bar"><div style="width: {pct:.1f}%;"></div></div>
+            </div>"""
+    refresh = f'<meta http-equiv="refresh" content="{PARTIAL_REFRESH_SECONDS}">'
+    return banner, refresh
+
+def _quality_banner(results):
+    degraded = [r for r in results if r.get('degraded')]
+    if not degraded:
+        return ""
+    steps = sorted({d for r in degraded for d in r['degraded']})
+    return f"""
+            <div class="progress-banner">
+                REDUCED QUALITY &middot; {len(degraded)}/{len(results)} tickers computed under the time budget
+                without: {", ".join(d.replace("_", " ") for d in steps)}
+            </div>"""
+
+def _generate_single_report(results, output_file, report_type, progress=None):
+    banner, refresh = _progress_banner(progress)
+    banner += _quality_banner(results)
+    
     # Sort results by Super Score (descending)
     sorted_results = sorted(results, key=lambda x: x['super_score'], reverse=True)
     
@@ -100,9 +137,16 @@ def _generate_single_report(results, output_file, report_type):
         elif "BUY" in apex_sig: apex_style = "color: #28a745; font-weight: bold;"
         elif "SELL" in apex_sig: apex_style = "color: #dc3545; font-weight: bold;"
         
+        # Quality marker: steps cut under the time budget (see budget.py)
+        degraded = res.get('degraded') or []
+        quality_html = ""
+        if degraded:
+            cut = ", ".join(d.replace("_", " ") for d in degraded)
+            quality_html = f'<div class="quality-tag" title="Computed without: {cut}">REDUCED ({len(degraded)})</div>'
+        
         table_rows += f"""
         <tr class="{row_class}">
-            <td class="ticker">{ticker}</td>
+            <td class="ticker">{ticker}{quality_html}</td>
             <td class="signal" style="color: {signal_color}; font-weight: bold;">{signal}</td>
             <td class="score">{score:.2f}</td>
             <td style="text-align: center; min-width: 80px;">{ml_html}</td>
@@ -129,6 +173,7 @@ def _generate_single_report(results, output_file, report_type):
     <head>
         <meta charset="UTF-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        {refresh}
         <title>Super Agent Alpha - {report_type}</title>
         <style>
             body {{
@@ -158,6 +203,29 @@ def _generate_single_report(results, output_file, report_type):
                 font-size: 1.2em;
                 font-weight: 300;
             }}
+            .progress-banner {{
+                text-align: center;
+                margin: 0 auto 20px;
+                padding: 10px 15px;
+                border: 1px solid #ffc107;
+                border-radius: 8px;
+                color: #ffc107;
+                font-size: 0.9em;
+            }}
+            .progress-bar {{
+                height: 4px;
+                margin-top: 8px;
+                background-color: #333;
+            }}
+            .progress-bar div {{
+                height: 100%;
+                background-color: #ffc107;
+            }}
+            .quality-tag {{
+                font-size: 0.7em;
+                color: #ff8c00;
+                font-weight: normal;
+            }}
             .report-tag {{
                 display: inline-block;
                 padding: 5px 15px;
@@ -227,6 +295,7 @@ def _generate_single_report(results, output_file, report_type):
             <div style="text-align:center;">
                 <span class="report-tag">{report_type.upper()} REPORT</span>
             </div>
+            {banner}
             
             <table>
                 <thead>
@@ -253,5 +322,8 @@ def _generate_single_report(results, output_file, report_type):
     </html>
     """
     
-    with open(output_file, "w", encoding="utf-8") as f:
+    # Replace atomically: the report may be open in a browser mid-scan
+    tmp = output_file + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
         f.write(html_content)
+    os.replace(tmp, output_file)
@@ -0,0 +1,103 @@
+"""
+Super Agent 4.0 — Run Journal
+==============================
+Append-only JSONL record of every ticker finished in a scan, one file per
+trading date. Each line holds the raw per-model wrapper outputs and is
+flushed and fsync'd as the ticker completes, so a run that dies at ticker 380
+keeps the first 379:
+
+    {"ticker": "TCS.NS", "results": {"Apex Logic": {...}, ...}, "ts": "..."}
+
+Scores are not journaled: they are recomputed for the whole universe at the
+end of a run. ``main.py --resume`` skips tickers already journaled for the
+same date, and ``main.py --report-only`` re-aggregates the journal alone.
+A torn last line (crash mid-write) is ignored on load. Earlier runs of the
+same date are archived next to it, so ``reaggregate.py`` can replay any run.
+"""
+
+import os
+import json
+import datetime
+
+from wrappers.wrapper_common import dump_result
+
+JOURNAL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "journal")
+
+IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
+
+
+def trading_date(now=None):
+    """The session a run belongs to (IST calendar date)."""
+    now = now or datetime.datetime.now(IST)
+    return now.astimezone(IST).date().isoformat()
+
+
+class RunJournal:
+    def __init__(self, date=None, journal_dir=JOURNAL_DIR, path=None):
+        self.date = date or trading_date()
+        # ``path``: read an archived run (see reset) instead of the date's journal
+        self.path = path or os.path.join(journal_dir, f"{self.date}.jsonl")
+        self._fh = None
+
+    def load(self):
+        """ticker -> latest journal record for this date."""
+        records = {}
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn write from a crash
+                if "ticker" in rec and "results" in rec:
+                    records[rec["ticker"]] = rec
+        return records
+
+    def previous(self):
+        """Journal of the latest earlier date on disk (None if there is none)."""
+        folder = os.path.dirname(self.path)
+        if not os.path.isdir(folder):
+            return None
+        dates = sorted(name[:-len(".jsonl")] for name in os.listdir(folder)
+                       if name.endswith(".jsonl") and name[:-len(".jsonl")] < self.date)
+        return RunJournal(dates[-1], folder) if dates else None
+
+    def reset(self):
+        """Start a fresh journal; a previous run of the same date is archived as <date>.jsonl.<HHMMSS>.bak."""
+        if os.path.exists(self.path):
+            stamp = datetime.datetime.fromtimestamp(os.path.getmtime(self.path), IST).strftime("%H%M%S")
+            os.replace(self.path, f"{self.path}.{stamp}.bak")
+
+    def archived(self):
+        """Paths of earlier runs of this date, oldest first."""
+        folder, name = os.path.split(self.path)
+        if not os.path.isdir(folder):
+            return []
+        return sorted(os.path.join(folder, f) for f in os.listdir(folder)
+                      if f.startswith(name + ".") and f.endswith(".bak"))
+
+    def append(self, ticker, results, **extra):
+        if self._fh is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._fh = open(self.path, "a")
+            # Don't glue the first new record onto a torn line left by a crash
+            if self._fh.tell() > 0:
+                with open(self.path, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        self._fh.write("\n")
+        rec = {
+            "ticker": ticker,
+            "results": results,
+            "ts": datetime.datetime.now(IST).isoformat(timespec="seconds"),
+        }
+        rec.update(extra)
+        self._fh.write(dump_result(rec) + "\n")
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
@@ -0,0 +1,393 @@
+"""
+Super Agent 4.0 — Cross-Ticker Scan Scheduler
+==============================================
+Keeps up to ``max_in_flight`` (model, ticker) tasks running across the whole
+universe instead of four at a time per ticker. Each model also has its own
+concurrency cap (HFM trains XGBoost per ticker and is far heavier than Apex).
+
+Tasks are dispatched ticker-major: among the models with a free slot, the one
+whose next pending ticker is earliest in the list goes first, so tickers
+complete roughly in order and can be aggregated as soon as all four land.
+
+With a ``bundle_loader`` (market_data.fetch_bundle), each ticker's OHLCV is
+fetched once on a small I/O pool, a bounded distance ahead of the model
+tasks, and the same bundle is handed to all four models.
+
+Every (model, ticker) task has a deadline (``task_timeout``, counted from its
+first launch): past it, the model's entry becomes a timeout error and the
+ticker is aggregated with the models that did answer. Once a model has
+HEDGE_MIN_SAMPLES completed runs, a task running longer than that model's
+p95 latency is re-launched once (a hedge) if the model has a free slot; the
+first good answer wins and the losing duplicate is cancelled (abandoned if
+it already started). Per-model latency percentiles are kept in
+``scheduler.latency``, along with each ticker's model time (``cost``: every
+run's seconds, a batch ticker's time since the previous one landed), which
+sharding.py balances shards by.
+
+With an ``early_exit`` check (aggregation.early_exit), each partial set of
+results is offered to it; once it returns a reason, the ticker's models not
+yet dispatched are dropped, any still running are abandoned, and each shows
+up in the results as ``{"error": ..., "short_circuit": reason}``.
+
+A model with a batch size above 1 (``model_batch``) takes up to that many
+consecutive tickers with fetched bars per task (executors.run_batch), so its
+wrapper's setup is paid once per batch. Each ticker of a batch is settled as
+its result streams in, with a deadline of ``task_timeout`` per ticker ahead
+of it in the batch; batch tasks are not hedged, and their latency samples are
+the batch's time per ticker.
+"""
+
+import time
+import queue
+import bisect
+import itertools
+import collections
+import concurrent.futures
+
+from wrappers import MODEL_WRAPPERS
+from executors import run_batch
+from startup import STARTUP
+
+DEFAULT_MAX_IN_FLIGHT = 8
+FETCH_WORKERS = 4
+
+# Deadlines and hedging
+DEFAULT_TASK_TIMEOUT = 180      # seconds, matches executors.REQUEST_TIMEOUT
+HEDGE_PERCENTILE = 95
+HEDGE_MIN_SAMPLES = 20          # completed runs of a model before its tasks are hedged
+POLL_INTERVAL = 0.25            # seconds between deadline / straggler checks
+
+# Per-wrapper concurrency caps
+DEFAULT_MODEL_LIMITS = {
+    "apex_wrapper": 4,
+    "quant_wrapper": 4,
+    "stock_ai_wrapper": 3,
+    "hfm_wrapper": 2,
+}
+
+
+# Tickers per task (1: one task per ticker). Apex computes a batch's indicators
+# in one vectorised pass; the subprocess backend batches every model (one
+# interpreter per batch instead of per ticker)
+DEFAULT_MODEL_BATCH = {
+    "apex_wrapper": 8,
+    "quant_wrapper": 1,
+    "stock_ai_wrapper": 1,
+    "hfm_wrapper": 1,
+}
+SUBPROCESS_BATCH = 8
+
+
+def _parse_overrides(specs, defaults, flag):
+    values = dict(defaults)
+    for spec in specs or []:
+        name, _, value = spec.partition("=")
+        if name not in values or not value.isdigit() or int(value) < 1:
+            raise ValueError(f"Bad {flag} '{spec}' (expected e.g. hfm_wrapper=2)")
+        values[name] = int(value)
+    return values
+
+
+def parse_model_limits(specs):
+    """Parse ``["hfm_wrapper=2", ...]`` CLI overrides on top of the defaults."""
+    return _parse_overrides(specs, DEFAULT_MODEL_LIMITS, "--model-limit")
+
+
+def parse_model_batch(specs, backend=None):
+    """Parse ``["quant_wrapper=4", ...]`` CLI overrides on top of the backend's defaults."""
+    defaults = DEFAULT_MODEL_BATCH
+    if backend == "subprocess":
+        defaults = {name: max(size, SUBPROCESS_BATCH) for name, size in defaults.items()}
+    return _parse_overrides(specs, defaults, "--model-batch")
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class LatencyTracker:
+    """Per-model run latencies, timeouts and hedge outcomes."""
+
+    def __init__(self):
+        self.samples = collections.defaultdict(list)   # wrapper -> sorted seconds
+        self.timeouts = collections.Counter()
+        self.hedged = collections.Counter()
+        self.hedge_wins = collections.Counter()
+        self.cost = collections.Counter()               # ticker -> model seconds spent on it
+
+    def charge(self, ticker, seconds):
+        self.cost[ticker] += seconds
+
+    def record(self, wrapper, seconds, result):
+        if result.get("timed_out"):
+            self.timeouts[wrapper] += 1
+        elif "error" not in result:
+            bisect.insort(self.samples[wrapper], seconds)
+
+    def straggler_after(self, wrapper):
+        """Seconds after which a run of this model is hedged (None until enough samples)."""
+        values = self.samples[wrapper]
+        if len(values) < HEDGE_MIN_SAMPLES:
+            return None
+        return percentile(values, HEDGE_PERCENTILE)
+
+    def report(self):
+        for wrapper in MODEL_WRAPPERS.values():
+            values = self.samples[wrapper]
+            if not values and not self.timeouts[wrapper]:
+                continue
+            stats = " | ".join(f"p{q} {percentile(values, q):.2f}s" for q in (50, 95, 99)) if values else "no answers"
+            print(f"[Latency] {wrapper:<17} n={len(values):<4} {stats} | max {max(values, default=0):.2f}s | "
+                  f"timeouts {self.timeouts[wrapper]} | hedged {self.hedged[wrapper]} (won {self.hedge_wins[wrapper]})")
+
+
+class ScanScheduler:
+    def __init__(self, backend, max_in_flight=DEFAULT_MAX_IN_FLIGHT, model_limits=None, bundle_loader=None,
+                 early_exit=None, task_timeout=DEFAULT_TASK_TIMEOUT, hedge=True, model_batch=None):
+        self.backend = backend
+        self.max_in_flight = max(1, max_in_flight)
+        self.model_limits = dict(model_limits or DEFAULT_MODEL_LIMITS)
+        self.model_batch = dict(model_batch or {})
+        self.bundle_loader = bundle_loader
+        self.early_exit = early_exit
+        self.short_circuited = collections.Counter()   # wrapper -> model runs skipped
+        self.task_timeout = task_timeout
+        self.hedge = hedge
+        # Duplicates run on top of max_in_flight, within each model's own cap
+        self.max_hedges = max(1, self.max_in_flight // 4) if hedge else 0
+        self.latency = LatencyTracker()
+        # Tickers fetched but not yet finished; bounds memory held in bundles
+        self.fetch_ahead = 2 * max(self.max_in_flight, *self.model_batch.values(), 1)
+
+    def _stream(self, batch_id, wrapper, tickers, bundles, sink):
+        """Batch task: puts ``(batch_id, wrapper, ticker, result)`` into ``sink`` as each ticker lands."""
+        for ticker, result in run_batch(self.backend, wrapper, tickers, bundles):
+            sink.put((batch_id, wrapper, ticker, result))
+
+    def scan(self, tickers):
+        """
+        Run every model on every ticker.
+        Yields ``(ticker, results)`` as soon as a ticker's four results are in,
+        where results maps model display name -> wrapper result dict.
+        """
+        order = {t: i for i, t in enumerate(tickers)}
+        model_names = {w: m for m, w in MODEL_WRAPPERS.items()}
+        pending = {w: collections.deque(tickers) for w in MODEL_WRAPPERS.values()}
+        running = collections.Counter()
+        partial = collections.defaultdict(dict)
+        in_flight = {}      # future -> (wrapper, ticker)
+        started = {}        # future -> launch time
+        attempts = {}       # (wrapper, ticker) -> live futures (primary, hedge)
+        deadlines = {}      # (wrapper, ticker) -> time its entry becomes a timeout error
+        hedges = set()      # futures that are duplicates
+        hedged = set()      # (wrapper, ticker) already given its one duplicate
+        abandoned = set()   # running tasks whose entry is already settled
+        batches = {}        # batch future -> (batch id, tickers)
+        batch_results = collections.defaultdict(list)   # batch id -> results streamed so far
+        batch_clock = {}    # batch id -> time its last ticker landed
+        streamed = queue.SimpleQueue()
+        batch_ids = itertools.count()
+        bundles = {}        # ticker -> OhlcvBundle (or None) once fetched
+        fetching = {}       # future -> ticker
+        to_fetch = collections.deque(tickers)
+
+        if self.bundle_loader is None:
+            bundles = dict.fromkeys(tickers)
+            to_fetch.clear()
+
+        def next_task():
+            best = None
+            for wrapper, queue in pending.items():
+                if not queue or running[wrapper] >= self.model_limits.get(wrapper, 1):
+                    continue
+                if queue[0] not in bundles:
+                    continue
+                if best is None or order[queue[0]] < order[pending[best][0]]:
+                    best = wrapper
+            return best
+
+        def launch(wrapper, ticker, hedge=False):
+            running[wrapper] += 1
+            future = executor.submit(self.backend.run, wrapper, ticker, bundles[ticker])
+            in_flight[future] = (wrapper, ticker)
+            started[future] = time.monotonic()
+            attempts.setdefault((wrapper, ticker), []).append(future)
+            if hedge:
+                hedges.add(future)
+                self.latency.hedged[wrapper] += 1
+            return future
+
+        def launch_batch(wrapper, batch):
+            running[wrapper] += 1
+            now = time.monotonic()
+            batch_id = next(batch_ids)
+            future = executor.submit(self._stream, batch_id, wrapper, batch,
+                                     {t: bundles[t] for t in batch}, streamed)
+            in_flight[future] = (wrapper, None)
+            started[future] = now
+            batches[future] = (batch_id, batch)
+            batch_clock[batch_id] = now
+            for k, ticker in enumerate(batch):
+                attempts.setdefault((wrapper, ticker), []).append(future)
+                if self.task_timeout:
+                    deadlines[(wrapper, ticker)] = now + self.task_timeout * (k + 1)
+
+        def abandon(future):
+            future.cancel()   # only stops tasks that have not started
+            abandoned.add(future)
+
+        def drop(key):
+            """Stop every attempt at one (wrapper, ticker) entry."""
+            for future in attempts.pop(key, []):
+                if future not in batches:   # a batch carries on with its other tickers
+                    abandon(future)
+
+        def settle(wrapper, ticker, result):
+            """Fix one model's entry for a ticker; any other attempt at it loses."""
+            drop((wrapper, ticker))
+            deadlines.pop((wrapper, ticker), None)
+            partial[ticker][model_names[wrapper]] = result
+
+            if self.early_exit is not None and len(partial[ticker]) < len(MODEL_WRAPPERS):
+                remaining = [m for m in MODEL_WRAPPERS if m not in partial[ticker]]
+                reason = self.early_exit(partial[ticker], remaining)
+                if reason:
+                    for m in remaining:
+                        w = MODEL_WRAPPERS[m]
+                        if ticker in pending[w]:
+                            pending[w].remove(ticker)
+                        drop((w, ticker))
+                        deadlines.pop((w, ticker), None)
+                        self.short_circuited[w] += 1
+                        partial[ticker][m] = {"error": f"Short-circuited: {reason}", "short_circuit": reason}
+
+            if len(partial[ticker]) == len(MODEL_WRAPPERS):
+                results = partial.pop(ticker)
+                bundles.pop(ticker, None)
+                # Keep the report's model order stable
+                return ticker, {m: results[m] for m in MODEL_WRAPPERS}
+            return None
+
+        batched = any(size > 1 for size in self.model_batch.values())
+        poll = POLL_INTERVAL if (self.hedge or self.task_timeout or batched) else None
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_in_flight + self.max_hedges) as executor, \
+                concurrent.futures.ThreadPoolExecutor(max_workers=FETCH_WORKERS) as fetcher:
+            while in_flight or fetching or any(pending.values()):
+                while to_fetch and len(fetching) + len(bundles) < self.fetch_ahead:
+                    ticker = to_fetch.popleft()
+                    fetching[fetcher.submit(self.bundle_loader, ticker)] = ticker
+
+                while len(in_flight) < self.max_in_flight:
+                    wrapper = next_task()
+                    if wrapper is None:
+                        break
+                    size = self.model_batch.get(wrapper, 1)
+                    if size > 1:
+                        waiting = pending[wrapper]
+                        batch = []
+                        while waiting and len(batch) < size and waiting[0] in bundles:
+                            batch.append(waiting.popleft())
+                        launch_batch(wrapper, batch)
+                    else:
+                        ticker = pending[wrapper].popleft()
+                        launch(wrapper, ticker)
+                        if self.task_timeout:
+                            deadlines[(wrapper, ticker)] = time.monotonic() + self.task_timeout
+                    STARTUP.mark("first task")
+
+                done, _ = concurrent.futures.wait(list(in_flight) + list(fetching), timeout=poll,
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+                finished = []
+                # Batch results first: everything a finished batch streamed is already queued
+                while True:
+                    try:
+                        batch_id, wrapper, ticker, result = streamed.get_nowait()
+                    except queue.Empty:
+                        break
+                    batch_results[batch_id].append(result)
+                    landed = time.monotonic()
+                    self.latency.charge(ticker, landed - batch_clock.get(batch_id, landed))
+                    batch_clock[batch_id] = landed
+                    if (wrapper, ticker) in attempts:   # not settled by a deadline or early exit
+                        finished.append(settle(wrapper, ticker, result))
+
+                for future in done:
+                    if future in fetching:
+                        ticker = fetching.pop(future)
+                        try:
+                            bundles[ticker] = future.result()
+                        except Exception as e:
+                            # Models fall back to fetching for themselves
+                            print(f"[Data] Bundle fetch failed for {ticker}: {e}")
+                            bundles[ticker] = None
+                        continue
+
+                    wrapper, ticker = in_flight.pop(future)
+                    running[wrapper] -= 1
+                    elapsed = time.monotonic() - started.pop(future)
+                    if future in batches:
+                        batch_id, batch = batches.pop(future)
+                        batch_clock.pop(batch_id, None)
+                        try:
+                            future.result()
+                            error = {"error": "No result from batch"}
+                        except Exception as e:
+                            error = {"error": str(e)}
+                        for result in batch_results.pop(batch_id, []):
+                            self.latency.record(wrapper, elapsed / len(batch), result)
+                        for t in batch:
+                            if future in attempts.get((wrapper, t), []):
+                                finished.append(settle(wrapper, t, dict(error)))
+                        continue
+                    is_hedge = future in hedges
+                    hedges.discard(future)
+                    self.latency.charge(ticker, elapsed)
+                    if future in abandoned:
+                        abandoned.discard(future)
+                        continue
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = {"error": str(e)}
+                    self.latency.record(wrapper, elapsed, result)
+
+                    live = attempts.get((wrapper, ticker), [])
+                    live.remove(future)
+                    if "error" in result and live:
+                        continue   # the other attempt may still answer
+                    if is_hedge:
+                        self.latency.hedge_wins[wrapper] += 1
+                    finished.append(settle(wrapper, ticker, result))
+
+                # Deadlines: the entry becomes a timeout error, the stuck run is abandoned
+                now = time.monotonic()
+                for (wrapper, ticker), deadline in list(deadlines.items()):
+                    # An earlier settle() in this pass may have short-circuited the ticker
+                    if (wrapper, ticker) in deadlines and now >= deadline:
+                        self.latency.timeouts[wrapper] += 1
+                        self.latency.charge(ticker, self.task_timeout)
+                        finished.append(settle(wrapper, ticker, {
+                            "error": f"Timeout after {self.task_timeout:g}s", "timed_out": True,
+                            "details": {"raw_output": ""}}))
+
+                # Stragglers past the model's p95: one duplicate each, if the model has a free slot
+                if self.hedge:
+                    for future, (wrapper, ticker) in list(in_flight.items()):
+                        if len(hedges) >= self.max_hedges or len(in_flight) >= self.max_in_flight + self.max_hedges:
+                            break
+                        if future in abandoned or future in batches or (wrapper, ticker) in hedged:
+                            continue
+                        if running[wrapper] >= self.model_limits.get(wrapper, 1):
+                            continue
+                        threshold = self.latency.straggler_after(wrapper)
+                        if threshold is not None and now - started[future] > threshold:
+                            hedged.add((wrapper, ticker))
+                            launch(wrapper, ticker, hedge=True)
+
+                for item in finished:
+                    if item is not None:
+                        yield item
@@ -0,0 +1,265 @@
+"""
+Super Agent 4.0 — Sharded Scans
+================================
+Splits one session's universe across N scans that share nothing but a
+directory (``--shard-dir``, default data/shards): N local processes, or N
+machines with the directory on a common filesystem.
+
+    python main.py --shard 1/4 --shard-dir /mnt/agent/shards    # ... 4/4, anywhere
+    python sharding.py merge --shard-dir /mnt/agent/shards       # combined reports
+
+Partition: every ticker's expected cost is its model time in the latest
+merged session before this one (the ``cost`` the scan journals per ticker),
+or the median known cost for tickers without one. Tickers are dealt heaviest
+first to the least loaded shard (ties by name and shard number), so the plan
+is a pure function of the universe and the costs. The first shard to start
+writes it to <shard-dir>/<date>/plan.json (a hard link, or an O_EXCL create
+where the filesystem has no hard links) and every later shard uses that
+file, so all N agree even if their universe fetches or local histories differ.
+
+Each shard journals to <shard-dir>/<date>/shard-<i>of<N>.jsonl (so ``--resume``
+works per shard) and writes its own partial reports next to it. ``merge``
+combines the shard journals into <shard-dir>/journal/<date>.jsonl — the
+history the next session's costs and priorities come from — and into the
+local run journal, then writes the swing and intraday reports.
+"""
+
+import os
+import json
+import time
+import argparse
+import datetime
+import statistics
+
+from run_journal import RunJournal, IST, trading_date
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SHARD_DIR = os.path.join(BASE_DIR, "data", "shards")
+PLAN_FILE = "plan.json"
+DEFAULT_COST = 1.0      # seconds, for a session without any cost history
+PLAN_WAIT = 10.0        # seconds a shard waits for another shard's plan to be complete
+
+
+def parse_shard(text):
+    """'2/4' -> (2, 4); shards are numbered 1..N."""
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Bad shard '{text}' (expected i/N, e.g. 2/4)")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"Bad shard '{text}' (need 1 <= i <= N)")
+    return index, count
+
+
+def shard_name(index, count):
+    return f"shard-{index}of{count}"
+
+
+def session_dir(date, shard_dir=SHARD_DIR):
+    return os.path.join(shard_dir, date)
+
+
+def shard_journal(date, index, count, shard_dir=SHARD_DIR):
+    return RunJournal(date, path=os.path.join(session_dir(date, shard_dir), f"{shard_name(index, count)}.jsonl"))
+
+
+def shard_output_dir(date, index, count, shard_dir=SHARD_DIR):
+    """Where one shard's partial reports go, so shards never overwrite each other's."""
+    path = os.path.join(session_dir(date, shard_dir), shard_name(index, count))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def merged_journal(date, shard_dir=SHARD_DIR):
+    return RunJournal(date, journal_dir=os.path.join(shard_dir, "journal"))
+
+
+# --- PARTITION ---
+
+def expected_costs(tickers, history):
+    """ticker -> expected seconds. ``history``: journal records (ticker -> record) of an earlier session."""
+    known = {t: float(rec["cost"]) for t, rec in history.items() if rec.get("cost")}
+    default = statistics.median(known.values()) if known else DEFAULT_COST
+    return {t: known.get(t, default) for t in tickers}
+
+
+def partition(tickers, costs, count):
+    """Heaviest ticker first to the least loaded shard. Returns ``count`` lists in universe order."""
+    loads = [0.0] * count
+    assigned = [set() for _ in range(count)]
+    for ticker in sorted(set(tickers), key=lambda t: (-costs[t], t)):
+        k = min(range(count), key=lambda i: (loads[i], i))
+        loads[k] += costs[ticker]
+        assigned[k].add(ticker)
+    return [[t for t in tickers if t in shard] for shard in assigned]
+
+
+def cost_history(date, shard_dir=SHARD_DIR):
+    """Records of the latest merged session before ``date``, else of the local run journal."""
+    for journal in (merged_journal(date, shard_dir), RunJournal(date)):
+        previous = journal.previous()
+        if previous is not None:
+            done = previous.load()
+            if done:
+                return previous.date, done
+    return None, {}
+
+
+def load_plan(date, shard_dir=SHARD_DIR):
+    try:
+        with open(os.path.join(session_dir(date, shard_dir), PLAN_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def wait_for_plan(date, shard_dir=SHARD_DIR):
+    """The plan another shard is publishing (an O_EXCL write may still be in progress)."""
+    deadline = time.monotonic() + PLAN_WAIT
+    while True:
+        plan = load_plan(date, shard_dir)
+        if plan is not None:
+            return plan
+        if time.monotonic() > deadline:
+            raise SystemExit(f"[Shard] {session_dir(date, shard_dir)}/{PLAN_FILE} exists but is unreadable")
+        time.sleep(0.1)
+
+
+def publish_plan(path, plan):
+    """
+    Create ``path`` only if it does not exist yet. Returns False if another
+    shard got there first.
+    """
+    text = json.dumps(plan)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+    try:
+        # Atomic: readers never see a partial plan
+        os.link(tmp, path)
+        return True
+    except FileExistsError:
+        return False
+    except OSError:
+        pass    # no hard links here (SMB, some FUSE mounts)
+    finally:
+        os.remove(tmp)
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+    return True
+
+
+def make_plan(tickers, count, date, shard_dir=SHARD_DIR):
+    """The session's plan: read it if another shard already wrote it, else compute and publish it."""
+    plan = load_plan(date, shard_dir)
+    if plan is None:
+        history_date, history = cost_history(date, shard_dir)
+        costs = expected_costs(tickers, history)
+        shards = partition(tickers, costs, count)
+        plan = {
+            "date": date,
+            "count": count,
+            "created": datetime.datetime.now(IST).isoformat(timespec="seconds"),
+            "cost_history": history_date,
+            "expected_cost": [round(sum(costs[t] for t in shard), 1) for shard in shards],
+            "shards": shards,
+        }
+        folder = session_dir(date, shard_dir)
+        os.makedirs(folder, exist_ok=True)
+        if not publish_plan(os.path.join(folder, PLAN_FILE), plan):
+            plan = wait_for_plan(date, shard_dir)   # lost the race: use the winner's plan
+    if plan["count"] != count:
+        raise SystemExit(f"[Shard] {date} is already planned as {plan['count']} shards, not {count}")
+    return plan
+
+
+def describe(plan):
+    costs = ", ".join(f"{len(shard)} tickers ~{cost / 60:.1f} min"
+                      for shard, cost in zip(plan["shards"], plan["expected_cost"]))
+    return f"{plan['count']} shards from {plan['cost_history'] or 'no'} cost history: {costs}"
+
+
+# --- MERGE ---
+
+def load_shards(date, shard_dir=SHARD_DIR, count=None):
+    """(ticker -> record across every shard journal of the date, plan or None)."""
+    plan = load_plan(date, shard_dir)
+    count = count or (plan["count"] if plan else None)
+    if count is None:
+        raise SystemExit(f"[Shard] No plan in {session_dir(date, shard_dir)} — pass --count")
+    done = {}
+    for index in range(1, count + 1):
+        journal = shard_journal(date, index, count, shard_dir)
+        records = journal.load()
+        print(f"[Shard] {shard_name(index, count)}: {len(records)} tickers"
+              + ("" if records else f" (nothing in {journal.path})"))
+        done.update(records)
+    return done, plan
+
+
+def write_merged(done, journal):
+    journal.reset()
+    for ticker, rec in done.items():
+        extra = {k: v for k, v in rec.items() if k not in ("ticker", "results", "ts")}
+        journal.append(ticker, rec["results"], **extra)
+    journal.close()
+    return journal.path
+
+
+def merge(date, shard_dir=SHARD_DIR, output_dir=BASE_DIR, count=None):
+    """Combine the shard journals of ``date`` and write the swing and intraday reports."""
+    from main import split_journal, write_reports
+    done, plan = load_shards(date, shard_dir, count)
+    if plan is not None:
+        planned = [t for shard in plan["shards"] for t in shard]
+        missing = [t for t in planned if t not in done]
+        if missing:
+            shown = ", ".join(missing[:10]) + (f" (+{len(missing) - 10} more)" if len(missing) > 10 else "")
+            print(f"[Shard] {len(missing)}/{len(planned)} planned tickers not finished yet: {shown}")
+    if not done:
+        raise SystemExit(f"[Shard] Nothing to merge for {date}")
+    print(f"[Journal] {len(done)} tickers -> {write_merged(done, merged_journal(date, shard_dir))}")
+    write_merged(done, RunJournal(date))
+    return write_reports(*split_journal(done), output_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan and merge sharded Super Agent scans")
+    parser.add_argument("--shard-dir", default=SHARD_DIR, help="Directory every shard shares")
+    parser.add_argument("--date", help="Trading date of the session (YYYY-MM-DD, default today IST)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_merge = sub.add_parser("merge", help="Combine the shard journals and write both reports")
+    p_merge.add_argument("--count", type=int, help="Number of shards (default: from the session's plan)")
+    p_merge.add_argument("--output-dir", default=BASE_DIR, help="Where the combined reports go")
+    p_plan = sub.add_parser("plan", help="Show the session's plan, or how N shards would be balanced")
+    p_plan.add_argument("--count", type=int, help="Preview a partition into this many shards")
+    args = parser.parse_args()
+
+    date = args.date or trading_date()
+    if args.command == "merge":
+        swing_path, intraday_path = merge(date, args.shard_dir, args.output_dir, args.count)
+        print(f"Swing Report: {swing_path}")
+        print(f"Intraday Report: {intraday_path}")
+        return
+
+    plan = load_plan(date, args.shard_dir)
+    if plan is None or (args.count and args.count != plan["count"]):
+        if not args.count:
+            raise SystemExit(f"[Shard] No plan for {date} yet — pass --count to preview one")
+        history_date, history = cost_history(date, args.shard_dir)
+        if not history:
+            raise SystemExit("[Shard] No earlier session to take a universe and costs from")
+        tickers = list(history)
+        costs = expected_costs(tickers, history)
+        shards = partition(tickers, costs, args.count)
+        plan = {"count": args.count, "cost_history": history_date, "shards": shards,
+                "expected_cost": [round(sum(costs[t] for t in shard), 1) for shard in shards]}
+    print(f"[Shard] {describe(plan)}")
+
+
+if __name__ == "__main__":
+    main()
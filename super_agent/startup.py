@@ -0,0 +1,113 @@
+"""
+Super Agent 4.0 — Startup Budget
+=================================
+Measures how long the orchestrator takes from process start to its first
+(model, ticker) task, and where import time goes.
+
+- STARTUP.mark(name) records a milestone (first occurrence wins);
+  ``main.py --startup-report`` prints the timeline against STARTUP_BUDGET_MS.
+- ``python startup.py [main|wrappers|<wrapper>]`` runs the target under
+  ``python -X importtime`` and summarises self / cumulative import time per
+  top-level module.
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+STARTUP_BUDGET_MS = 300
+
+
+def process_start_time():
+    """Wall-clock time this process was started (Linux /proc), else now."""
+    try:
+        with open("/proc/self/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        start_ticks = int(fields[19])  # field 22: starttime, in clock ticks since boot
+        with open("/proc/stat") as f:
+            boot = next(int(line.split()[1]) for line in f if line.startswith("btime"))
+        return boot + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration):
+        return time.time()
+
+
+class StartupClock:
+    def __init__(self):
+        self.t0 = process_start_time()
+        self.marks = {}
+
+    def mark(self, name):
+        if name not in self.marks:
+            self.marks[name] = time.time()
+
+    def elapsed_ms(self, name):
+        return (self.marks[name] - self.t0) * 1000
+
+    def report(self, budget_ms=STARTUP_BUDGET_MS, until="first task"):
+        parts = [f"{name} {self.elapsed_ms(name):.0f} ms"
+                 for name in sorted(self.marks, key=self.marks.get)]
+        print(f"[Startup] {' | '.join(parts)}")
+        if until in self.marks:
+            total = self.elapsed_ms(until)
+            verdict = "within" if total <= budget_ms else "OVER"
+            print(f"[Startup] {until} at {total:.0f} ms — {verdict} the {budget_ms} ms budget")
+
+
+STARTUP = StartupClock()
+
+
+# --- IMPORT-TIME REPORT ---
+
+def _import_code(target):
+    if target == "main":
+        return "import main"
+    if target == "wrappers":
+        return ("from wrappers import MODEL_WRAPPERS, load_plugin\n"
+                "for w in MODEL_WRAPPERS.values(): load_plugin(w).prepare()")
+    return f"from wrappers import load_plugin; load_plugin({target!r}).prepare()"
+
+
+def importtime(target="main"):
+    """[(module, self_us, cumulative_us, depth)] from ``python -X importtime``."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", _import_code(target)],
+                          cwd=BASE_DIR, capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cum_us), depth))
+    return rows
+
+
+def summarise(rows, top=20):
+    """Self time summed per top-level package, plus the cumulative cost of each root import."""
+    per_package = {}
+    for name, self_us, _, _ in rows:
+        pkg = name.split(".")[0]
+        per_package[pkg] = per_package.get(pkg, 0) + self_us
+    total = sum(per_package.values())
+
+    print(f"{'package':<30}{'self ms':>10}{'share':>8}")
+    for pkg, us in sorted(per_package.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"{pkg:<30}{us / 1000:>10.1f}{us / max(total, 1):>8.0%}")
+    print(f"{'total':<30}{total / 1000:>10.1f}")
+
+    roots = [r for r in rows if r[3] == 0]
+    print(f"\n{'direct import':<30}{'cumulative ms':>14}")
+    for name, _, cum_us, _ in sorted(roots, key=lambda r: -r[2])[:top]:
+        print(f"{name:<30}{cum_us / 1000:>14.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarise python -X importtime per module")
+    parser.add_argument("target", nargs="?", default="main",
+                        help="main, wrappers (all four, with prepare()), or one wrapper name")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+    summarise(importtime(args.target), args.top)
@@ -0,0 +1,11 @@
+"""
+Offline checks for the Super Agent orchestrator: run ``python -m pytest -q``
+from super_agent/. Modules are imported by plain name, as main.py does.
+"""
+
+import os
+import sys
+
+SUPER_AGENT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SUPER_AGENT not in sys.path:
+    sys.path.insert(0, SUPER_AGENT)
@@ -0,0 +1,208 @@
+import json
+
+import numpy as np
+import pytest
+
+import reaggregate
+from aggregation import (MODELS, MODEL_WEIGHTS, PARAM_PRIORITY, ScoreTable,
+                         score_universe, score_bounds, early_exit)
+
+SIGNALS = ["STRONG BUY", "BUY", "WAIT", "SELL", "STRONG SELL", "strong_buy", "Hold", "SELL (weak)"]
+
+
+def random_result(rng):
+    if rng.random() < 0.1:
+        return {"error": "boom"}
+
+    def leg():
+        return {"signal": str(rng.choice(SIGNALS)), "confidence": float(rng.random()),
+                "entry": float(rng.uniform(90, 110)), "target": float(rng.uniform(110, 130)),
+                "sl": float(rng.uniform(70, 90))}
+
+    details = {}
+    if rng.random() < 0.8:
+        details["adx"] = float(rng.choice([0.0, rng.uniform(10, 45)]))
+    if rng.random() < 0.8:
+        details["rvol"] = float(rng.uniform(0, 3))
+    history = [{"date": f"2026-10-{15 - k}", "signal": str(rng.choice(SIGNALS)), "confidence": float(rng.random())}
+               for k in range(int(rng.integers(0, 5)))]
+    return {"model_name": "x", "swing": leg(), "intraday": leg(), "history": history, "details": details}
+
+
+def random_universe(n=300, seed=11):
+    rng = np.random.default_rng(seed)
+    return {f"T{i}.NS": {name: random_result(rng) for name in MODELS} for i in range(n)}
+
+
+# --- REFERENCE: the per-ticker Super Agent 4.0 closures aggregation.py replaces ---
+
+def _value(signal):
+    s = signal.upper().replace("_", " ")
+    if "STRONG BUY" in s: return 1.0
+    if "STRONG SELL" in s: return -1.0
+    if "BUY" in s: return 0.7
+    if "SELL" in s: return -0.7
+    return 0.0
+
+
+def _direction(signal):
+    s = signal.upper().replace("_", " ")
+    return 1 if "BUY" in s else -1 if "SELL" in s else 0
+
+
+def aggregate_rowwise(ticker, results):
+    working = {k: v for k, v in results.items() if "error" not in v}
+    adx_vals = [v["details"]["adx"] for v in working.values() if v.get("details", {}).get("adx", 0) > 0]
+    rvol_vals = [v["details"]["rvol"] for v in working.values() if v.get("details", {}).get("rvol", 0) > 0]
+    avg_adx = sum(adx_vals) / len(adx_vals) if adx_vals else 0
+
+    def persistence(res, mode, name):
+        history = res.get("history", [])
+        if not history:
+            current = res.get(mode, {})
+            return _value(current.get("signal", "WAIT")) * current.get("confidence", 0) * 0.5
+        weights = MODEL_WEIGHTS.get(name, [0.5, 0.3, 0.2])
+        score = 0
+        for i, h in enumerate(history[:3]):
+            score += _value(h.get("signal", "WAIT")) * h.get("confidence", 0) * weights[i]
+        return score
+
+    def super_score(mode):
+        total = 0
+        for name, res in working.items():
+            total += persistence(res, mode, name)
+        score = total / len(working) if working else 0
+        if mode == "swing":
+            if avg_adx < 20:
+                if score > 0: score = 0
+            elif avg_adx < 25:
+                if score > 0: score *= 0.5
+        directions = [_direction(v.get(mode, {}).get("signal", "WAIT")) for v in working.values()]
+        if 1 in directions and -1 in directions and abs(score) < 0.6:
+            score *= 0.3
+        return score
+
+    def final_signal(score):
+        if score >= 0.5: return "STRONG BUY"
+        if score > 0.15: return "BUY"
+        if score <= -0.5: return "STRONG SELL"
+        if score < -0.15: return "SELL"
+        return "WAIT"
+
+    def supreme(mode, score):
+        if score < 0.6 or avg_adx < 25:
+            return False
+        return all(_direction(v.get(mode, {}).get("signal", "WAIT")) == 1
+                   and all(_direction(h.get("signal", "WAIT")) == 1 for h in v.get("history", []))
+                   for v in working.values())
+
+    def trade(mode, signal):
+        final_dir = _direction(signal)
+        for name in PARAM_PRIORITY:
+            res = results.get(name, {})
+            if "error" in res or not final_dir:
+                continue
+            leg = res.get(mode, {})
+            if _direction(leg.get("signal", "WAIT")) == final_dir:
+                return [leg.get(k, 0) for k in ("entry", "target", "sl")]
+        apex = results.get("Apex Logic", {})
+        if "error" in apex:
+            return [0, 0, 0]
+        return [apex.get(mode, {}).get(k, 0) for k in ("entry", "target", "sl")]
+
+    pair = []
+    for mode in ("swing", "intraday"):
+        score = super_score(mode)
+        signal = final_signal(score)
+        is_supreme = supreme(mode, score)
+        entry, target, sl = trade(mode, signal)
+        res = {"ticker": ticker, "final_signal": ("[SUPREME] " + signal) if is_supreme else signal,
+               "super_score": score, "ml_confidence": None, "entry": entry, "target": target, "sl": sl,
+               "is_supreme": is_supreme, "models": {k: v.get(mode, {}) for k, v in working.items()}}
+        for k, v in results.items():
+            if "error" in v:
+                res["models"][k] = {"signal": f"ERR: {v['error'][:100]}", "confidence": 0}
+        pair.append(res)
+    return tuple(pair), (sum(rvol_vals) / len(rvol_vals) if rvol_vals else 0)
+
+
+def test_universe_matches_rowwise():
+    universe = random_universe()
+    scores = score_universe(universe)
+    for i, (ticker, pair) in enumerate(zip(universe, scores.records())):
+        expected, avg_rvol = aggregate_rowwise(ticker, universe[ticker])
+        assert pair == expected, ticker
+        assert scores.avg_rvol[i] == avg_rvol
+
+
+def test_universe_matches_single_ticker():
+    universe = random_universe(60, seed=3)
+    records = score_universe(universe).records()
+    assert records == [score_universe({t: r}).records()[0] for t, r in universe.items()]
+
+
+def test_variant_rescoring_reuses_table():
+    universe = random_universe(100, seed=5)
+    table = ScoreTable(universe)
+    strict = {"strong_buy": 0.6, "buy": 0.25, "strong_sell": -0.6, "sell": -0.25}
+    assert score_universe(table, strict).records() == score_universe(universe, strict).records()
+    base, tuned = score_universe(table), score_universe(table, strict)
+    np.testing.assert_array_equal(base.super_score["swing"], tuned.super_score["swing"])
+    assert (tuned.final_signal["swing"] != base.final_signal["swing"]).any()
+
+
+def test_score_bounds_cover_every_outcome():
+    rng = np.random.default_rng(17)
+    universe = random_universe(200, seed=19)
+    for ticker, results in universe.items():
+        answered = int(rng.integers(1, len(MODELS)))
+        partial = {m: results[m] for m in MODELS[:answered]}
+        remaining = MODELS[answered:]
+        bounds = score_bounds(partial, remaining)
+        if bounds is None:
+            continue
+        for _ in range(5):
+            full = dict(partial, **{m: random_result(rng) for m in remaining})
+            scores = score_universe({ticker: full})
+            for mode, (lo, hi) in bounds.items():
+                assert lo <= scores.super_score[mode][0] <= hi
+
+
+def test_early_exit_never_changes_the_report_signal():
+    rng = np.random.default_rng(23)
+    universe = random_universe(300, seed=29)
+    order = ["Apex Logic"] + [m for m in MODELS if m != "Apex Logic"]
+    answered, remaining = order[:-1], order[-1:]
+    exits = 0
+    for ticker, results in universe.items():
+        partial = {m: results[m] for m in answered}
+        reason = early_exit(partial, remaining)
+        if not reason:
+            continue
+        exits += 1
+        skipped = dict(partial, **{m: {"error": "Short-circuited", "short_circuit": reason} for m in remaining})
+        expected = [(r["final_signal"], r["entry"]) for r in score_universe({ticker: skipped}).records()[0]]
+        for _ in range(5):
+            full = dict(partial, **{m: random_result(rng) for m in remaining})
+            assert [(r["final_signal"], r["entry"]) for r in score_universe({ticker: full}).records()[0]] == expected
+    assert exits
+
+
+def test_reaggregate_variants(tmp_path):
+    path = tmp_path / "variants.json"
+    path.write_text(json.dumps({"no_consensus": {"consensus_penalty": 1.0}}))
+    variants = reaggregate.load_variants(["baseline", "strict_cutoffs", "no_consensus"], str(path))
+    with pytest.raises(SystemExit):
+        reaggregate.load_variants(["nope"])
+
+    universe = random_universe(200, seed=31)
+    table = ScoreTable(universe)
+    summaries = {name: reaggregate.summarize(score_universe(table, params).records())
+                 for name, params in variants.items()}
+    assert summaries["baseline"] == reaggregate.summarize(score_universe(universe).records())
+    for mode in ("swing", "intraday"):
+        base, strict = summaries["baseline"][mode], summaries["strict_cutoffs"][mode]
+        assert sum(base["counts"].values()) == sum(strict["counts"].values()) == len(universe)
+        # Tighter cut-offs only ever turn calls into weaker ones
+        rank = {s: abs(k - 2) for k, s in enumerate(reaggregate.SIGNAL_ORDER)}
+        assert all(rank[strict["signals"][t]] <= rank[sig] for t, sig in base["signals"].items())
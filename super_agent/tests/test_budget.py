@@ -0,0 +1,123 @@
+import sys
+
+import pytest
+
+import budget
+from budget import BudgetPlanner, parse_duration, MIN_SAMPLES
+from wrappers.wrapper_common import DEGRADATIONS
+
+
+@pytest.mark.parametrize("text, seconds", [
+    ("20m", 1200), ("90s", 90), ("1h30m", 5400), ("7d", 604800), ("25", 1500), ("1.5h", 5400), (" 2M ", 120),
+])
+def test_parse_duration(text, seconds):
+    assert parse_duration(text) == seconds
+
+
+@pytest.mark.parametrize("text", ["", "m", "20x", "1h 30m", "-5m"])
+def test_parse_duration_rejects(text):
+    with pytest.raises(ValueError):
+        parse_duration(text)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+class Backend:
+    degrade = ()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(budget, "time", clock)
+    return clock
+
+
+def run(planner, clock, done, stop, total, seconds_per_ticker):
+    """Finish tickers ``done + 1 .. stop`` of ``total``; returns the update() results."""
+    out = []
+    for n in range(done + 1, stop + 1):
+        clock.now += seconds_per_ticker
+        out.append(planner.update(n, total))
+    return out
+
+
+def test_on_pace_cuts_nothing(clock):
+    backend = Backend()
+    planner = BudgetPlanner(backend, 600, clock.now)
+    planner.start(0)
+    assert not any(run(planner, clock, 0, 100, 100, 5.0))   # 500 s + reserve < 600 s
+    assert planner.level == 0 and backend.degrade == ()
+
+
+def test_degrades_in_order_and_only_forward(clock):
+    backend = Backend()
+    planner = BudgetPlanner(backend, 600, clock.now)
+    planner.start(0)
+    run(planner, clock, 0, MIN_SAMPLES - 1, 100, 10.0)
+    assert planner.level == 0   # too few samples to project yet
+    run(planner, clock, MIN_SAMPLES - 1, MIN_SAMPLES, 100, 10.0)   # 100 x 10 s: far past the budget
+    assert planner.level == 1 and backend.degrade == DEGRADATIONS[:1]
+    # Measured afresh at the new level: on pace now, so no further cut
+    run(planner, clock, MIN_SAMPLES, 3 * MIN_SAMPLES, 100, 1.0)
+    assert planner.level == 1 and backend.degrade == DEGRADATIONS[:1]
+    # Still too slow at this level: the next step goes
+    run(planner, clock, 3 * MIN_SAMPLES, 60, 100, 10.0)
+    assert planner.level >= 2 and backend.degrade == DEGRADATIONS[:planner.level]
+
+
+def test_deadline_reports_once(clock):
+    planner = BudgetPlanner(Backend(), 92, clock.now)
+    planner.start(0)
+    flags = run(planner, clock, 0, 30, 30, 4.0)
+    assert flags.count(True) == 1
+    assert flags.index(True) == 22   # the 23rd ticker lands at 92 s
+    assert planner.overrun
+
+
+def test_skip_news_keys_without_looking_news_up(monkeypatch):
+    import numpy as np
+    import pandas as pd
+    import incremental
+    from market_data import OhlcvBundle
+
+    def no_lookup(ticker):
+        raise AssertionError("news looked up under skip_news")
+
+    monkeypatch.setattr(incremental, "news_version", no_lookup)
+    index = pd.bdate_range(end="2026-10-15", periods=300, name="Date")
+    close = np.linspace(100.0, 130.0, len(index))
+    bundle = OhlcvBundle("T.NS", {True: pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close,
+                                                      "Volume": 1e5}, index=index)})
+    parts = incremental.InputFingerprint("2026-10-15").parts("hfm_wrapper", "T.NS", bundle, ("skip_news",))
+    assert parts["news"] == "skipped"
+
+
+def test_skipped_vwap_leaves_an_intraday_buy_unconfirmed(monkeypatch):
+    import types
+    import numpy as np
+    import pandas as pd
+    from wrappers import load_plugin
+
+    def no_vwap(ticker):
+        raise AssertionError("VWAP checked under skip_intraday_vwap")
+
+    model = {"fundamental": {"get_fundamental_score": lambda ticker: (10, {})},
+             "sentiment": {"get_sentiment_score": lambda ticker: (1, [])},
+             "technical": {"get_technical_indicators": lambda ticker, df=None: (
+                               10, {"Close": 100.0, "ATR": 2.0, "ADX": 25.0, "RVOL": 1.5}),
+                           "check_intraday_vwap": no_vwap}}
+    for name, attrs in model.items():
+        monkeypatch.setitem(sys.modules, name, types.SimpleNamespace(**attrs))
+    index = pd.bdate_range(end="2026-10-15", periods=250, name="Date")
+    bars = pd.DataFrame({"Close": np.linspace(100.0, 130.0, len(index))}, index=index)
+
+    out = load_plugin("quant_wrapper").run_analysis("T.NS", bars, degrade=("skip_intraday_vwap",))
+    assert out["swing"]["signal"] == "BUY"
+    assert out["intraday"]["signal"] == "WAIT" and out["intraday"]["confidence"] == 0.0
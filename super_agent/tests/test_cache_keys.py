@@ -0,0 +1,134 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import incremental
+from incremental import InputFingerprint, intraday_version, news_version
+from market_data import OhlcvBundle
+from output_cache import CachedBackend
+from run_journal import IST
+
+DATE = "2026-10-15"
+
+
+def make_bundle(days=900, seed=1, last_close=None):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end=DATE, periods=days, name="Date")
+    close = 100 + rng.normal(size=days).cumsum()
+    if last_close is not None:
+        close[-1] = last_close
+    frame = pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                          "Volume": rng.integers(1e5, 1e6, days).astype(float)}, index=index)
+    return OhlcvBundle("T.NS", {True: frame})
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    monkeypatch.setattr(incremental, "news_version", lambda ticker, now=None: "2026-10-15 10:00")
+    monkeypatch.setattr(incremental, "intraday_version", lambda now=None: "2026-10-15 close")
+
+
+@pytest.mark.parametrize("now, expected", [
+    ("2026-10-15 09:14", "2026-10-14 close"),   # before the open: yesterday's bars
+    ("2026-10-15 09:15", "2026-10-15 09:15"),
+    ("2026-10-15 10:07", "2026-10-15 10:00"),
+    ("2026-10-15 15:29", "2026-10-15 15:15"),
+    ("2026-10-15 15:30", "2026-10-15 close"),
+    ("2026-10-17 11:00", "2026-10-16 close"),   # Saturday
+])
+def test_intraday_version(now, expected):
+    moment = datetime.datetime.fromisoformat(now).replace(tzinfo=IST)
+    assert intraday_version(moment) == expected
+    # Same bar from another timezone
+    assert intraday_version(moment.astimezone(datetime.timezone.utc)) == expected
+
+
+@pytest.mark.parametrize("now, expected", [
+    ("2026-10-15 10:00", "2026-10-15 10:00"),
+    ("2026-10-15 10:59", "2026-10-15 10:00"),
+    ("2026-10-15 11:00", "2026-10-15 11:00"),
+    ("2026-10-17 00:30", "2026-10-17 00:00"),
+])
+def test_news_version_is_a_ttl_window(now, expected):
+    moment = datetime.datetime.fromisoformat(now).replace(tzinfo=IST)
+    assert news_version("T.NS", moment) == expected
+    assert news_version("T.NS", moment.astimezone(datetime.timezone.utc)) == expected
+
+
+def test_news_version_from_the_eod_snapshot(monkeypatch):
+    import fetch_gate
+    snaps = {"T.NS": {"news": [{"id": "b"}, {"id": "a"}]}, "U.NS": {"info": {}}}
+    monkeypatch.setattr(fetch_gate, "snapshot", snaps.get)
+    later = datetime.datetime(2026, 10, 16, 9, 0, tzinfo=IST)
+    version = news_version("T.NS")
+    assert news_version("T.NS", later) == version   # no expiry while the snapshot holds
+    snaps["T.NS"]["news"].append({"id": "c"})
+    assert news_version("T.NS", later) != version
+    assert news_version("U.NS", later) == "2026-10-16 09:00"   # no news in the snapshot: TTL window
+
+
+def test_fingerprint_follows_the_model_window():
+    fingerprint = InputFingerprint(DATE)
+    bundle = make_bundle()
+    key = fingerprint("apex_wrapper", "T.NS", bundle)
+    assert key == InputFingerprint(DATE)("apex_wrapper", "T.NS", make_bundle())
+    assert key != fingerprint("apex_wrapper", "T.NS", make_bundle(last_close=1.0))
+    # Bars outside Apex's 1y window do not matter
+    older = make_bundle()
+    older.frames[True].iloc[0, :4] = 1.0
+    assert key == fingerprint("apex_wrapper", "T.NS", older)
+    assert fingerprint("apex_wrapper", "T.NS", None) is None
+
+
+def test_fingerprint_external_inputs(monkeypatch):
+    bundle = make_bundle()
+    parts = InputFingerprint(DATE).parts("quant_wrapper", "T.NS", bundle)
+    assert parts["fundamentals"] == "2026-W42"
+    assert parts["news"] == "2026-10-15 10:00"
+    assert parts["intraday"] == "2026-10-15 close"
+    # Fundamentals are weekly: the next day of the same week keeps the key
+    assert InputFingerprint("2026-10-16")("stock_ai_wrapper", "T.NS", bundle) == \
+        InputFingerprint(DATE)("stock_ai_wrapper", "T.NS", bundle)
+
+    base = InputFingerprint(DATE)("quant_wrapper", "T.NS", bundle)
+    monkeypatch.setattr(incremental, "intraday_version", lambda now=None: "2026-10-16 09:30")
+    assert InputFingerprint(DATE)("quant_wrapper", "T.NS", bundle) != base
+    base = InputFingerprint(DATE)("quant_wrapper", "T.NS", bundle)
+    monkeypatch.setattr(incremental, "news_version", lambda ticker, now=None: "2026-10-15 11:00")
+    assert InputFingerprint(DATE)("quant_wrapper", "T.NS", bundle) != base   # news window expired
+
+
+class CountingBackend:
+    context_path = None
+    degrade = ()
+
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    def run(self, wrapper, ticker, bundle=None):
+        self.calls += 1
+        return dict(self.result)
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize("result, cached", [
+    ({"model_name": "Apex Logic", "swing": {"signal": "BUY", "confidence": 0.5}}, True),
+    ({"error": "boom"}, False),
+    ({"model_name": "Apex Logic", "swing": {}, "degraded": ["no_history"]}, False),
+])
+def test_cached_backend(tmp_path, result, cached):
+    inner = CountingBackend(result)
+    backend = CachedBackend(inner, date=DATE, cache_dir=str(tmp_path))
+    bundle = make_bundle()
+    first = backend.run("apex_wrapper", "T.NS", bundle)
+    second = backend.run("apex_wrapper", "T.NS", bundle)
+    assert first == second == result
+    assert inner.calls == (1 if cached else 2)
+    # Keys are per model and ticker
+    assert backend.key("apex_wrapper", "T.NS", bundle) != backend.key("apex_wrapper", "U.NS", bundle)
+    assert backend.key("apex_wrapper", "T.NS", bundle) != backend.key("stock_ai_wrapper", "T.NS", bundle)
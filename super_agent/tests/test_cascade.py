@@ -0,0 +1,22 @@
+import cascade
+
+
+def row(score, signal, rvol=1.0):
+    return {"score": score, "trend_score": 0, "mom_score": 0, "rvol": rvol, "price": 100.0, "signal": signal}
+
+
+def test_cascade_only_prunes_quiet_waits(monkeypatch):
+    rows = {
+        "BUY.NS": row(0.5, "BUY"),
+        "SELL.NS": row(-0.3, "SELL"),
+        "STRONG.NS": row(1.0, "STRONG BUY"),
+        "WAIT.NS": row(0.0, "WAIT"),
+        "LOUD.NS": row(0.0, "WAIT", rvol=3.0),
+        "HELD.NS": row(0.0, "WAIT"),
+    }
+    monkeypatch.setattr(cascade, "screen", lambda frames: rows)
+    tickers = list(rows) + ["NEW.NS"]   # no local bars: never screened, never pruned
+
+    shortlist, pruned = cascade.run_cascade(tickers, lambda t: None, holdings={"HELD.NS"})
+    assert shortlist == ["BUY.NS", "SELL.NS", "STRONG.NS", "LOUD.NS", "HELD.NS", "NEW.NS"]
+    assert list(pruned) == ["WAIT.NS"]
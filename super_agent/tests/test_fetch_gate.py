@@ -0,0 +1,31 @@
+import sys
+
+import pytest
+
+import fetch_gate
+from wrappers.wrapper_common import import_model
+
+
+def test_model_imports_get_the_gate(tmp_path):
+    pytest.importorskip("yfinance")
+    (tmp_path / "gated_model.py").write_text("import yfinance as yf\n")
+    real = fetch_gate.real_module("yfinance")
+    import_model(str(tmp_path), "gated_model")
+    try:
+        assert sys.modules["gated_model"].yf is fetch_gate.yf
+        # Only the model's own binding: everyone else still gets yfinance
+        assert sys.modules["yfinance"] is real
+    finally:
+        sys.modules.pop("gated_model", None)
+        sys.path.remove(str(tmp_path))
+
+
+def test_nsepython_functions_are_gated(monkeypatch):
+    nse = pytest.importorskip("nsepython")
+    calls = []
+    monkeypatch.setattr(fetch_gate, "call", lambda host, fn, *args, **kwargs: calls.append((host, fn)))
+    gated = fetch_gate.gated_nsepython()
+    gated.nse_fiidii()
+    assert calls == [("nse", nse.nse_fiidii)]
+    assert gated.nse_fiidii.__name__ == "nse_fiidii"
+    assert gated.pd is nse.pd   # everything else as it is
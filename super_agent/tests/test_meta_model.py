@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+meta_model = pytest.importorskip("meta_model")
+
+SIGNALS = ["STRONG BUY", "BUY", "WAIT", "SELL", "STRONG_SELL", "strong buy", None, "", "N/A"]
+
+
+def sample_trades(n=500, seed=7):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({col: rng.choice(SIGNALS, n) for col in meta_model.SIGNAL_COLUMNS + ["ensemble_signal"]})
+    for col in ["apex_conf", "hfm_conf", "stockai_conf", "quant_conf", "super_score", "rsi", "adx", "rvol", "macd_diff"]:
+        values = rng.normal(size=n).astype(object)
+        values[rng.random(n) < 0.1] = np.nan
+        values[rng.random(n) < 0.05] = "bad"
+        df[col] = values
+    for col in ["above_sma50", "above_sma200", "above_ema20", "above_vwap"]:
+        df[col] = rng.choice([0, 1, None], n)
+    return df
+
+
+def test_prepare_features_matches_rowwise():
+    df = sample_trades()
+    expected = meta_model._prepare_features_rowwise(df)
+    got = meta_model.prepare_features(df)
+    assert list(got.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(got.reset_index(drop=True), expected.reset_index(drop=True),
+                                  check_dtype=False)
+
+
+def test_prepare_features_float32():
+    df = sample_trades(50)
+    got = meta_model.prepare_features(df, dtype=np.float32)
+    assert set(got.dtypes) == {np.dtype(np.float32)}
+    np.testing.assert_allclose(got.to_numpy(), meta_model._prepare_features_rowwise(df).to_numpy(dtype=float),
+                               rtol=1e-6, atol=1e-6)
@@ -0,0 +1,64 @@
+import io
+import json
+import math
+
+import numpy as np
+import pytest
+
+from wrappers import result_protocol
+from wrappers.result_protocol import MAGIC, encode, decode_frames, read_frame, normalize_result
+
+RESULT = {"model_name": "Apex Logic",
+          "swing": {"signal": "BUY", "confidence": 0.7, "entry": 100.0, "target": 110.0, "sl": 95.0},
+          "intraday": {"signal": "WAIT", "confidence": 0.0, "entry": 100.0, "target": 0.0, "sl": 0.0},
+          "history": [{"date": "2026-10-14", "signal": "BUY", "confidence": 0.6}],
+          "details": {"adx": 27.5, "trend_score": 1}}
+
+
+@pytest.fixture(params=["msgpack", "json"])
+def codec(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(result_protocol, "msgpack", None)
+    elif result_protocol.msgpack is None:
+        pytest.skip("msgpack not installed")
+    return request.param
+
+
+def test_frames_round_trip_between_stray_prints(codec):
+    messages = [{"op": "ready"}, {"id": 7, "result": RESULT}, {"id": 8, "op": "done", "count": 2}]
+    stream = b"Downloading...\n" + encode(messages[0]) + b"[*100%*] 1 of 1 completed\n"
+    stream += encode(messages[1]) + b"\xffS" + encode(messages[2])   # a partial magic is skipped too
+    assert decode_frames(stream) == messages
+    f = io.BytesIO(stream)
+    assert [read_frame(f) for _ in messages] == messages
+    assert read_frame(f) is None
+
+
+def test_truncated_frame_is_dropped(codec):
+    frame = encode({"id": 1, "result": RESULT})
+    assert decode_frames(frame[:-3]) == []
+    assert read_frame(io.BytesIO(frame[:-3])) is None
+    assert decode_frames(frame[:-3] + encode({"id": 2})) == [{"id": 2}]
+
+
+def test_normalize_result_plain_types():
+    raw = {"model_name": "x",
+           "swing": {"signal": np.str_("BUY"), "confidence": np.float32(0.5), "entry": "n/a", "sl": np.int64(3)},
+           "history": [{"signal": "BUY", "confidence": np.float64(0.25)}],
+           "details": {"adx": np.float64(22.0), "window": np.arange(3), "pair": (1, 2)}}
+    out = normalize_result(raw)
+    assert type(out["swing"]["signal"]) is str
+    assert out["swing"]["confidence"] == 0.5 and type(out["swing"]["confidence"]) is float
+    assert math.isnan(out["swing"]["entry"])
+    assert out["swing"]["sl"] == 3.0
+    assert out["details"] == {"adx": 22.0, "window": [0, 1, 2], "pair": [1, 2]}
+    # Plain JSON with no custom encoder
+    json.dumps(out)
+    assert normalize_result("oops") == {"error": "Malformed result: str"}
+    assert normalize_result({"error": ValueError("bad")})["error"] == "bad"
+
+
+def test_magic_never_occurs_in_utf8():
+    assert MAGIC[0] == 0xFF
+    text = json.dumps(RESULT, ensure_ascii=False) + "₹ तेज़"
+    assert MAGIC[:1] not in text.encode("utf-8")
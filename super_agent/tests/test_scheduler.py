@@ -0,0 +1,134 @@
+import time
+import threading
+import collections
+
+import pytest
+
+import scheduler
+from scheduler import ScanScheduler
+from wrappers import MODEL_WRAPPERS
+
+TICKERS = [f"T{i}.NS" for i in range(12)]
+
+
+class FakeBackend:
+    """Answers every task after ``delay(wrapper, ticker, attempt)`` seconds, tracking concurrency."""
+
+    def __init__(self, delay=lambda wrapper, ticker, attempt: 0.01):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.running = collections.Counter()
+        self.peak = collections.Counter()
+        self.peak_total = 0
+        self.attempts = collections.Counter()
+        self.batches = []
+
+    def _enter(self, wrapper, n=1):
+        with self.lock:
+            self.running[wrapper] += n
+            self.peak[wrapper] = max(self.peak[wrapper], self.running[wrapper])
+            self.peak_total = max(self.peak_total, sum(self.running.values()))
+
+    def _leave(self, wrapper, n=1):
+        with self.lock:
+            self.running[wrapper] -= n
+
+    def _answer(self, wrapper, ticker):
+        with self.lock:
+            self.attempts[(wrapper, ticker)] += 1
+            attempt = self.attempts[(wrapper, ticker)]
+        time.sleep(self.delay(wrapper, ticker, attempt))
+        return {"model_name": wrapper, "swing": {"signal": "BUY", "confidence": 0.5}, "attempt": attempt}
+
+    def run(self, wrapper, ticker, bundle=None):
+        self._enter(wrapper)
+        try:
+            return self._answer(wrapper, ticker)
+        finally:
+            self._leave(wrapper)
+
+
+class BatchBackend(FakeBackend):
+    def run_batch(self, wrapper, tickers, bundles):
+        self.batches.append((wrapper, list(tickers)))
+        for ticker in tickers:
+            yield ticker, self._answer(wrapper, ticker)
+
+
+@pytest.fixture(autouse=True)
+def fast_polls(monkeypatch):
+    monkeypatch.setattr(scheduler, "POLL_INTERVAL", 0.01)
+
+
+def scan(backend, tickers=TICKERS, **kwargs):
+    kwargs.setdefault("hedge", False)
+    kwargs.setdefault("task_timeout", None)
+    sched = ScanScheduler(backend, **kwargs)
+    start = time.monotonic()
+    out = [(ticker, results, time.monotonic() - start) for ticker, results in sched.scan(tickers)]
+    return sched, out
+
+
+def test_every_ticker_once_within_limits():
+    backend = FakeBackend()
+    limits = {"apex_wrapper": 1, "quant_wrapper": 2, "stock_ai_wrapper": 2, "hfm_wrapper": 2}
+    _, out = scan(backend, max_in_flight=4, model_limits=limits)
+    assert sorted(t for t, _, _ in out) == sorted(TICKERS)
+    for _, results, _ in out:
+        assert list(results) == list(MODEL_WRAPPERS)
+        assert all("error" not in r for r in results.values())
+    assert all(backend.peak[w] <= limit for w, limit in limits.items())
+    assert backend.peak_total <= 4
+
+
+def test_deadline_turns_a_stuck_task_into_a_timeout():
+    backend = FakeBackend(lambda w, t, a: 1.5 if (w, t) == ("hfm_wrapper", "T1.NS") else 0.01)
+    sched, out = scan(backend, max_in_flight=8, task_timeout=0.3)
+    when = {t: elapsed for t, _, elapsed in out}
+    results = {t: r for t, r, _ in out}
+    stuck = results["T1.NS"]["Hedge Fund Manager"]
+    assert stuck["timed_out"] and stuck["error"] == "Timeout after 0.3s"
+    assert when["T1.NS"] < 1.0
+    assert all("error" not in r for t, res in results.items() if t != "T1.NS" for r in res.values())
+    assert sched.latency.timeouts["hfm_wrapper"] == 1
+
+
+def test_straggler_is_hedged_and_the_duplicate_wins(monkeypatch):
+    monkeypatch.setattr(scheduler, "HEDGE_MIN_SAMPLES", 3)
+    slow = ("quant_wrapper", "T6.NS")
+    backend = FakeBackend(lambda w, t, a: 2.0 if (w, t) == slow and a == 1 else 0.02)
+    sched, out = scan(backend, max_in_flight=8, hedge=True, task_timeout=10)
+    results = {t: r for t, r, _ in out}
+    when = {t: elapsed for t, _, elapsed in out}
+    assert results["T6.NS"]["Quantitative Development"]["attempt"] == 2
+    assert when["T6.NS"] < 1.5
+    assert backend.attempts[slow] == 2   # one duplicate only
+    # Other fast runs may jitter past the p95 too; the slow one's duplicate is among the winners
+    assert sched.latency.hedge_wins["quant_wrapper"] >= 1
+
+
+def test_batched_model_gets_consecutive_tickers():
+    backend = BatchBackend()
+    batch = {"apex_wrapper": 4, "quant_wrapper": 1, "stock_ai_wrapper": 1, "hfm_wrapper": 1}
+    sched, out = scan(backend, max_in_flight=8, model_batch=batch, task_timeout=5)
+    assert sorted(t for t, _, _ in out) == sorted(TICKERS)
+    apex = [tickers for wrapper, tickers in backend.batches if wrapper == "apex_wrapper"]
+    assert [t for tickers in apex for t in tickers] == TICKERS
+    assert all(1 <= len(tickers) <= 4 for tickers in apex)
+    assert not [w for w, _ in backend.batches if w != "apex_wrapper"]
+    assert all(sched.latency.cost[t] > 0 for t in TICKERS)
+
+
+def test_early_exit_drops_the_remaining_models():
+    backend = FakeBackend(lambda w, t, a: 0.05 if w != "apex_wrapper" else 0.0)
+
+    def early_exit(partial, remaining):
+        return "settled" if "Apex Logic" in partial else None
+
+    sched, out = scan(backend, max_in_flight=8, early_exit=early_exit,
+                      model_limits={"apex_wrapper": 8, "quant_wrapper": 1, "stock_ai_wrapper": 1, "hfm_wrapper": 1})
+    for _, results, _ in out:
+        assert "error" not in results["Apex Logic"]
+        skipped = [m for m, r in results.items() if r.get("short_circuit") == "settled"]
+        assert len(skipped) + sum(1 for r in results.values() if "error" not in r) == len(MODEL_WRAPPERS)
+    assert sum(sched.short_circuited.values()) > 0
@@ -0,0 +1,93 @@
+import errno
+import os
+import random
+
+import pytest
+
+import main
+import sharding
+from run_journal import RunJournal
+
+DATE = "2026-10-15"
+
+
+@pytest.fixture(params=["link", "no-link"])
+def links(request, monkeypatch):
+    if request.param == "no-link":
+        def no_link(src, dst):
+            raise OSError(errno.EPERM, "Operation not permitted")
+        monkeypatch.setattr(sharding.os, "link", no_link)
+
+
+def test_plan_is_published_once(tmp_path, links):
+    tickers = ["A.NS", "B.NS", "C.NS"]
+    first = sharding.make_plan(tickers, 2, DATE, str(tmp_path))
+    # A later shard with a different universe still gets the first plan
+    second = sharding.make_plan(tickers + ["D.NS"], 2, DATE, str(tmp_path))
+    assert second == first
+    assert sorted(t for shard in first["shards"] for t in shard) == tickers
+    assert os.listdir(sharding.session_dir(DATE, str(tmp_path))) == [sharding.PLAN_FILE]
+
+
+def test_publish_plan_create_if_absent(tmp_path, links):
+    path = str(tmp_path / sharding.PLAN_FILE)
+    assert sharding.publish_plan(path, {"count": 2})
+    assert not sharding.publish_plan(path, {"count": 3})
+    assert sharding.load_plan(".", str(tmp_path)) == {"count": 2}
+
+
+def universe_costs(n=200, seed=5):
+    rng = random.Random(seed)
+    tickers = [f"T{i:03d}.NS" for i in range(n)]
+    history = {t: {"ticker": t, "results": {}, "cost": round(rng.lognormvariate(1, 1), 2)}
+               for t in tickers if rng.random() < 0.8}
+    return tickers, history
+
+
+def test_partition_is_deterministic_and_balanced():
+    tickers, history = universe_costs()
+    costs = sharding.expected_costs(tickers, history)
+    shards = sharding.partition(tickers, costs, 4)
+    # Same plan whatever order the universe or the cost history came in
+    shuffled = dict(sorted(history.items(), reverse=True))
+    assert sharding.partition(tickers, sharding.expected_costs(tickers, shuffled), 4) == shards
+    assert sorted(t for shard in shards for t in shard) == sorted(tickers)
+    for shard in shards:
+        assert shard == [t for t in tickers if t in shard]   # universe order within a shard
+    loads = [sum(costs[t] for t in shard) for shard in shards]
+    # Greedy heaviest-first: no shard exceeds the mean by more than one ticker's cost
+    assert max(loads) - sum(loads) / len(loads) <= max(costs.values())
+
+
+def test_expected_costs_default_to_the_median():
+    costs = sharding.expected_costs(["A", "B", "C", "D"], {"A": {"cost": 1.0}, "B": {"cost": 3.0},
+                                                           "C": {"cost": 10.0}})
+    assert costs == {"A": 1.0, "B": 3.0, "C": 10.0, "D": 3.0}
+    assert sharding.expected_costs(["A"], {}) == {"A": sharding.DEFAULT_COST}
+
+
+def test_merge_matches_unsharded(tmp_path, monkeypatch):
+    from test_aggregation import random_universe
+    universe = random_universe(40, seed=13)
+    shard_dir, local = str(tmp_path / "shards"), str(tmp_path / "journal")
+    monkeypatch.setattr(sharding, "RunJournal", lambda date, journal_dir=local, **kw: RunJournal(date, journal_dir, **kw))
+    reports = []
+    monkeypatch.setattr(main, "generate_dual_reports",
+                        lambda swing, intraday, output_dir, progress=None: reports.append((swing, intraday)))
+
+    plan = sharding.make_plan(list(universe), 3, DATE, shard_dir)
+    for index, shard in enumerate(plan["shards"], 1):
+        journal = sharding.shard_journal(DATE, index, 3, shard_dir)
+        for ticker in reversed(shard):   # shards finish in their own order
+            journal.append(ticker, universe[ticker], cost=1.0)
+        journal.close()
+    sharding.merge(DATE, shard_dir, str(tmp_path))
+
+    merged = sharding.merged_journal(DATE, shard_dir).load()
+    assert {t: rec["results"] for t, rec in merged.items()} == universe
+    assert {t: rec["results"] for t, rec in RunJournal(DATE, journal_dir=local).load().items()} == universe
+    by_ticker = lambda rows: sorted(rows, key=lambda r: r["ticker"])
+    merged_swing, merged_intraday = reports[0]
+    pairs = main.report_pairs(universe, {})
+    assert by_ticker(merged_swing) == by_ticker([s for s, _ in pairs])
+    assert by_ticker(merged_intraday) == by_ticker([i for _, i in pairs])
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from wrappers import load_plugin
+from wrappers.wrapper_common import analyze, analyze_batch, dump_result
+from market_data import STORE_DIR, STOCK_AI_OHLCV_DIR, load_bundle
+
+TICKERS = ["TCS.NS", "INFY.NS", "RELIANCE.NS", "ITC.NS", "SBIN.NS", "LT.NS"]
+
+
+def canonical(result):
+    return json.loads(dump_result(result))
+
+
+def local_windows(wrapper):
+    need = wrapper.DATA_NEEDS
+    out = {}
+    for ticker in TICKERS:
+        bundle = load_bundle(ticker, {"w": need})
+        if bundle is not None:
+            out[ticker] = bundle.view(need)
+    if len(out) < 2:
+        pytest.skip(f"no local bars in {STORE_DIR} or {STOCK_AI_OHLCV_DIR}")
+    return out
+
+
+def test_analyze_batch_matches_by_ticker():
+    def short_batch(tickers, **kwargs):
+        # Out of order, one ticker missing, one never asked for
+        yield "C", {"model_name": "x", "swing": {}}
+        yield "Z", {"model_name": "x", "swing": {}}
+        yield "A", {"model_name": "x", "swing": {}}
+
+    out = list(analyze_batch(short_batch, ["A", "B", "C"]))
+    assert [t for t, _ in out] == ["C", "A", "B"]
+    assert "error" not in dict(out)["A"]
+    assert dict(out)["B"] == {"error": "No result from batch"}
+
+
+def test_analyze_batch_failure_keeps_answered_tickers():
+    def failing(tickers, **kwargs):
+        yield tickers[0], {"model_name": "x"}
+        raise RuntimeError("boom")
+
+    out = dict(analyze_batch(failing, ["A", "B", "C"]))
+    assert "error" not in out["A"]
+    assert out["B"] == out["C"] == {"error": "Batch failed: boom"}
+
+
+def test_apex_batch_matches_single():
+    apex = load_plugin("apex_wrapper")
+    windows = local_windows(apex)
+    windows["SHORT.NS"] = next(iter(windows.values())).iloc[-50:]   # too short for EMA 200
+    single = {t: canonical(analyze(apex.run_analysis, t, df.copy())) for t, df in windows.items()}
+    batch = {t: canonical(r) for t, r in analyze_batch(apex.run_analysis_batch, list(windows),
+                                                       {t: df.copy() for t, df in windows.items()})}
+    assert batch == single
+    assert single["SHORT.NS"] == {"error": "Insufficient data"}
+
+
+def test_stack_windows_right_aligns():
+    import numpy as np
+    import pandas as pd
+    from wrappers.wrapper_common import stack_windows
+    frames = {"A": pd.DataFrame({"Close": [1.0, 2.0, 3.0]}), "B": pd.DataFrame({"Close": [5.0]})}
+    out = stack_windows(frames, "Close")
+    assert list(out.columns) == ["A", "B"]
+    np.testing.assert_array_equal(out["A"].to_numpy(), [1, 2, 3])
+    np.testing.assert_array_equal(out["B"].to_numpy(), [np.nan, np.nan, 5])
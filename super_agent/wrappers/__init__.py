@@ -0,0 +1,27 @@
+"""
+Super Agent model wrappers.
+
+Each wrapper module exposes ``run_analysis(ticker)`` returning the common
+result dict (swing / intraday / history / details, or ``{"error": ...}``),
+plus ``prepare()`` which imports its model package up front and
+``run_analysis_batch(tickers, data_bundle)``, which yields one result per
+ticker with the per-model setup done once for the batch. Every wrapper
+can also be run as a script that prints the result as one JSON line (or one
+binary frame with ``--binary``); the schema and framing live in
+result_protocol.py.
+"""
+
+import importlib
+
+# Display name (as used in reports) -> wrapper module name
+MODEL_WRAPPERS = {
+    "Hedge Fund Manager": "hfm_wrapper",
+    "Most Advance stock_AI": "stock_ai_wrapper",
+    "Quantitative Development": "quant_wrapper",
+    "Apex Logic": "apex_wrapper",
+}
+
+
+def load_plugin(module_name):
+    """Import a wrapper module and return it (must expose run_analysis)."""
+    return importlib.import_module(f"wrappers.{module_name}")
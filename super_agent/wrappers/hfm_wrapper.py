@@ -1,194 +1,238 @@
 import sys
 import os
-import json
-import argparse
 import contextlib
-import numpy as np
+
+# Relative path: ../../Hedge Fund Manager
+WRAPPER_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(WRAPPER_DIR))
+MODEL_PATH = os.path.join(PROJECT_ROOT, "Hedge Fund Manager")
+
+# Daily bars this model reads (the orchestrator may pass them in as ``ohlcv``)
+DATA_NEEDS = {"lookback": "2y", "adjusted": True}
+
+# Inputs fetched by the model itself besides the daily bars (see incremental.py)
+EXTERNAL_INPUTS = ("news", "market")
+
+# Steps this model can cut when the run is behind its time budget (see wrapper_common.DEGRADATIONS)
+DEGRADABLE = ("cached_hfm_model", "skip_news", "no_history")
 
 # Suppress stdout during imports and processing to keep JSON clean
+# Kept open for the life of the process: loggers created while suppressed
+# (e.g. Quant's utils.logger) hold on to this handle across calls
+_DEVNULL = open(os.devnull, "w")
+
 @contextlib.contextmanager
 def suppress_stdout():
-    with open(os.devnull, "w") as devnull:
-        old_stdout = sys.stdout
-        sys.stdout = devnull
-        try:
-            yield
-        finally:
-            sys.stdout = old_stdout
+    old_stdout = sys.stdout
+    sys.stdout = _DEVNULL
+    try:
+        yield
+    finally:
+        sys.stdout = old_stdout
+
+def prepare():
+    """Import the model package once so a long-lived worker only pays for it at startup."""
+    try:
+        from wrappers.wrapper_common import import_model
+    except ImportError:   # run as a script from wrappers/
+        from wrapper_common import import_model
+    with suppress_stdout():
+        import_model(MODEL_PATH, "data_pipeline", "features", "model", "strategy")
+
+def _market(context=None):
+    """Market-wide inputs: from the run's MarketContext, else fetched (once per batch)."""
+    import pandas as pd
+    from data_pipeline import get_historical_data, get_market_mood, get_option_chain_analysis
+
+    # Market-wide data: computed once per run by the orchestrator (MarketContext)
+    if context is not None:
+        return (context.market_mood, context.option_data, context.benchmark,
+                context.benchmark_close, context.benchmark_returns)
+    market_mood = get_market_mood()
+    option_data = get_option_chain_analysis("NIFTY")
+    nifty_data = get_historical_data(["^NSEI"], period="2y")
+    if not nifty_data.empty and isinstance(nifty_data.columns, pd.MultiIndex):
+        nifty_data = nifty_data["^NSEI"]
+    return market_mood, option_data, nifty_data, None, None
+
+def _analyze(ticker, ohlcv, market, context=None, degrade=()):
+    import numpy as np
+    import pandas as pd
+    from data_pipeline import get_historical_data, get_news_sentiment
+    from features import add_technical_indicators, add_relative_strength, calculate_vwap, calculate_alpha_beta
+    from model import train_predict_model
+    from strategy import generate_signal
 
-def run_analysis(ticker):
-    # Add model directory to path
-    # Relative path: ../../Hedge Fund Manager
-    WRAPPER_DIR = os.path.dirname(os.path.abspath(__file__))
-    PROJECT_ROOT = os.path.dirname(os.path.dirname(WRAPPER_DIR))
-    MODEL_PATH = os.path.join(PROJECT_ROOT, "Hedge Fund Manager")
+    market_mood, option_data, nifty_data, bench_close, bench_returns = market
+
+    # Analyze Ticker
+    if ohlcv is not None:
+        hist_data = ohlcv
+    else:
+        hist_data = get_historical_data([ticker], period="2y")
+    
+    if isinstance(hist_data.columns, pd.MultiIndex):
+        if ticker not in hist_data.columns.levels[0]:
+            return {"error": "No data"}
+        df = hist_data[ticker].copy()
+    else:
+        if hist_data.empty: return {"error": "No data"}
+        df = hist_data.copy()
     
-    if MODEL_PATH not in sys.path:
-        sys.path.insert(0, MODEL_PATH)
+    if df.empty:
+        return {"error": "Empty data"}
 
+    # Feature Engineering
+    df = add_technical_indicators(df)
+    if not nifty_data.empty:
+        df = add_relative_strength(df, nifty_data, benchmark_close=bench_close)
+    
+    # HFM 2.0 Calculations
+    df = calculate_vwap(df)
+    if not nifty_data.empty:
+        bench_variance = context.variance(df.index) if context is not None else None
+        df = calculate_alpha_beta(df, nifty_data, bench_returns=bench_returns, bench_variance=bench_variance)
+    
+    # AI Prediction
+    predicted_price, model_score = train_predict_model(
+        df, ticker=ticker, use_cached="cached_hfm_model" in degrade)
+    
+    if predicted_price is None:
+        predicted_price = df['Close'].iloc[-1]
+    
+    # Sentiment
+    sentiment_score = 0 if "skip_news" in degrade else get_news_sentiment(ticker)
+    
+    # Generate Signal & History
+    history = []
+    
+    # Loop for T, T-1, T-2
+    for i in range(0 if "no_history" in degrade else 3):
+        idx = -1 - i
+        if len(df) < abs(idx): break
+    
+        row = df.iloc[idx]
+    
+        # Use same predicted price/sentiment for history approximation 
+        # (Strictly we should shift these but for persistence check Signal/Techs are key)
+        sig_data = generate_signal(
+            ticker, row, predicted_price, market_mood, option_data, sentiment_score
+        )
+    
+        conf = sig_data.get('Confidence', 0)
+        if conf > 1.0: conf /= 100.0
+    
+        history.append({
+            "date": str(row.name) if hasattr(row, 'name') else f"T-{i}",
+            "signal": sig_data.get('Signal', 'WAIT'),
+            "confidence": conf
+        })
+
+    # Current Signal (T)
+    current_row = df.iloc[-1]
+    close_price = current_row['Close']
+    atr = current_row.get('ATR', close_price * 0.02)
+    adx = current_row.get('ADX', 0)
+    rvol = current_row.get('RVOL', 0)
+    
+    # Only T signal matters for details
+    signal_data = generate_signal(
+        ticker, current_row, predicted_price, market_mood, option_data, sentiment_score
+    )
+    
+    base_signal = signal_data.get('Signal', 'WAIT')
+    base_confidence = signal_data.get('Confidence', 0.5)
+    if base_confidence > 1.0: base_confidence /= 100.0
+    
+    # --- SWING LOGIC ---
+    swing_signal = base_signal
+    swing_conf = base_confidence
+    
+    swing_sl = 0
+    swing_target = 0
+    
+    if swing_signal == "BUY":
+        swing_sl = close_price - (1.5 * atr)
+        swing_target = close_price + (3.0 * atr)
+    elif swing_signal == "SELL":
+        swing_sl = close_price + (1.5 * atr)
+        swing_target = close_price - (3.0 * atr)
+    
+    swing_data = {
+        "signal": swing_signal,
+        "confidence": swing_conf,
+        "entry": close_price,
+        "target": swing_target,
+        "sl": swing_sl
+    }
+    
+    # --- INTRADAY LOGIC ---
+    intraday_signal = base_signal
+    intraday_conf = base_confidence
+    
+    intraday_sl = 0
+    intraday_target = 0
+    
+    if intraday_signal == "BUY":
+        intraday_sl = close_price - (0.5 * atr)
+        intraday_target = close_price + (1.0 * atr)
+    elif intraday_signal == "SELL":
+        intraday_sl = close_price + (0.5 * atr)
+        intraday_target = close_price - (1.0 * atr)
+    
+    intraday_data = {
+        "signal": intraday_signal,
+        "confidence": intraday_conf,
+        "entry": close_price,
+        "target": intraday_target,
+        "sl": intraday_sl
+    }
+    
+    return {
+        "model_name": "Hedge Fund Manager",
+        "swing": swing_data,
+        "intraday": intraday_data,
+        "history": history,
+        "details": {
+            "predicted_price": predicted_price,
+            "model_score": model_score,
+            "sentiment": sentiment_score,
+            "adx": round(float(adx), 2) if not np.isnan(adx) else 0.0,
+            "rvol": round(float(rvol), 2)
+        }
+    }
+
+def run_analysis(ticker, ohlcv=None, context=None, degrade=()):
     try:
+        prepare()
         with suppress_stdout():
-            from data_pipeline import get_historical_data, get_market_mood, get_option_chain_analysis, get_news_sentiment
-            from features import add_technical_indicators, add_relative_strength, calculate_vwap, calculate_alpha_beta
-            from model import train_predict_model
-            from strategy import generate_signal
-            import pandas as pd
-
-            # Cache/Fetch Data
-            market_mood = get_market_mood()
-            option_data = get_option_chain_analysis("NIFTY")
-            nifty_data = get_historical_data(["^NSEI"], period="2y")
-            if not nifty_data.empty and isinstance(nifty_data.columns, pd.MultiIndex):
-                 nifty_data = nifty_data["^NSEI"]
-
-            # Analyze Ticker
-            hist_data = get_historical_data([ticker], period="2y")
-            
-            if isinstance(hist_data.columns, pd.MultiIndex):
-                if ticker not in hist_data.columns.levels[0]:
-                    return {"error": "No data"}
-                df = hist_data[ticker].copy()
-            else:
-                if hist_data.empty: return {"error": "No data"}
-                df = hist_data.copy()
-            
-            if df.empty:
-                return {"error": "Empty data"}
-
-            # Feature Engineering
-            df = add_technical_indicators(df)
-            if not nifty_data.empty:
-                df = add_relative_strength(df, nifty_data)
-                
-            # HFM 2.0 Calculations
-            df = calculate_vwap(df)
-            if not nifty_data.empty:
-                df = calculate_alpha_beta(df, nifty_data)
-            
-            # AI Prediction
-            predicted_price, model_score = train_predict_model(df)
-            
-            if predicted_price is None:
-                predicted_price = df['Close'].iloc[-1]
-                
-            # Sentiment
-            sentiment_score = get_news_sentiment(ticker)
-            
-            # Generate Signal & History
-            history = []
-            
-            # Loop for T, T-1, T-2
-            for i in range(3):
-                idx = -1 - i
-                if len(df) < abs(idx): break
-                
-                row = df.iloc[idx]
-                
-                # Use same predicted price/sentiment for history approximation 
-                # (Strictly we should shift these but for persistence check Signal/Techs are key)
-                sig_data = generate_signal(
-                    ticker, row, predicted_price, market_mood, option_data, sentiment_score
-                )
-                
-                conf = sig_data.get('Confidence', 0)
-                if conf > 1.0: conf /= 100.0
-                
-                history.append({
-                    "date": str(row.name) if hasattr(row, 'name') else f"T-{i}",
-                    "signal": sig_data.get('Signal', 'WAIT'),
-                    "confidence": conf
-                })
-
-            # Current Signal (T)
-            current_row = df.iloc[-1]
-            close_price = current_row['Close']
-            atr = current_row.get('ATR', close_price * 0.02)
-            adx = current_row.get('ADX', 0)
-            rvol = current_row.get('RVOL', 0)
-            
-            # Only T signal matters for details
-            signal_data = generate_signal(
-                ticker, current_row, predicted_price, market_mood, option_data, sentiment_score
-            )
-            
-            base_signal = signal_data.get('Signal', 'WAIT')
-            base_confidence = signal_data.get('Confidence', 0.5)
-            if base_confidence > 1.0: base_confidence /= 100.0
-            
-            # --- SWING LOGIC ---
-            swing_signal = base_signal
-            swing_conf = base_confidence
-            
-            swing_sl = 0
-            swing_target = 0
-            
-            if swing_signal == "BUY":
-                swing_sl = close_price - (1.5 * atr)
-                swing_target = close_price + (3.0 * atr)
-            elif swing_signal == "SELL":
-                swing_sl = close_price + (1.5 * atr)
-                swing_target = close_price - (3.0 * atr)
-            
-            swing_data = {
-                "signal": swing_signal,
-                "confidence": swing_conf,
-                "entry": close_price,
-                "target": swing_target,
-                "sl": swing_sl
-            }
-            
-            # --- INTRADAY LOGIC ---
-            intraday_signal = base_signal
-            intraday_conf = base_confidence
-            
-            intraday_sl = 0
-            intraday_target = 0
-            
-            if intraday_signal == "BUY":
-                intraday_sl = close_price - (0.5 * atr)
-                intraday_target = close_price + (1.0 * atr)
-            elif intraday_signal == "SELL":
-                intraday_sl = close_price + (0.5 * atr)
-                intraday_target = close_price - (1.0 * atr)
-                
-            intraday_data = {
-                "signal": intraday_signal,
-                "confidence": intraday_conf,
-                "entry": close_price,
-                "target": intraday_target,
-                "sl": intraday_sl
-            }
-            
-            return {
-                "model_name": "Hedge Fund Manager",
-                "swing": swing_data,
-                "intraday": intraday_data,
-                "history": history,
-                "details": {
-                    "predicted_price": predicted_price,
-                    "model_score": model_score,
-                    "sentiment": sentiment_score,
-                    "adx": round(float(adx), 2) if not np.isnan(adx) else 0.0,
-                    "rvol": round(float(rvol), 2)
-                }
-            }
-
+            return _analyze(ticker, ohlcv, _market(context), context, degrade)
     except Exception as e:
         import traceback
-        return {"error": f"{str(e)} | {traceback.format_exc()}"}
+        return {"error": str(e), "traceback": traceback.format_exc()}
+
+def run_analysis_batch(tickers, data_bundle=None, context=None, degrade=()):
+    """Market mood, option chain and benchmark are fetched once for the whole batch."""
+    import traceback
+    data_bundle = data_bundle or {}
+
+    try:
+        prepare()
+        with suppress_stdout():
+            market = _market(context)
+    except Exception as e:
+        for ticker in tickers:
+            yield ticker, {"error": str(e), "traceback": traceback.format_exc()}
+        return
+
+    for ticker in tickers:
+        try:
+            with suppress_stdout():
+                result = _analyze(ticker, data_bundle.get(ticker), market, context, degrade)
+        except Exception as e:
+            result = {"error": str(e), "traceback": traceback.format_exc()}
+        yield ticker, result
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--ticker", required=True)
-    args = parser.parse_args()
-    
-    class NumpyEncoder(json.JSONEncoder):
-        def default(self, obj):
-            if hasattr(obj, 'item'):
-                return obj.item()
-            if hasattr(obj, 'tolist'):
-                return obj.tolist()
-            return super().default(obj)
-
-    result = run_analysis(args.ticker)
-    print(json.dumps(result, cls=NumpyEncoder))
+    from wrapper_common import cli
+    cli(run_analysis, prepare, DATA_NEEDS, run_analysis_batch)
@@ -0,0 +1,172 @@
+"""
+Typed wrapper results and the framed binary transport.
+
+Every wrapper's ``run_analysis`` returns one of:
+
+    {"model_name": str,
+     "swing":    {"signal": str, "confidence": float, "entry": float, "target": float, "sl": float},
+     "intraday": {same fields as swing},
+     "history":  [{"date": str, "signal": str, "confidence": float}, ...],
+     "details":  {str: number | str | ...}}
+
+    {"error": str, "traceback": str (optional), "details": {...} (optional)}
+
+normalize_result() coerces a result to exactly these plain Python types
+(numpy scalars included), so encoding needs no custom JSON encoder.
+
+Frames:  MAGIC (4 bytes) | codec (1 byte) | payload length (uint32, big-endian) | payload
+
+codec b"M" is msgpack (used when installed), b"J" is UTF-8 JSON. MAGIC starts
+with 0xFF, which never occurs in UTF-8 text, so readers resync on it and skip
+stray prints from third-party libraries between frames. A frame carries one
+message; a batch streams one message per ticker.
+"""
+
+import json
+import math
+import struct
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MAGIC = b"\xffSA4"
+_HEADER = struct.Struct(">cI")
+MAX_FRAME = 256 * 1024 * 1024
+
+_LEG_TYPES = {"signal": str, "confidence": float, "entry": float, "target": float, "sl": float}
+
+
+# --- SCHEMA ---
+
+def plain(obj):
+    """Recursively convert numpy scalars/arrays and tuples to plain Python values."""
+    if isinstance(obj, dict):
+        return {str(k): plain(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [plain(v) for v in obj]
+    # Exact types: numpy's float64 / str_ subclass float / str
+    if type(obj) in (str, bool, int, float) or obj is None:
+        return obj
+    if hasattr(obj, "item") and getattr(obj, "ndim", 0) == 0:
+        return obj.item()
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    return str(obj)
+
+
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _leg(leg):
+    out = plain(leg or {})
+    for field, kind in _LEG_TYPES.items():
+        if field in out:
+            out[field] = str(out[field]) if kind is str else _as_float(out[field])
+    return out
+
+
+def normalize_result(result):
+    """Coerce one wrapper result to the schema above."""
+    if not isinstance(result, dict):
+        return {"error": f"Malformed result: {type(result).__name__}"}
+    if "error" in result:
+        out = plain(result)
+        out["error"] = str(out["error"])
+        return out
+    out = plain(result)
+    for mode in ("swing", "intraday"):
+        if mode in out:
+            out[mode] = _leg(out[mode])
+    out["history"] = [
+        {**h, "date": str(h.get("date", "")), "signal": str(h.get("signal", "WAIT")),
+         "confidence": _as_float(h.get("confidence", 0))}
+        for h in out.get("history", [])
+    ]
+    return out
+
+
+# --- FRAMES ---
+
+def encode(msg):
+    """One message -> one frame (bytes)."""
+    msg = plain(msg)
+    if msgpack is not None:
+        codec, payload = b"M", msgpack.packb(msg, use_bin_type=True)
+    else:
+        codec, payload = b"J", json.dumps(msg).encode("utf-8")
+    return MAGIC + _HEADER.pack(codec, len(payload)) + payload
+
+
+def _decode(codec, payload):
+    if codec == b"M":
+        if msgpack is None:
+            raise ValueError("Frame is msgpack-encoded but msgpack is not installed")
+        return msgpack.unpackb(payload, raw=False)
+    if codec == b"J":
+        return json.loads(payload.decode("utf-8"))
+    raise ValueError(f"Unknown frame codec {codec!r}")
+
+
+def decode_frames(data):
+    """Every well-formed message in a byte string, skipping anything between frames."""
+    messages = []
+    pos = data.find(MAGIC)
+    while pos != -1:
+        start = pos + len(MAGIC) + _HEADER.size
+        if start <= len(data):
+            codec, length = _HEADER.unpack_from(data, pos + len(MAGIC))
+            if length <= MAX_FRAME and start + length <= len(data):
+                try:
+                    messages.append(_decode(codec, data[start:start + length]))
+                    pos = data.find(MAGIC, start + length)
+                    continue
+                except ValueError:
+                    pass
+        pos = data.find(MAGIC, pos + 1)
+    return messages
+
+
+def _read_exact(stream, n):
+    chunks = []
+    while n > 0:
+        chunk = stream.read(n)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b"".join(chunks)
+
+
+def read_frame(stream):
+    """Next message from a binary stream (None at EOF)."""
+    while True:
+        window = b""
+        while window != MAGIC:
+            byte = stream.read(1)
+            if not byte:
+                return None
+            window = (window + byte)[-len(MAGIC):]
+        header = _read_exact(stream, _HEADER.size)
+        if header is None:
+            return None
+        codec, length = _HEADER.unpack(header)
+        if length > MAX_FRAME:
+            continue
+        payload = _read_exact(stream, length)
+        if payload is None:
+            return None
+        try:
+            return _decode(codec, payload)
+        except ValueError:
+            continue
+
+
+def write_frame(stream, msg):
+    stream.write(encode(msg))
+    stream.flush()
@@ -0,0 +1,401 @@
+"""
+Helpers shared by the wrapper scripts and the orchestrator.
+
+Kept free of heavy imports: the wrappers import this before their
+model packages, and the orchestrator imports it as ``wrappers.wrapper_common``.
+"""
+
+import os
+import sys
+import json
+import argparse
+import importlib
+
+try:
+    from .result_protocol import normalize_result, read_frame, write_frame, encode
+except ImportError:
+    # Run as a script: the wrappers directory is on sys.path instead
+    from result_protocol import normalize_result, read_frame, write_frame, encode
+
+
+class NumpyEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if hasattr(obj, 'item'):
+            return obj.item()
+        if hasattr(obj, 'tolist'):
+            return obj.tolist()
+        return super().default(obj)
+
+
+def dump_result(result):
+    """Serialize a wrapper result to a single JSON line."""
+    return json.dumps(result, cls=NumpyEncoder)
+
+
+# --- SHARED OHLCV (see market_data.py) ---
+
+def lookback_years(lookback):
+    """'1y' -> 1, '10y' -> 10, '6mo' -> 0.5"""
+    if lookback.endswith("mo"):
+        return int(lookback[:-2]) / 12
+    if lookback.endswith("y"):
+        return int(lookback[:-1])
+    raise ValueError(f"Unsupported lookback: {lookback}")
+
+
+def trailing_window(frame, lookback):
+    """Copy of the last ``lookback`` of a canonical daily frame."""
+    import pandas as pd
+    if frame is None or frame.empty:
+        return frame
+    months = int(round(lookback_years(lookback) * 12))
+    start = frame.index[-1] - pd.DateOffset(months=months)
+    return frame[frame.index > start].copy()
+
+
+def stack_windows(frames, column):
+    """(bars x tickers) matrix of one column, each ticker right-aligned and NaN-padded on top."""
+    import numpy as np
+    import pandas as pd
+    n = max(len(df) for df in frames.values())
+    out = np.full((n, len(frames)), np.nan)
+    for j, df in enumerate(frames.values()):
+        values = df[column].to_numpy(dtype=float)
+        out[n - len(values):, j] = values
+    return pd.DataFrame(out, columns=list(frames))
+
+
+def read_ohlcv(path):
+    """Load a store CSV into the canonical frame (flat OHLCV, tz-naive daily index)."""
+    import pandas as pd
+    df = pd.read_csv(path, index_col=0)
+    # Files written by stock_AI's DataEngine carry a +05:30 offset; keep the local date
+    df.index = pd.to_datetime(df.index.astype(str).str[:10])
+    df.index.name = "Date"
+    return df[["Open", "High", "Low", "Close", "Volume"]].astype(float)
+
+
+# --- MODEL PACKAGES ---
+
+SUPER_AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def fetch_gate():
+    """super_agent's fetch_gate module, also from a wrapper run as a script."""
+    if SUPER_AGENT_DIR not in sys.path:
+        sys.path.append(SUPER_AGENT_DIR)
+    import fetch_gate
+    return fetch_gate
+
+
+def import_model(model_path, *modules):
+    """
+    Put a model package on sys.path and import ``modules`` from it, their
+    Yahoo and NSE calls bound to the shared rate limiter (fetch_gate.stand_ins),
+    so the packages keep their plain yfinance / nsepython imports.
+    """
+    if model_path not in sys.path:
+        sys.path.insert(0, model_path)
+    if all(name in sys.modules for name in modules):
+        return
+    with fetch_gate().stand_ins():
+        for name in modules:
+            importlib.import_module(name)
+
+
+# --- MARKET CONTEXT (see market_context.py) ---
+
+class MarketContext:
+    """
+    Market-wide inputs shared by every ticker in a run: FII/DII mood, NIFTY
+    option-chain PCR / max pain and the ^NSEI benchmark with its daily returns.
+    Rolling benchmark variance is computed once per distinct stock index.
+    """
+
+    def __init__(self, market_mood, option_data, benchmark_close, date=None):
+        self.market_mood = market_mood
+        self.option_data = option_data
+        self.benchmark_close = benchmark_close
+        self.benchmark_returns = benchmark_close.pct_change()
+        self.date = date
+        self._variance = {}
+
+    @property
+    def benchmark(self):
+        """Benchmark as a frame with a 'Close' column (the shape HFM expects)."""
+        return self.benchmark_close.to_frame("Close")
+
+    def variance(self, index, window=60):
+        """Rolling variance of benchmark returns aligned to ``index`` (as calculate_alpha_beta does)."""
+        key = (hash(index.values.tobytes()), len(index), window)
+        var = self._variance.get(key)
+        if var is None:
+            bench_ret = self.benchmark_returns.reindex(index).fillna(0)
+            var = self._variance[key] = bench_ret.rolling(window=window).var()
+        return var
+
+    def to_dict(self):
+        return {
+            "date": self.date,
+            "market_mood": self.market_mood,
+            "option_data": self.option_data,
+            "benchmark": {
+                "dates": [d.strftime("%Y-%m-%d") for d in self.benchmark_close.index],
+                "close": self.benchmark_close.tolist(),
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        import pandas as pd
+        index = pd.DatetimeIndex(pd.to_datetime(data["benchmark"]["dates"]), name="Date")
+        close = pd.Series(data["benchmark"]["close"], index=index, name="Close", dtype=float)
+        return cls(data["market_mood"], data["option_data"], close, data.get("date"))
+
+
+# Contexts this process has loaded, by path
+_CONTEXTS = {}
+
+
+def load_market_context(path):
+    if not path:
+        return None
+    mtime = os.path.getmtime(path)
+    cached = _CONTEXTS.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path) as f:
+            cached = _CONTEXTS[path] = (mtime, MarketContext.from_dict(json.load(f)))
+    return cached[1]
+
+
+# --- DEGRADED RUNS (see budget.py) ---
+#
+# Expensive steps a wrapper may be told to cut when the run is behind its
+# time budget, in the order they are given up. Each wrapper lists the ones
+# it honours in DEGRADABLE and is only ever sent those.
+
+DEGRADATIONS = (
+    "cached_hfm_model",     # HFM: predict with the last trained XGBoost model for the ticker
+    "skip_news",            # neutral news sentiment instead of fetching headlines
+    "skip_intraday_vwap",   # Quant: no 15m VWAP confirmation (intraday BUYs stand unconfirmed)
+    "no_history",           # no T-1 / T-2 slices; aggregation uses its no-history fallback
+)
+
+
+def parse_degrade(value):
+    """'skip_news,no_history' (CLI / request field) -> tuple, unknown names dropped."""
+    if not value:
+        return ()
+    names = value.split(",") if isinstance(value, str) else value
+    return tuple(d for d in DEGRADATIONS if d in names)
+
+
+def analysis_kwargs(ohlcv, context_path, degrade=()):
+    kwargs = {"ohlcv": ohlcv}
+    # Only wrappers declaring "market" in EXTERNAL_INPUTS are sent a context
+    if context_path:
+        kwargs["context"] = load_market_context(context_path)
+    if degrade:
+        kwargs["degrade"] = tuple(degrade)
+    return kwargs
+
+
+def _finish(result, degrade):
+    result = normalize_result(result)
+    if degrade and "error" not in result:
+        result["degraded"] = list(degrade)
+    return result
+
+
+def analyze(run_analysis, ticker, ohlcv, context_path=None, degrade=()):
+    """Run one ticker; a result computed with cut steps lists them under "degraded"."""
+    return _finish(run_analysis(ticker, **analysis_kwargs(ohlcv, context_path, degrade)), degrade)
+
+
+# --- BATCHES ---
+#
+# ``run_analysis_batch(tickers, data_bundle=None, ...)`` takes the same keyword
+# arguments as run_analysis, with ``data_bundle`` (ticker -> daily bars, or
+# None to fetch) in place of ``ohlcv``, and yields ``(ticker, result)`` in
+# ticker order as each one is done. Per-model setup (imports, engines,
+# market-wide data) happens once per batch instead of once per ticker.
+
+def batch_kwargs(data_bundle, context_path, degrade=()):
+    kwargs = analysis_kwargs(None, context_path, degrade)
+    del kwargs["ohlcv"]
+    kwargs["data_bundle"] = data_bundle
+    return kwargs
+
+
+def analyze_batch(run_analysis_batch, tickers, data_bundle=None, context_path=None, degrade=()):
+    """
+    Yield ``(ticker, result)`` exactly once for every ticker, normalised as
+    analyze() does, in the order the batch answers. Results are matched by
+    ticker: a ticker the batch never answered (or had not reached when it
+    failed) gets an error, and anything not asked for is ignored.
+    """
+    pending = dict.fromkeys(tickers)
+    try:
+        for ticker, result in run_analysis_batch(list(pending), **batch_kwargs(data_bundle, context_path, degrade)):
+            if ticker in pending:
+                del pending[ticker]
+                yield ticker, _finish(result, degrade)
+        error = "No result from batch"
+    except Exception as e:
+        error = f"Batch failed: {e}"
+    for ticker in pending:
+        yield ticker, {"error": error}
+
+
+# --- WORKER MODE (FRAMES OVER STDIN/STDOUT, see result_protocol.py) ---
+#
+#   -> {"id": 7, "ticker": "TCS.NS"}     <- {"id": 7, "result": {...}}
+#      (optional "ohlcv_path": a store CSV to use instead of fetching;
+#       optional "context_path": a MarketContext JSON for the whole run;
+#       optional "degrade": steps to cut, see DEGRADATIONS)
+#   -> {"id": 8, "tickers": [...], "ohlcv_paths": [...]}
+#                                        <- {"id": 8, "ticker": "TCS.NS", "result": {...}}
+#                                           ... one frame per ticker, as each is done
+#                                        <- {"id": 8, "op": "done", "count": 2}
+#   -> {"id": 9, "op": "ping"}           <- {"id": 9, "op": "pong"}
+#   -> {"op": "shutdown"}                   (worker exits)
+#
+# On startup the worker sends {"op": "ready"} once its model package is imported.
+
+def _protocol_stdout():
+    """
+    Detach the real stdout for protocol use and point fd 1 at stderr,
+    so prints from model code (or C extensions) cannot corrupt the stream.
+    """
+    sys.stdout.flush()
+    proto = os.fdopen(os.dup(1), "wb")
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+    return proto
+
+
+def _load_ohlcv(path, data_needs):
+    if not path:
+        return None
+    frame = read_ohlcv(path)
+    return trailing_window(frame, data_needs["lookback"]) if data_needs else frame
+
+
+def _analyze(run_analysis, ticker, ohlcv_path, context_path, data_needs, degrade=()):
+    try:
+        ohlcv = _load_ohlcv(ohlcv_path, data_needs)
+        return analyze(run_analysis, ticker, ohlcv, context_path, degrade)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def _analyze_batch(run_analysis_batch, tickers, ohlcv_paths, context_path, data_needs, degrade=()):
+    """Yield ``(ticker, result)``; a ticker whose store file cannot be read fails alone."""
+    paths = ohlcv_paths or [None] * len(tickers)
+    bundle, failed = {}, {}
+    for ticker, path in zip(tickers, paths):
+        try:
+            bundle[ticker] = _load_ohlcv(path, data_needs)
+        except Exception as e:
+            failed[ticker] = {"error": str(e)}
+    yield from failed.items()
+    yield from analyze_batch(run_analysis_batch, [t for t in tickers if t in bundle], bundle, context_path, degrade)
+
+
+def one_at_a_time(run_analysis):
+    """run_analysis_batch for a wrapper that has none."""
+    def run_analysis_batch(tickers, data_bundle=None, **kwargs):
+        for ticker in tickers:
+            yield ticker, run_analysis(ticker, ohlcv=(data_bundle or {}).get(ticker), **kwargs)
+    return run_analysis_batch
+
+
+def serve(run_analysis, prepare=None, data_needs=None, run_analysis_batch=None):
+    proto = _protocol_stdout()
+    requests = sys.stdin.buffer
+    run_analysis_batch = run_analysis_batch or one_at_a_time(run_analysis)
+
+    def send(msg):
+        write_frame(proto, msg)
+
+    if prepare is not None:
+        prepare()
+    send({"op": "ready", "pid": os.getpid()})
+
+    while True:
+        try:
+            req = read_frame(requests)
+        except Exception as e:
+            send({"id": None, "result": {"error": f"Bad request: {e}"}})
+            continue
+        if req is None:
+            break
+        if not isinstance(req, dict):
+            send({"id": None, "result": {"error": f"Bad request: {str(req)[:100]}"}})
+            continue
+
+        op = req.get("op", "analyze")
+        if op == "shutdown":
+            break
+        if op == "ping":
+            send({"id": req.get("id"), "op": "pong"})
+            continue
+
+        context_path = req.get("context_path")
+        degrade = parse_degrade(req.get("degrade"))
+        if "tickers" in req:
+            count = 0
+            for ticker, result in _analyze_batch(run_analysis_batch, req["tickers"], req.get("ohlcv_paths"),
+                                                 context_path, data_needs, degrade):
+                send({"id": req.get("id"), "ticker": ticker, "result": result})
+                count += 1
+            send({"id": req.get("id"), "op": "done", "count": count})
+            continue
+
+        result = _analyze(run_analysis, req["ticker"], req.get("ohlcv_path"), context_path, data_needs, degrade)
+        send({"id": req.get("id"), "result": result})
+
+
+def cli(run_analysis, prepare=None, data_needs=None, run_analysis_batch=None):
+    """Entry point for ``python <wrapper>.py --ticker X``, ``--tickers X,Y`` or ``--serve``."""
+    parser = argparse.ArgumentParser()
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--ticker")
+    group.add_argument("--tickers", help="Comma-separated batch: one result line (or frame) per ticker, "
+                                         "each {\"ticker\", \"result\"}, written as it is done")
+    group.add_argument("--serve", action="store_true",
+                       help="Long-lived worker: framed requests on stdin, results on stdout")
+    parser.add_argument("--ohlcv", help="Store CSV with daily bars to use instead of fetching "
+                                        f"(with --tickers: one per ticker, '{os.pathsep}'-separated, empty to fetch)")
+    parser.add_argument("--context", help="MarketContext JSON to use instead of fetching market-wide data")
+    parser.add_argument("--degrade", help="Comma-separated steps to cut (see DEGRADATIONS)")
+    parser.add_argument("--binary", action="store_true",
+                        help="Write the result as one binary frame instead of a JSON line")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(run_analysis, prepare, data_needs, run_analysis_batch)
+        return
+
+    if args.tickers:
+        tickers = [t for t in args.tickers.split(",") if t]
+        paths = [p or None for p in args.ohlcv.split(os.pathsep)] if args.ohlcv else None
+        if paths is not None and len(paths) != len(tickers):
+            parser.error("--ohlcv needs one entry per ticker with --tickers")
+        out = _protocol_stdout() if args.binary else None
+        for ticker, result in _analyze_batch(run_analysis_batch or one_at_a_time(run_analysis), tickers, paths,
+                                             args.context, data_needs, parse_degrade(args.degrade)):
+            if out is not None:
+                write_frame(out, {"ticker": ticker, "result": result})
+            else:
+                print(dump_result({"ticker": ticker, "result": result}), flush=True)
+        return
+
+    ohlcv = _load_ohlcv(args.ohlcv, data_needs)
+    result = analyze(run_analysis, args.ticker, ohlcv, args.context, parse_degrade(args.degrade))
+    if args.binary:
+        sys.stdout.flush()
+        sys.stdout.buffer.write(encode(result))
+        sys.stdout.buffer.flush()
+    else:
+        print(dump_result(result))